@@ -1,17 +1,70 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, Response
 from flask_cors import CORS
 
+from config import BUSQUEDA_CONFIG
+from db import estadisticas_pool
+from utils.logger import iniciar_request, finalizar_request, cerrar_request, profundidad_cola_logs, registrar_log
+from utils.metricas import registro, registrar_request
+from utils.serializacion import ProveedorJSON
+from utils.compresion import comprimir
+from utils.condicional import verificar, marcar
+
 # Importar Blueprints
 from routes.alumnos.alumnos_routes import alumnos_bp
+from routes.alumnos.busqueda import indice_alumnos
 from routes.cursos.cursos_routes import cursos_bp
-from routes.matriculas.matriculas_routes import matriculas_bp
+from routes.matriculas.matriculas_routes import matriculas_bp, cola_matriculas
 from routes.evaluaciones.evaluaciones_routes import evaluaciones_bp
 from routes.reportes.reportes_routes import reportes_bp
+from routes.reportes import asincrono
+from migraciones import pendientes_esquema
+
+
+def verificar_esquema():
+    """
+    Avisa en el log si faltan migraciones: las escrituras de matrículas y
+    notas usan tablas que crean ellas y, sin aplicarlas, fallan con errores
+    de SQL. Devuelve las pendientes (None si la BD no respondió).
+    """
+    pendientes = pendientes_esquema()
+    if pendientes is None:
+        registrar_log("sistema", "WARN", "No se pudo verificar schema_migraciones: base de datos no disponible")
+    elif pendientes:
+        detalle = ", ".join(f"{version:03d} {nombre}" for version, nombre in pendientes)
+        registrar_log("sistema", "ERROR", f"Esquema desactualizado, migraciones pendientes: {detalle}. "
+                                          f"Aplicarlas con: python -m migraciones")
+    return pendientes
 
 def create_app():
     app = Flask(__name__)
+    # jsonify con orjson, formato columnar (?columnar=1) y MessagePack por Accept
+    app.json = ProveedorJSON(app)
     CORS(app)
 
+    # Registrado primero: Flask corre los after_request en orden inverso, así comprime al final
+    app.after_request(comprimir)
+
+    # Medición de cada request (tiempo, status real y línea de acceso)
+    app.before_request(iniciar_request)
+    app.after_request(finalizar_request)
+    app.teardown_request(cerrar_request)
+    app.after_request(registrar_request)
+
+    # ETag por versiones de datos: 304 sin ejecutar la consulta; Cache-Control por blueprint
+    app.before_request(verificar)
+    app.after_request(marcar)
+
+    registro.medidor("db_pool_conexiones_abiertas", "Conexiones abiertas en el pool",
+                     lambda: estadisticas_pool()["abiertas"])
+    registro.medidor("db_pool_conexiones_libres", "Conexiones libres en el pool",
+                     lambda: estadisticas_pool()["libres"])
+    registro.medidor("log_cola_profundidad", "Líneas de log pendientes de escribir",
+                     profundidad_cola_logs)
+    registro.medidor("cola_matriculas_profundidad", "Solicitudes de matrícula en cola",
+                     cola_matriculas.profundidad)
+    registro.medidor("reportes_secciones_pendientes", "Secciones de reportes en curso o esperando hilo",
+                     asincrono.pendientes)
+
     # Ruta raíz
     @app.route('/')
     def home():
@@ -20,6 +73,7 @@ def create_app():
             "version": "1.0",
             "endpoints_disponibles": [
                 "GET /api/alumnos - Listar alumnos",
+                "GET /api/alumnos/search?q= - Buscar alumnos",
                 "GET /api/alumnos/<id> - Obtener alumno",
                 "POST /api/alumnos - Crear alumno",
                 "PUT /api/alumnos/<id> - Actualizar alumno",
@@ -27,10 +81,16 @@ def create_app():
                 "GET /api/cursos - Listar cursos",
                 "GET /api/matriculas - Listar matrículas",
                 "GET /api/evaluaciones - Listar evaluaciones",
-                "GET /api/reportes/general - Reporte general"
+                "GET /api/reportes/general - Reporte general",
+                "GET /metrics - Métricas de la API (Prometheus)"
             ]
         })
 
+    # Métricas en formato Prometheus
+    @app.route('/metrics')
+    def metrics():
+        return Response(registro.exponer(), mimetype="text/plain; version=0.0.4")
+
     # Registrar módulos
     app.register_blueprint(alumnos_bp)
     app.register_blueprint(cursos_bp)
@@ -38,8 +98,12 @@ def create_app():
     app.register_blueprint(evaluaciones_bp)
     app.register_blueprint(reportes_bp)
 
+    verificar_esquema()
+    if BUSQUEDA_CONFIG["armar_al_iniciar"]:
+        indice_alumnos.armar_al_iniciar()
     return app
 
+# Servidor de desarrollo; en producción: python servidor.py
 if __name__ == "__main__":
     app = create_app()
-app.run(host="127.0.0.1", port=5000, debug=True, use_reloader=False)
\ No newline at end of file
+    app.run(host="127.0.0.1", port=5000, debug=True, use_reloader=False)
@@ -0,0 +1,245 @@
+"""
+Benchmark de la API REST.
+
+Ejecutar desde backend_api/:
+
+    # Sembrar dataset sintético (¡vacía las tablas!) y medir con el test client de Flask
+    python -m benchmarks.benchmark_api --sembrar --alumnos 2000 --matriculas 20000
+
+    # Generador de carga HTTP concurrente contra un servidor ya levantado
+    python -m benchmarks.benchmark_api --url http://127.0.0.1:5000 --concurrencia 16
+
+    # Guardar resultados y compararlos en la siguiente corrida
+    python -m benchmarks.benchmark_api --json base.json
+    python -m benchmarks.benchmark_api --base base.json --tolerancia 0.25
+
+    # Mismo benchmark sobre SQLite (sin servidor MySQL) para comparar motores
+    DB_MOTOR=sqlite python -m benchmarks.benchmark_api --sembrar --json sqlite.json
+    python -m benchmarks.benchmark_api --base sqlite.json
+
+Reporta por endpoint: requests, errores, throughput (req/s) y p50/p95/p99 (ms).
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import datos
+from db import MOTOR
+
+
+# ============================
+# ENDPOINTS A MEDIR
+# ============================
+def endpoints(dataset, escrituras=False):
+    """(nombre, método, función que arma la URL, función que arma el body)"""
+    azar = random.Random(7)
+    alumnos = max(dataset.get("alumnos", 1), 1)
+    cursos = max(dataset.get("cursos", 1), 1)
+    matriculas = max(dataset.get("matriculas", 1), 1)
+    contador = iter(range(10 ** 9))
+
+    lista = [
+        ("alumnos.listar", "GET", lambda: "/api/alumnos", None),
+        ("alumnos.listar_pagina", "GET", lambda: "/api/alumnos?limit=50", None),
+        ("alumnos.obtener", "GET", lambda: f"/api/alumnos/{azar.randint(1, alumnos)}", None),
+        ("alumnos.buscar", "GET",
+         lambda: f"/api/alumnos/search?q={azar.choice(datos.APELLIDOS)[:azar.randint(2, 5)]}", None),
+        ("cursos.listar", "GET", lambda: "/api/cursos", None),
+        ("cursos.obtener", "GET", lambda: f"/api/cursos/{azar.randint(1, cursos)}", None),
+        ("matriculas.listar", "GET", lambda: "/api/matriculas", None),
+        ("matriculas.listar_pagina", "GET", lambda: "/api/matriculas?limit=50", None),
+        ("matriculas.obtener", "GET", lambda: f"/api/matriculas/{azar.randint(1, matriculas)}", None),
+        ("matriculas.inicio", "GET", lambda: "/api/matriculas/inicio?fields=id,alumno,curso,ciclo,estado", None),
+        ("evaluaciones.listar", "GET", lambda: "/api/evaluaciones", None),
+        ("evaluaciones.listar_pagina", "GET", lambda: "/api/evaluaciones?limit=50", None),
+        ("evaluaciones.pendientes", "GET", lambda: "/api/evaluaciones/pendientes", None),
+        ("reportes.rendimiento_todos", "GET",
+         lambda: f"/api/reportes/rendimiento_alumno/{azar.randint(1, alumnos)}?filtro=TODOS", None),
+        ("reportes.rendimiento_ultimo", "GET",
+         lambda: f"/api/reportes/rendimiento_alumno/{azar.randint(1, alumnos)}?filtro=ULTIMO", None),
+        ("reportes.alumnos_ciclo", "GET", lambda: "/api/reportes/alumnos_ciclo", None),
+        ("reportes.inicio", "GET", lambda: "/api/reportes/inicio", None),
+        ("reportes.tablero", "GET",
+         lambda: f"/api/reportes/tablero?alumno={azar.randint(1, alumnos)}&ciclo={azar.randint(1, 10)}", None),
+    ]
+
+    if escrituras:
+        def nuevo_alumno():
+            n = next(contador)
+            return {"nombre": "Bench", "apellido": "Carga", "dni": f"{(90000000 + n * 7919) % 100000000:08d}",
+                    "edad": 20, "ciclo_actual": 1}
+
+        lista += [
+            ("alumnos.crear", "POST", lambda: "/api/alumnos", nuevo_alumno),
+            ("matriculas.lote", "POST", lambda: "/api/matriculas/lote", lambda: {"matriculas": [
+                {"id_alumno": azar.randint(1, alumnos), "id_curso": azar.randint(1, cursos), "ciclo": 10}
+                for _ in range(20)]}),
+        ]
+    return lista
+
+
+# ============================
+# CLIENTES
+# ============================
+class ClienteFlask:
+    """Llama a la app en proceso (sin red) con el test client de Flask"""
+
+    def __init__(self):
+        from app import create_app
+        self.app = create_app()
+        self._local = threading.local()
+
+    def llamar(self, metodo, ruta, body=None):
+        cliente = getattr(self._local, "cliente", None)
+        if cliente is None:
+            cliente = self._local.cliente = self.app.test_client()
+        respuesta = cliente.open(ruta, method=metodo, json=body)
+        respuesta.get_data()
+        return respuesta.status_code
+
+
+class ClienteHTTP:
+    """Generador de carga HTTP contra un servidor levantado"""
+
+    def __init__(self, url_base, timeout=30):
+        self.url_base = url_base.rstrip("/")
+        self.timeout = timeout
+
+    def llamar(self, metodo, ruta, body=None):
+        datos_body = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(self.url_base + ruta, data=datos_body, method=metodo,
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as respuesta:
+                respuesta.read()
+                return respuesta.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+# ============================
+# MEDICIÓN
+# ============================
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, min(len(valores_ordenados) - 1, round(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[indice]
+
+
+def medir_endpoint(cliente, metodo, url, body, requests, concurrencia, calentamiento=3):
+    for _ in range(calentamiento):
+        cliente.llamar(metodo, url(), body() if body else None)
+
+    def una_llamada(_):
+        ruta, cuerpo = url(), body() if body else None
+        inicio = time.perf_counter()
+        try:
+            status = cliente.llamar(metodo, ruta, cuerpo)
+        except Exception:
+            status = 0
+        return (time.perf_counter() - inicio) * 1000, status
+
+    inicio = time.perf_counter()
+    if concurrencia > 1:
+        with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+            muestras = list(ejecutor.map(una_llamada, range(requests)))
+    else:
+        muestras = [una_llamada(i) for i in range(requests)]
+    total = time.perf_counter() - inicio
+
+    latencias = sorted(m[0] for m in muestras)
+    return {
+        "requests": requests,
+        "errores": sum(1 for m in muestras if not 200 <= m[1] < 400),
+        "rps": round(requests / total, 1) if total else 0.0,
+        "p50_ms": round(percentil(latencias, 50), 2),
+        "p95_ms": round(percentil(latencias, 95), 2),
+        "p99_ms": round(percentil(latencias, 99), 2),
+    }
+
+
+def ejecutar(cliente, dataset, requests=200, concurrencia=1, escrituras=False, filtro=None):
+    resultados = {}
+    for nombre, metodo, url, body in endpoints(dataset, escrituras):
+        if filtro and filtro not in nombre:
+            continue
+        resultados[nombre] = medir_endpoint(cliente, metodo, url, body, requests, concurrencia)
+        r = resultados[nombre]
+        print(f"{nombre:30} {r['requests']:6} {r['errores']:6} {r['rps']:10} "
+              f"{r['p50_ms']:9} {r['p95_ms']:9} {r['p99_ms']:9}")
+    return resultados
+
+
+def comparar(resultados, base, tolerancia):
+    """Endpoints cuyo p95 empeoró más que la tolerancia respecto a la corrida base"""
+    regresiones = []
+    for nombre, r in resultados.items():
+        anterior = base.get("resultados", {}).get(nombre)
+        if anterior and anterior["p95_ms"] > 0 and r["p95_ms"] > anterior["p95_ms"] * (1 + tolerancia):
+            regresiones.append((nombre, anterior["p95_ms"], r["p95_ms"]))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la API del Sistema de Matrícula")
+    parser.add_argument("--sembrar", action="store_true", help="Vaciar las tablas y cargar el dataset sintético")
+    parser.add_argument("--alumnos", type=int, default=1000)
+    parser.add_argument("--cursos", type=int, default=60)
+    parser.add_argument("--matriculas", type=int, default=10000)
+    parser.add_argument("--evaluaciones", type=int, default=7000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--url", help="URL base de un servidor levantado (por defecto: test client)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests por endpoint")
+    parser.add_argument("--concurrencia", type=int, default=1)
+    parser.add_argument("--escrituras", action="store_true", help="Incluir endpoints que escriben")
+    parser.add_argument("--solo", help="Medir solo endpoints cuyo nombre contenga este texto")
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    parser.add_argument("--base", help="Resultados anteriores (JSON) para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento de p95 tolerado (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    dataset = {"alumnos": args.alumnos, "cursos": args.cursos,
+               "matriculas": args.matriculas, "evaluaciones": args.evaluaciones}
+    if args.sembrar:
+        print("Sembrando dataset sintético...")
+        dataset = datos.sembrar(args.alumnos, args.cursos, args.matriculas, args.evaluaciones, args.semilla)
+        print(f"✅ {dataset}")
+
+    cliente = ClienteHTTP(args.url) if args.url else ClienteFlask()
+    if not args.url:
+        print(f"Motor de BD: {MOTOR}")
+    print(f"\n{'endpoint':30} {'reqs':>6} {'errs':>6} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    resultados = ejecutar(cliente, dataset, args.requests, args.concurrencia, args.escrituras, args.solo)
+
+    salida = {"dataset": dataset, "modo": args.url or "test_client", "motor": None if args.url else MOTOR,
+              "concurrencia": args.concurrencia, "resultados": resultados}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(salida, f, indent=2, ensure_ascii=False)
+        print(f"\n📁 Resultados guardados en {args.json}")
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        if base.get("motor") and base.get("motor") != salida["motor"]:
+            print(f"\nComparando {salida['motor'] or args.url} contra {base['motor']}")
+        regresiones = comparar(resultados, base, args.tolerancia)
+        if regresiones:
+            print("\n❌ Regresiones de p95:")
+            for nombre, antes, ahora in regresiones:
+                print(f"   {nombre}: {antes} ms -> {ahora} ms")
+            return 1
+        print("\n✅ Sin regresiones respecto a la base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark del índice de búsqueda de alumnos (routes/alumnos/busqueda.py).
+
+Mide el armado del índice y la latencia de búsqueda sin pasar por HTTP
+(p50/p99 en ms por tipo de consulta) sobre los alumnos activos de la BD;
+"con más" es el % de consultas con más coincidencias que --limite.
+
+    python -m benchmarks.benchmark_busqueda --sembrar --alumnos 50000
+    DB_MOTOR=sqlite python -m benchmarks.benchmark_busqueda --repeticiones 500
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from benchmarks import datos
+from benchmarks.benchmark_api import percentil
+from db import MOTOR
+from routes.alumnos.busqueda import IndiceAlumnos, normalizar
+
+
+def consultas(azar, cantidad):
+    """(tipo, texto) con nombres y apellidos del dataset sintético"""
+    tipos = [
+        ("1 letra", lambda: normalizar(azar.choice(datos.APELLIDOS))[0]),
+        ("prefijo", lambda: azar.choice(datos.APELLIDOS)[:azar.randint(2, 4)]),
+        ("apellido con tilde", lambda: azar.choice(datos.APELLIDOS)),
+        ("apellido sin tilde", lambda: normalizar(azar.choice(datos.APELLIDOS))),
+        ("texto interior", lambda: normalizar(azar.choice(datos.APELLIDOS))[2:5]),
+        ("nombre + apellido", lambda: f"{azar.choice(datos.NOMBRES)} {azar.choice(datos.APELLIDOS)[:3]}"),
+        ("dni", lambda: f"4000{azar.randint(0, 9999):04d}"[:azar.randint(4, 8)]),
+        ("sin resultados", lambda: "zzqx"),
+    ]
+    return [(tipo, [generar() for _ in range(cantidad)]) for tipo, generar in tipos]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Armado y latencia del índice de búsqueda de alumnos")
+    parser.add_argument("--sembrar", action="store_true", help="Vaciar las tablas y cargar el dataset sintético")
+    parser.add_argument("--alumnos", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=300, help="Consultas por tipo")
+    parser.add_argument("--limite", type=int, default=10)
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    if args.sembrar:
+        print("Sembrando dataset sintético...")
+        print(f"✅ {datos.sembrar(args.alumnos, 60, args.alumnos, args.alumnos // 2)}")
+
+    indice = IndiceAlumnos()
+    inicio = time.perf_counter()
+    indice.reconstruir()
+    armado = round((time.perf_counter() - inicio) * 1000, 1)
+    print(f"Motor de BD: {MOTOR} | alumnos indexados: {indice.tamano()} | armado: {armado} ms")
+
+    resultados = {}
+    print(f"\n{'consulta':22} {'con más':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for tipo, textos in consultas(random.Random(7), args.repeticiones):
+        tiempos, con_mas = [], 0
+        for texto in textos:
+            t0 = time.perf_counter()
+            _, mas = indice.buscar(texto, args.limite)
+            tiempos.append((time.perf_counter() - t0) * 1000)
+            con_mas += mas
+        tiempos.sort()
+        resultados[tipo] = {"con_mas": f"{con_mas * 100 // len(textos)}%",
+                            "p50_ms": round(percentil(tiempos, 50), 4),
+                            "p99_ms": round(percentil(tiempos, 99), 4)}
+        r = resultados[tipo]
+        print(f"{tipo:22} {r['con_mas']:>8} {r['p50_ms']:>9} {r['p99_ms']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"motor": MOTOR, "alumnos": indice.tamano(), "armado_ms": armado,
+                       "consultas": resultados}, f, indent=2)
+        print(f"\n📁 Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Benchmark de serialización y compresión de respuestas.
+
+Para cada endpoint compara el tamaño en bytes y la latencia (p50, test
+client de Flask) de:
+
+- json estándar: el codificador de Flask (sin utils.serializacion)
+- json: ProveedorJSON (orjson si está instalado)
+- columnar: ?columnar=1
+- msgpack: Accept: application/msgpack (si msgpack está instalado)
+
+cada uno sin comprimir, con gzip y con br (si brotli está instalado).
+También mide solo la codificación (sin request) del listado de matrículas.
+
+    python -m benchmarks.benchmark_serializacion --sembrar --alumnos 2000 --matriculas 20000
+    DB_MOTOR=sqlite python -m benchmarks.benchmark_serializacion --requests 50
+"""
+import argparse
+import json
+import sys
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks import datos
+from benchmarks.benchmark_api import percentil
+from db import MOTOR
+from utils import serializacion
+from utils.compresion import CODIFICACIONES
+
+ENDPOINTS = [
+    "/api/alumnos",
+    "/api/matriculas?limit=1000",
+    "/api/evaluaciones?limit=1000",
+    "/api/matriculas/inicio",
+    "/api/reportes/analitica/alumnos",
+]
+
+
+def variantes():
+    """(nombre, usa el codificador estándar, query extra, Accept)"""
+    lista = [
+        ("json estándar", True, "", "application/json"),
+        ("json", False, "", "application/json"),
+        ("columnar", False, "columnar=1", "application/json"),
+    ]
+    if serializacion.msgpack is not None:
+        lista.append(("msgpack", False, "", serializacion.MIME_MSGPACK))
+    return lista
+
+
+def _apps():
+    from app import create_app
+    rapida = create_app()
+    estandar = create_app()
+    estandar.json = DefaultJSONProvider(estandar)
+    return rapida.test_client(), estandar.test_client()
+
+
+def medir(cliente, url, accept, codificacion, requests):
+    headers = {"Accept": accept, "Accept-Encoding": codificacion}
+    cliente.get(url, headers=headers)     # Calentamiento (cachés de la app)
+    tiempos, tamano = [], 0
+    for _ in range(requests):
+        inicio = time.perf_counter()
+        respuesta = cliente.get(url, headers=headers)
+        cuerpo = respuesta.get_data()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        tamano = len(cuerpo)
+    tiempos.sort()
+    return tamano, round(percentil(tiempos, 50), 2)
+
+
+def solo_codificacion(rapida, estandar, repeticiones=20):
+    """ms y bytes por codificación del listado de 1000 matrículas, sin request"""
+    payload = json.loads(rapida.get("/api/matriculas?limit=1000").get_data())
+    codificadores = [
+        ("json estándar", estandar.application.json.dumps),
+        ("json", rapida.application.json.dumps),
+        ("columnar", lambda o: rapida.application.json.dumps(serializacion.a_columnas(o))),
+    ]
+    if serializacion.msgpack is not None:
+        codificadores.append(("msgpack", lambda o: serializacion.msgpack.packb(o, use_bin_type=True)))
+
+    resultados = {}
+    for nombre, codificar in codificadores:
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            salida = codificar(payload)
+        if isinstance(salida, str):
+            salida = salida.encode("utf-8")
+        resultados[nombre] = {"ms": round((time.perf_counter() - inicio) * 1000 / repeticiones, 3),
+                              "bytes": len(salida)}
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tamaño y latencia por formato de respuesta")
+    parser.add_argument("--sembrar", action="store_true", help="Vaciar las tablas y cargar el dataset sintético")
+    parser.add_argument("--alumnos", type=int, default=1000)
+    parser.add_argument("--matriculas", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=30, help="Requests por combinación")
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    if args.sembrar:
+        print("Sembrando dataset sintético...")
+        print(f"✅ {datos.sembrar(args.alumnos, 60, args.matriculas, int(args.matriculas * 0.7))}")
+    print(f"Motor de BD: {MOTOR} | orjson: {serializacion.orjson is not None} | "
+          f"msgpack: {serializacion.msgpack is not None} | codificaciones: {', '.join(CODIFICACIONES)}")
+
+    rapida, estandar = _apps()
+    codificaciones = ["identity"] + CODIFICACIONES
+    resultados = {}
+    print(f"\n{'endpoint':32} {'formato':14}" + "".join(f" {c + ' bytes':>13} {c + ' p50':>10}" for c in codificaciones))
+    for url in ENDPOINTS:
+        resultados[url] = {}
+        for nombre, usa_estandar, query, accept in variantes():
+            cliente = estandar if usa_estandar else rapida
+            ruta = url + ("&" if "?" in url else "?") + query if query else url
+            fila = {c: medir(cliente, ruta, accept, c, args.requests) for c in codificaciones}
+            resultados[url][nombre] = fila
+            print(f"{url:32} {nombre:14}" + "".join(f" {fila[c][0]:>13} {fila[c][1]:>10}" for c in codificaciones))
+
+    print("\nSolo codificación (listado de 1000 matrículas):")
+    codificacion = solo_codificacion(rapida, estandar)
+    for nombre, r in codificacion.items():
+        print(f"   {nombre:16} {r['ms']:>8} ms {r['bytes']:>10} bytes")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"motor": MOTOR, "endpoints": resultados, "codificacion": codificacion}, f, indent=2)
+        print(f"\n📁 Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Benchmark del servidor de producción: un proceso contra N procesos.
+
+Levanta `python servidor.py` con cada cantidad de workers indicada, espera
+a que responda, mide los endpoints de lectura con carga HTTP concurrente
+(benchmarks.benchmark_api) y lo detiene con SIGTERM, verificando que el
+cierre ordenado termine a tiempo. Al final compara req/s y p95 por
+endpoint contra la corrida de un solo proceso.
+
+    python -m benchmarks.benchmark_servidor --sembrar --workers 1 4 --concurrencia 32
+    DB_MOTOR=sqlite python -m benchmarks.benchmark_servidor --workers 1 2 4
+
+La ganancia depende de los núcleos disponibles: con un solo núcleo varios
+procesos no superan a uno.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks import datos
+from benchmarks.benchmark_api import ClienteHTTP, ejecutar
+from db import MOTOR
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _esperar(url, timeout=30):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            with urllib.request.urlopen(url + "/", timeout=2) as respuesta:
+                if respuesta.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def medir(workers, hilos, puerto, dataset, requests, concurrencia, solo=None):
+    """Resultados por endpoint y segundos que tardó el cierre ordenado"""
+    proceso = subprocess.Popen(
+        [sys.executable, "servidor.py", "--workers", str(workers), "--hilos", str(hilos),
+         "--puerto", str(puerto)],
+        cwd=DIRECTORIO, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{puerto}"
+    try:
+        if not _esperar(url):
+            raise RuntimeError(f"El servidor con {workers} workers no respondió")
+        print(f"\n=== {workers} proceso(s) x {hilos} hilos ===")
+        print(f"{'endpoint':30} {'reqs':>6} {'errs':>6} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        resultados = ejecutar(ClienteHTTP(url), dataset, requests, concurrencia, filtro=solo)
+    finally:
+        inicio = time.perf_counter()
+        proceso.send_signal(signal.SIGTERM)
+        try:
+            codigo = proceso.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+            codigo = None
+        cierre = time.perf_counter() - inicio
+    print(f"Cierre ordenado: {cierre:.2f} s (código {codigo})")
+    return resultados, cierre, codigo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de un proceso contra N procesos")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 2])
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--puerto", type=int, default=5099)
+    parser.add_argument("--sembrar", action="store_true", help="Vaciar las tablas y cargar el dataset sintético")
+    parser.add_argument("--alumnos", type=int, default=1000)
+    parser.add_argument("--matriculas", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=300, help="Requests por endpoint")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--solo", help="Medir solo endpoints cuyo nombre contenga este texto")
+    parser.add_argument("--json", help="Guardar resultados en este archivo")
+    args = parser.parse_args(argv)
+    args.workers = list(dict.fromkeys(args.workers))
+
+    dataset = {"alumnos": args.alumnos, "cursos": 60, "matriculas": args.matriculas}
+    if args.sembrar:
+        print("Sembrando dataset sintético...")
+        dataset = datos.sembrar(args.alumnos, 60, args.matriculas, int(args.matriculas * 0.7))
+        print(f"✅ {dataset}")
+    print(f"Motor de BD: {MOTOR} | núcleos: {os.cpu_count()}")
+
+    corridas = {}
+    fallas = []
+    for workers in args.workers:
+        resultados, cierre, codigo = medir(workers, args.hilos, args.puerto, dataset,
+                                           args.requests, args.concurrencia, args.solo)
+        corridas[workers] = {"resultados": resultados, "cierre_s": round(cierre, 2)}
+        if codigo != 0:
+            fallas.append(f"{workers} workers: el cierre terminó con código {codigo}")
+
+    base = corridas[args.workers[0]]["resultados"]
+    print(f"\n{'endpoint':30}" + "".join(f" {f'{w}w req/s':>11} {f'{w}w p95':>9}" for w in args.workers))
+    for nombre in base:
+        fila = "".join(f" {corridas[w]['resultados'][nombre]['rps']:>11} "
+                       f"{corridas[w]['resultados'][nombre]['p95_ms']:>9}" for w in args.workers)
+        print(f"{nombre:30}{fila}")
+    total_base = sum(r["rps"] for r in base.values())
+    for workers in args.workers[1:]:
+        total = sum(r["rps"] for r in corridas[workers]["resultados"].values())
+        if total_base:
+            print(f"{workers} workers vs {args.workers[0]}: x{total / total_base:.2f} en req/s sumados")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"dataset": dataset, "motor": MOTOR, "nucleos": os.cpu_count(),
+                       "concurrencia": args.concurrencia, "corridas": corridas}, f, indent=2, ensure_ascii=False)
+        print(f"\n📁 Resultados guardados en {args.json}")
+
+    if fallas:
+        print("\n❌ " + "\n❌ ".join(fallas))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
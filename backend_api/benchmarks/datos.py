@@ -0,0 +1,125 @@
+"""
+Dataset sintético para benchmarks, sobre el esquema de crear_bd_sqlite.py.
+
+Se inserta a través de db.get_connection() (misma BD que usa la API).
+Con DB_MOTOR=sqlite las tablas se crean si el archivo aún no las tiene;
+en ambos motores se aplican antes las migraciones pendientes.
+¡Borra el contenido de las tablas! Usar solo contra una BD de pruebas.
+"""
+import random
+import time
+
+from crear_bd_sqlite import CURSOS, crear_tablas
+from db import MOTOR, get_connection
+from migraciones import migrar
+from routes.reportes import historial
+from routes.reportes.resumen_ciclos import reconstruir
+from utils import condicional
+
+NOMBRES = ["Juan", "María", "Carlos", "Ana", "Luis", "Rosa", "Pedro", "Laura", "Diego",
+           "Sofía", "Miguel", "Lucía", "José", "Carmen", "Jorge", "Elena", "Raúl", "Paula"]
+APELLIDOS = ["Pérez", "López", "Ramírez", "Mendoza", "Castillo", "Vega", "Sánchez", "Díaz",
+             "Fernández", "Martínez", "Torres", "Quispe", "Rojas", "Flores", "Gómez", "Núñez"]
+
+TAMANO_BLOQUE = 5000
+MAX_CURSOS_POR_CICLO = 6
+
+
+def _insertar(cursor, sql, filas):
+    for i in range(0, len(filas), TAMANO_BLOQUE):
+        cursor.executemany(sql, filas[i:i + TAMANO_BLOQUE])
+
+
+def generar(alumnos=1000, cursos=60, matriculas=10000, evaluaciones=7000, semilla=42):
+    """Filas a insertar (listas de tuplas), reproducibles para una misma semilla"""
+    azar = random.Random(semilla)
+
+    filas_cursos = list(CURSOS[:cursos])
+    for i in range(len(filas_cursos), cursos):
+        ciclo = i % 10 + 1
+        filas_cursos.append((f"SIN{i:04d}", f"Curso sintético {i}", azar.randint(2, 5), ciclo))
+    cursos_por_ciclo = {}
+    for id_curso, (_, _, _, ciclo) in enumerate(filas_cursos, start=1):
+        cursos_por_ciclo.setdefault(ciclo, []).append(id_curso)
+
+    filas_alumnos = []
+    for i in range(alumnos):
+        nombre = azar.choice(NOMBRES)
+        apellido = f"{azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}"
+        filas_alumnos.append((nombre, apellido, azar.randint(16, 30), f"{40000000 + i}",
+                              f"{nombre.lower()}.{i}@univ.edu.pe", f"9{azar.randint(10000000, 99999999)}",
+                              azar.randint(1, 10)))
+
+    # Cada alumno recorre sus ciclos en orden con hasta 6 cursos por ciclo
+    filas_matriculas = []
+    ciclos = sorted(cursos_por_ciclo)
+    por_alumno = max(1, matriculas // max(alumnos, 1))
+    for id_alumno in range(1, alumnos + 1):
+        restantes = por_alumno
+        for ciclo in ciclos:
+            if restantes <= 0 or len(filas_matriculas) >= matriculas:
+                break
+            disponibles = cursos_por_ciclo[ciclo]
+            elegidos = azar.sample(disponibles, min(len(disponibles), MAX_CURSOS_POR_CICLO, restantes))
+            filas_matriculas.extend((id_alumno, id_curso, ciclo) for id_curso in elegidos)
+            restantes -= len(elegidos)
+
+    ids_evaluados = sorted(azar.sample(range(1, len(filas_matriculas) + 1),
+                                       min(evaluaciones, len(filas_matriculas))))
+    filas_evaluaciones = [(id_matricula, round(azar.uniform(0, 20), 1)) for id_matricula in ids_evaluados]
+
+    return filas_alumnos, filas_cursos, filas_matriculas, filas_evaluaciones
+
+
+def sembrar(alumnos=1000, cursos=60, matriculas=10000, evaluaciones=7000, semilla=42):
+    """Vacía las tablas e inserta el dataset sintético. Devuelve los conteos."""
+    filas_alumnos, filas_cursos, filas_matriculas, filas_evaluaciones = generar(
+        alumnos, cursos, matriculas, evaluaciones, semilla)
+
+    inicio = time.perf_counter()
+    conn = get_connection()
+    if conn is None:
+        raise RuntimeError("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        if MOTOR == "sqlite":
+            crear_tablas(cursor)
+        migrar(conn, MOTOR)
+        for tabla in ("evaluaciones", "matriculas", "cursos", "alumnos"):
+            cursor.execute(f"DELETE FROM {tabla}")
+
+        # Ids explícitos: las matrículas y evaluaciones generadas los referencian
+        _insertar(cursor, """
+            INSERT INTO alumnos (id, nombre, apellido, edad, dni, correo, telefono, ciclo_actual)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, [(i,) + f for i, f in enumerate(filas_alumnos, start=1)])
+        _insertar(cursor, """
+            INSERT INTO cursos (id, codigo, nombre, creditos, ciclo)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [(i,) + f for i, f in enumerate(filas_cursos, start=1)])
+        _insertar(cursor, """
+            INSERT INTO matriculas (id, id_alumno, id_curso, ciclo)
+            VALUES (%s, %s, %s, %s)
+        """, [(i,) + f for i, f in enumerate(filas_matriculas, start=1)])
+        _insertar(cursor, """
+            INSERT INTO evaluaciones (id_matricula, nota, aprobado)
+            VALUES (%s, %s, %s)
+        """, [(m, nota, 1 if nota >= 10.5 else 0) for m, nota in filas_evaluaciones])
+
+        # Mismo estado que deja POST /api/evaluaciones
+        _insertar(cursor, "UPDATE matriculas SET estado = %s WHERE id = %s",
+                  [("APROBADO" if nota >= 10.5 else "DESAPROBADO", m) for m, nota in filas_evaluaciones])
+        reconstruir(cursor)
+        historial.reiniciar(cursor)
+        condicional.incrementar_con(cursor, condicional.RECURSOS)     # Invalida los ETag ya entregados
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        "alumnos": len(filas_alumnos),
+        "cursos": len(filas_cursos),
+        "matriculas": len(filas_matriculas),
+        "evaluaciones": len(filas_evaluaciones),
+        "segundos": round(time.perf_counter() - inicio, 2)
+    }
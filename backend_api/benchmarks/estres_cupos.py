@@ -0,0 +1,164 @@
+"""
+Prueba de estrés de cupos: muchas matrículas simultáneas al mismo curso.
+
+Define una capacidad para (curso, ciclo), lanza en paralelo POST
+/api/matriculas de muchos alumnos (cada uno repetido, para forzar también
+duplicados simultáneos) y verifica contra la BD que:
+
+- no hay más matrículas que la capacidad
+- cupos_cursos.ocupados coincide con las matrículas reales
+- ningún alumno quedó matriculado dos veces
+- las respuestas 201 coinciden con las matrículas creadas
+- resumen_ciclos (sumando sus fragmentos) cuenta las mismas matrículas y alumnos
+
+Al final borra lo creado por la API (salvo --conservar) y verifica que los
+cupos se liberen. Usa alumnos activos existentes (sembrar antes con
+python -m benchmarks.benchmark_api --sembrar) y un ciclo sin uso.
+
+SQLite admite una sola transacción de escritura a la vez: ahí solo se
+comprueban los conteos. Los bloqueos por fila, su orden y los deadlocks
+(que llegarían como 500) se ejercitan con --url contra un servidor con
+DB_MOTOR=mysql, con el mismo DB_MOTOR en este proceso para verificar:
+
+    python -m benchmarks.estres_cupos --alumnos 300 --capacidad 40 --concurrencia 32
+    DB_MOTOR=mysql python -m benchmarks.estres_cupos --url http://127.0.0.1:5000
+
+Sale con código 1 si alguna verificación falla.
+"""
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.benchmark_api import ClienteFlask, ClienteHTTP
+from db import MOTOR, get_connection
+
+
+def _consultar(sql, params=()):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        filas = cursor.fetchall()
+        conn.commit()
+        return filas
+    finally:
+        conn.close()
+
+
+def verificar(id_curso, ciclo, capacidad, creadas):
+    """Lista de fallas (vacía si todo está bien)"""
+    matriculas = _consultar("SELECT id_alumno FROM matriculas WHERE id_curso = %s AND ciclo = %s",
+                            (id_curso, ciclo))
+    ocupados = _consultar("SELECT ocupados FROM cupos_cursos WHERE id_curso = %s AND ciclo = %s",
+                          (id_curso, ciclo))
+    total = len(matriculas)
+    fallas = []
+    if total > capacidad:
+        fallas.append(f"sobrematrícula: {total} matrículas para {capacidad} cupos")
+    if not ocupados or ocupados[0][0] != total:
+        fallas.append(f"ocupados = {ocupados[0][0] if ocupados else None}, matrículas reales = {total}")
+    if len({fila[0] for fila in matriculas}) != total:
+        fallas.append("hay alumnos matriculados dos veces en el mismo curso y ciclo")
+    if creadas != total:
+        fallas.append(f"{creadas} respuestas 201 pero {total} matrículas en la BD")
+    fallas += verificar_resumen(ciclo)
+    return fallas, total
+
+
+def verificar_resumen(ciclo):
+    """resumen_ciclos del ciclo contra matriculas (lo mantienen las mismas transacciones)"""
+    reales = _consultar("SELECT COUNT(*), COUNT(DISTINCT id_alumno) FROM matriculas WHERE ciclo = %s", (ciclo,))[0]
+    resumen = _consultar("SELECT COALESCE(SUM(matriculas), 0), COALESCE(SUM(alumnos), 0) "
+                         "FROM resumen_ciclos WHERE ciclo = %s", (ciclo,))[0]
+    if tuple(int(v) for v in resumen) != tuple(reales):
+        return [f"resumen_ciclos: {int(resumen[0])} matrículas / {int(resumen[1])} alumnos, "
+                f"reales: {reales[0]} / {reales[1]}"]
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estrés de cupos con matrículas concurrentes")
+    parser.add_argument("--url", help="URL base de un servidor levantado (por defecto: test client)")
+    parser.add_argument("--curso", type=int, help="id del curso (por defecto: el primero activo)")
+    parser.add_argument("--ciclo", type=int, default=90, help="Ciclo sin matrículas previas")
+    parser.add_argument("--alumnos", type=int, default=300)
+    parser.add_argument("--repeticiones", type=int, default=2, help="Requests por alumno")
+    parser.add_argument("--capacidad", type=int, default=40)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--conservar", action="store_true", help="No borrar las matrículas creadas")
+    args = parser.parse_args(argv)
+
+    id_curso = args.curso or _consultar("SELECT MIN(id) FROM cursos WHERE activo = 1")[0][0]
+    alumnos = [fila[0] for fila in _consultar(
+        f"SELECT id FROM alumnos WHERE activo = 1 ORDER BY id LIMIT {int(args.alumnos)}")]
+    if id_curso is None or len(alumnos) < args.alumnos:
+        print(f"❌ Se necesitan {args.alumnos} alumnos activos y un curso "
+              f"(sembrar con python -m benchmarks.benchmark_api --sembrar)")
+        return 1
+    if _consultar("SELECT COUNT(*) FROM matriculas WHERE id_curso = %s AND ciclo = %s", (id_curso, args.ciclo))[0][0]:
+        print(f"❌ El curso {id_curso} ya tiene matrículas en el ciclo {args.ciclo}; elegir otro --ciclo")
+        return 1
+
+    cliente = ClienteHTTP(args.url) if args.url else ClienteFlask()
+    print(f"Motor de BD: {MOTOR if not args.url else args.url}")
+    status = cliente.llamar("PUT", "/api/matriculas/cupos",
+                            {"id_curso": id_curso, "ciclo": args.ciclo, "capacidad": args.capacidad})
+    if status != 200:
+        print(f"❌ No se pudo configurar la capacidad (HTTP {status})")
+        return 1
+
+    solicitudes = [a for a in alumnos for _ in range(args.repeticiones)]
+    random.Random(11).shuffle(solicitudes)
+
+    def matricular(id_alumno):
+        inicio = time.perf_counter()
+        codigo = cliente.llamar("POST", "/api/matriculas",
+                                {"id_alumno": id_alumno, "id_curso": id_curso, "ciclo": args.ciclo})
+        return codigo, (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as ejecutor:
+        respuestas = list(ejecutor.map(matricular, solicitudes))
+    total_s = time.perf_counter() - inicio
+
+    conteo = {}
+    for codigo, _ in respuestas:
+        conteo[codigo] = conteo.get(codigo, 0) + 1
+    rechazos = sorted(ms for codigo, ms in respuestas if codigo == 409)
+    print(f"{len(solicitudes)} requests ({args.concurrencia} en paralelo) en {total_s:.2f} s "
+          f"-> {dict(sorted(conteo.items()))}")
+    if rechazos:
+        print(f"Rechazos por cupo: p50 {rechazos[len(rechazos) // 2]:.2f} ms")
+
+    fallas, total = verificar(id_curso, args.ciclo, args.capacidad, conteo.get(201, 0))
+    inesperadas = {c: n for c, n in conteo.items() if c not in (201, 400, 409)}
+    if inesperadas:
+        fallas.append(f"respuestas inesperadas: {inesperadas}")
+    if total < min(args.capacidad, len(alumnos)):
+        fallas.append(f"quedaron cupos sin usar: {total} de {args.capacidad}")
+
+    if not args.conservar:
+        ids = [fila[0] for fila in _consultar("SELECT id FROM matriculas WHERE id_curso = %s AND ciclo = %s",
+                                               (id_curso, args.ciclo))]
+        for id_matricula in ids:
+            cliente.llamar("DELETE", f"/api/matriculas/{id_matricula}")
+        libres = _consultar("SELECT ocupados FROM cupos_cursos WHERE id_curso = %s AND ciclo = %s",
+                            (id_curso, args.ciclo))
+        if libres and libres[0][0] != 0:
+            fallas.append(f"tras borrar las matrículas quedan {libres[0][0]} cupos ocupados")
+        fallas += verificar_resumen(args.ciclo)
+        cliente.llamar("PUT", "/api/matriculas/cupos", {"id_curso": id_curso, "ciclo": args.ciclo, "capacidad": None})
+
+    if fallas:
+        print("\n❌ Fallas:")
+        for falla in fallas:
+            print(f"   {falla}")
+        return 1
+    print(f"\n✅ {total} matrículas para {args.capacidad} cupos, sin sobrematrícula ni duplicados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Planes de ejecución (EXPLAIN) de las consultas de cada ruta.
+
+Corre EXPLAIN (MySQL) o EXPLAIN QUERY PLAN (SQLite) sobre las mismas
+consultas que ejecutan las rutas y marca:
+
+- recorrido completo de una tabla (MySQL type=ALL / SQLite "SCAN t" sin índice)
+- recorrido completo de un índice (MySQL type=index / "SCAN t USING INDEX")
+- ordenamiento aparte (Using filesort / USE TEMP B-TREE)
+
+Solo los recorridos completos de tabla no esperados cuentan como falla
+(código de salida 1); los demás se informan como aviso. Conviene correrlo
+con datos cargados: con tablas casi vacías el optimizador puede preferir
+recorrerlas aunque exista el índice.
+
+    python -m benchmarks.planes                # resumen por consulta
+    python -m benchmarks.planes --detalle      # con el plan completo
+    DB_MOTOR=sqlite python -m benchmarks.planes
+"""
+import argparse
+import re
+import sys
+
+from db import MOTOR, get_connection
+from routes.alumnos.alumnos_routes import PAGINACION_ALUMNOS
+from routes.cursos.cursos_routes import PAGINACION_CURSOS
+from routes.evaluaciones.evaluaciones_routes import (
+    PAGINACION_EVALUACIONES, DESDE_EVALUACIONES, PAGINACION_PENDIENTES, DESDE_PENDIENTES, filtro_pendientes)
+from routes.matriculas.matriculas_routes import PAGINACION_MATRICULAS, DESDE_MATRICULAS, PLAN_ARRASTRE
+from routes.reportes.analitica import SQL_EXTRAER
+from routes.reportes.historial import SQL_HISTORIAL
+from routes.reportes.reportes_routes import SQL_EXPORTAR
+from routes.reportes.resumen_ciclos import SQL_RESUMEN
+from utils.paginacion import ConsultaPaginada, LIMITE_POR_DEFECTO
+
+FECHA = "2030-01-01 00:00:00"
+
+
+def _pagina(paginacion, desde, donde=None, despues=None, params=()):
+    return ConsultaPaginada(paginacion, LIMITE_POR_DEFECTO, despues, paginacion.por_defecto).sql(desde, donde, params)
+
+
+def _listado(paginacion, desde, donde=None, params=()):
+    """Sin limit (respuesta completa o streaming)"""
+    return ConsultaPaginada(paginacion, None, None, paginacion.por_defecto).sql(desde, donde, params)
+
+
+# ============================
+# CONSULTAS POR RUTA
+# ============================
+def consultas():
+    """
+    (ruta, sql, params, tablas que pueden recorrerse completas). Las
+    exportaciones y la analítica leen todas las matrículas a propósito.
+    """
+    donde_pendientes, params_pendientes = filtro_pendientes(ciclo=1, curso=1)
+    return [
+        ("GET /api/alumnos", *_listado(PAGINACION_ALUMNOS, "alumnos", "activo = 1"), ()),
+        ("GET /api/alumnos?limit", *_pagina(PAGINACION_ALUMNOS, "alumnos", "activo = 1", [1]), ()),
+        ("GET /api/alumnos/<id>", "SELECT * FROM alumnos WHERE id = %s AND activo = 1", (1,), ()),
+
+        ("GET /api/cursos", *_listado(PAGINACION_CURSOS, "cursos", "activo = 1"), ()),
+        ("GET /api/cursos?limit", *_pagina(PAGINACION_CURSOS, "cursos", "activo = 1", [1, "INF101"]), ()),
+        ("GET /api/cursos/<id>", "SELECT * FROM cursos WHERE id = %s AND activo = 1", (1,), ()),
+
+        ("GET /api/matriculas", *_listado(PAGINACION_MATRICULAS, DESDE_MATRICULAS), ("m",)),
+        ("GET /api/matriculas?limit", *_pagina(PAGINACION_MATRICULAS, DESDE_MATRICULAS, None, [FECHA, 1]), ()),
+        ("GET /api/matriculas?ciclo&limit",
+         *_pagina(PAGINACION_MATRICULAS, DESDE_MATRICULAS, "m.ciclo = %s", [FECHA, 1], (1,)), ()),
+        ("GET /api/matriculas/<id>", "SELECT * FROM matriculas WHERE id=%s", (1,), ()),
+        ("POST /api/matriculas (duplicado)",
+         "SELECT id FROM matriculas WHERE id_alumno=%s AND id_curso=%s AND ciclo=%s", (1, 1, 1), ()),
+        ("POST /api/matriculas/lote (existentes)",
+         "SELECT id_alumno, id_curso, ciclo FROM matriculas WHERE id_alumno IN (%s,%s) AND ciclo IN (%s)",
+         (1, 2, 1), ()),
+        ("POST /api/matriculas/arrastre",
+         f"SELECT * FROM ({PLAN_ARRASTRE}) plan ORDER BY id_alumno, posicion", (1, 2, 2), ()),
+
+        ("GET /api/evaluaciones", *_listado(PAGINACION_EVALUACIONES, DESDE_EVALUACIONES), ("e",)),
+        ("GET /api/evaluaciones?limit",
+         *_pagina(PAGINACION_EVALUACIONES, DESDE_EVALUACIONES, None, [FECHA, 1]), ()),
+        ("GET /api/evaluaciones/pendientes",
+         *_listado(PAGINACION_PENDIENTES, DESDE_PENDIENTES, *filtro_pendientes()), ()),
+        ("GET /api/evaluaciones/pendientes?ciclo&curso&limit",
+         *_pagina(PAGINACION_PENDIENTES, DESDE_PENDIENTES, donde_pendientes, [1], params_pendientes), ()),
+
+        ("GET /api/reportes/rendimiento_alumno/<id>", SQL_HISTORIAL, (1,), ()),
+        ("GET /api/reportes/rendimiento_alumno/<id> (guardado)",
+         "SELECT version, datos FROM historial_alumnos WHERE id_alumno = %s", (1,), ()),
+        ("GET /api/reportes/alumnos_ciclo",
+         SQL_RESUMEN, (), ("resumen_ciclos",)),
+        ("GET /api/reportes/exportar", SQL_EXPORTAR + " ORDER BY m.ciclo, m.id_alumno, c.codigo", (), ("m",)),
+        ("GET /api/reportes/exportar?ciclo",
+         SQL_EXPORTAR + " WHERE m.ciclo = %s ORDER BY m.ciclo, m.id_alumno, c.codigo", (1,), ()),
+        ("GET /api/reportes/analitica/*", SQL_EXTRAER, (), ("m",)),
+    ]
+
+
+# ============================
+# LECTURA DEL PLAN
+# ============================
+RE_SCAN = re.compile(r"^SCAN (\S+)(.*)$")
+
+
+def _hallazgos_sqlite(cursor, sql, params):
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    pasos = [fila["detail"] for fila in cursor.fetchall()]
+    # Subconsultas y tablas derivadas: se recorren en memoria, no son tablas
+    derivadas = {p.split(" ", 1)[1] for p in pasos if p.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+
+    hallazgos = []
+    for paso in pasos:
+        scan = RE_SCAN.match(paso)
+        if scan and scan.group(1) not in derivadas and not scan.group(1).startswith("("):
+            tabla, resto = scan.groups()
+            if "USING" in resto:
+                hallazgos.append(("indice", tabla, paso))
+            elif "CONSTANT ROW" not in paso:
+                hallazgos.append(("completo", tabla, paso))
+        elif paso.startswith("USE TEMP B-TREE"):
+            hallazgos.append(("orden", None, paso))
+    return hallazgos, pasos
+
+
+def _hallazgos_mysql(cursor, sql, params):
+    cursor.execute("EXPLAIN " + sql, params)
+    filas = cursor.fetchall()
+    hallazgos, pasos = [], []
+    for fila in filas:
+        tabla, tipo, extra = fila.get("table"), fila.get("type"), fila.get("Extra") or ""
+        paso = f"{tabla}: type={tipo} key={fila.get('key')} rows={fila.get('rows')} {extra}".strip()
+        pasos.append(paso)
+        derivada = tabla is None or tabla.startswith("<")
+        if tipo == "ALL" and not derivada:
+            hallazgos.append(("completo", tabla, paso))
+        elif tipo == "index" and not derivada:
+            hallazgos.append(("indice", tabla, paso))
+        if "Using filesort" in extra or "Using temporary" in extra:
+            hallazgos.append(("orden", tabla, paso))
+    return hallazgos, pasos
+
+
+ETIQUETAS = {
+    "completo": "recorrido completo de tabla",
+    "indice": "recorrido completo de índice",
+    "orden": "ordenamiento aparte",
+}
+
+
+def revisar(conn, detalle=False):
+    """Imprime el resultado por consulta y devuelve cuántas fallaron"""
+    analizar = _hallazgos_sqlite if MOTOR == "sqlite" else _hallazgos_mysql
+    cursor = conn.cursor(dictionary=True)
+    fallas = 0
+
+    for ruta, sql, params, toleradas in consultas():
+        hallazgos, pasos = analizar(cursor, sql, params)
+        graves = [h for h in hallazgos if h[0] == "completo" and h[1] not in toleradas]
+        avisos = [h for h in hallazgos if h not in graves]
+        fallas += bool(graves)
+
+        marca = "❌" if graves else ("⚠️ " if avisos else "✅")
+        print(f"{marca} {ruta}")
+        for tipo, tabla, paso in graves + avisos:
+            esperado = " (esperado)" if tipo == "completo" and tabla in toleradas else ""
+            print(f"     {ETIQUETAS[tipo]}{esperado}: {paso}")
+        if detalle:
+            for paso in pasos:
+                print(f"       · {paso}")
+    return fallas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN de las consultas de cada ruta")
+    parser.add_argument("--detalle", action="store_true", help="Mostrar el plan completo de cada consulta")
+    args = parser.parse_args(argv)
+
+    conn = get_connection()
+    if conn is None:
+        print("❌ No se pudo conectar a la base de datos")
+        return 1
+    try:
+        print(f"Motor de BD: {MOTOR}\n")
+        fallas = revisar(conn, args.detalle)
+        conn.rollback()
+    finally:
+        conn.close()
+
+    print(f"\n{'❌' if fallas else '✅'} {fallas} consulta(s) con recorridos completos no esperados")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,7 @@
-import mysql.connector
+import os
+
+# Motor de base de datos: "mysql" o "sqlite" (variable de entorno DB_MOTOR)
+DB_MOTOR = os.environ.get("DB_MOTOR", "mysql")
 
 DB_CONFIG = {
     "host": "localhost",
@@ -8,10 +11,122 @@ DB_CONFIG = {
     "port": 3306
 }
 
-def get_connection():
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as e:
-        print("Error de conexión:", e)
-        return None
+
+# SQLite (DB_MOTOR = "sqlite"): mismo esquema que crear_bd_sqlite.py
+SQLITE_CONFIG = {
+    "ruta": os.environ.get("SQLITE_RUTA",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "sistema_matricula.db")),
+    "solo_lectura": False,        # Réplica de lectura (mode=ro)
+    # Una caché de páginas para todas las conexiones del proceso. Bloquea por
+    # tabla (SQLITE_LOCKED sin esperar busy_timeout): activar en réplicas de lectura
+    "cache_compartida": False,
+    "pragmas": {
+        "journal_mode": "WAL",        # Lectores concurrentes con un escritor
+        "synchronous": "NORMAL",      # Seguro con WAL, sin fsync en cada commit
+        "cache_size": -65536,         # KiB por conexión (negativo = tamaño, no páginas)
+        "mmap_size": 268435456,       # 256 MB leídos vía mmap
+        "temp_store": "MEMORY",       # Ordenamientos y tablas temporales en memoria
+        "busy_timeout": 5000,         # ms de espera si otro escritor tiene el candado
+        "foreign_keys": "ON"          # ON DELETE CASCADE igual que en MySQL
+    }
+}
+
+
+# Pool de conexiones (db.get_connection)
+POOL_CONFIG = {
+    "min_size": 2,            # Conexiones abiertas al iniciar el pool
+    "max_size": 10,           # Máximo de conexiones simultáneas
+    "timeout": 5,             # Segundos de espera por una conexión libre
+    "ping_on_borrow": True,   # Verificar la conexión antes de entregarla
+    "recycle": 1800           # Segundos antes de reemplazar una conexión
+}
+
+
+# Escritor de logs en segundo plano (utils/logger.registrar_log)
+LOG_CONFIG = {
+    "batch_size": 200,                # Líneas acumuladas antes de escribir
+    "flush_interval": 0.5,            # Segundos máximos sin escribir
+    "queue_size": 10000,              # Líneas en cola antes de bloquear
+    "max_bytes": 10 * 1024 * 1024,    # Rotación por tamaño (0 = desactivada)
+    "backup_count": 5,                # Archivos .1 .. .N conservados
+    "rotar_diario": True              # Rotación por fecha (archivo.log.AAAA-MM-DD)
+}
+
+
+# Servidor de producción (python servidor.py). Cada proceso tiene su propio
+# pool: con MySQL se abren hasta workers x POOL_CONFIG["max_size"] conexiones
+SERVIDOR_CONFIG = {
+    "host": "127.0.0.1",
+    "puerto": 5000,
+    "workers": os.cpu_count() or 2,     # Procesos (pre-fork)
+    "hilos": 8,                         # Hilos por proceso
+    "timeout_cierre": 10,               # Segundos para terminar requests en curso al detener
+    "backlog": 128,                     # Conexiones pendientes de aceptar en el socket
+    "exigir_migraciones": True          # No arrancar con migraciones pendientes en schema_migraciones
+}
+
+
+# Cola de matrícula para picos de demanda (POST /api/matriculas/cola)
+COLA_MATRICULA_CONFIG = {
+    "workers": 2,               # Hilos que procesan lotes (cada uno usa una conexión del pool y tiene su cola)
+    "max_profundidad": 5000,    # Solicitudes en espera (entre todas las colas) antes de responder 429
+    "tamano_lote": 200,         # Solicitudes por transacción
+    "espera_lote": 0.05,        # Segundos máximos esperando completar un lote
+    "retry_after": 2,           # Retry-After mínimo (segundos) al rechazar
+    "ttl_tickets": 600,         # Segundos que se conserva el resultado de un ticket
+    "max_tickets": 100000       # Tickets en memoria como máximo
+}
+
+
+# Secciones de reportes consultadas en paralelo (routes/reportes/asincrono.py)
+REPORTES_ASYNC_CONFIG = {
+    "hilos": 8,             # Consultas simultáneas por proceso (no más que POOL_CONFIG["max_size"])
+    "max_pendientes": 16,   # Secciones en curso o en espera por proceso; más allá, 503 con Retry-After
+    "retry_after": 2,       # Segundos sugeridos al cliente cuando el grupo está saturado
+    "timeout": 10           # Segundos por tablero; las secciones que no terminan salen en "errores"
+}
+
+
+# Compresión de respuestas por Accept-Encoding (utils/compresion.py)
+COMPRESION_CONFIG = {
+    "umbral": 1024,         # Bytes mínimos para comprimir una respuesta completa
+    "nivel_gzip": 6,        # 1 (rápido) .. 9 (más chico)
+    "calidad_brotli": 5,    # 0 .. 11; sobre 6 el costo de CPU crece mucho
+    "streaming": True       # Comprimir también las exportaciones en streaming
+}
+
+
+# Caché en memoria del catálogo de cursos (utils/cache.CacheTTL)
+CACHE_CONFIG = {
+    "catalogo": {"max_items": 64, "ttl": 300},   # Listados de cursos (por query string)
+    "cursos": {"max_items": 512, "ttl": 300},    # Curso individual por id
+    "analitica": {"max_items": 1, "ttl": 60},    # Promedios ponderados y rankings (reportes)
+    "pendientes": {"max_items": 128, "ttl": 30}  # Matrículas sin nota (por query string)
+}
+
+
+# Búsqueda de alumnos en memoria (GET /api/alumnos/search, routes/alumnos/busqueda.py)
+BUSQUEDA_CONFIG = {
+    "limite": 10,               # Resultados por defecto
+    "max_limite": 50,           # Tope de ?limit=
+    "factor_candidatos": 4,     # Con varias palabras, coincidencias revisadas por resultado pedido
+    "armar_al_iniciar": True,   # Armar el índice en create_app (en un hilo) y no en la primera búsqueda
+    "ttl_sin_versiones": 60     # Sin la tabla versiones_recursos, segundos antes de rearmar el índice
+}
+
+
+# GET condicional y Cache-Control por blueprint (utils/condicional.py)
+# lee: tablas de las que salen sus GET (forman el ETag); modifica: tablas cuya versión sube tras sus escrituras
+CACHE_HTTP_CONFIG = {
+    "alumnos_bp": {"lee": ["alumnos"], "modifica": ["alumnos"],
+                   "cache_control": "private, no-cache"},
+    "cursos_bp": {"lee": ["cursos"], "modifica": ["cursos"],
+                  "cache_control": "private, max-age=60"},     # Catálogo: 60 s sin revalidar
+    "matriculas_bp": {"lee": ["matriculas", "alumnos", "cursos"], "modifica": ["matriculas"],
+                      "cache_control": "private, no-cache"},
+    "evaluaciones_bp": {"lee": ["evaluaciones", "matriculas", "alumnos", "cursos"],
+                        "modifica": ["evaluaciones", "matriculas"],
+                        "cache_control": "private, no-cache"},
+    "reportes_bp": {"lee": ["alumnos", "cursos", "matriculas", "evaluaciones"], "modifica": [],
+                    "cache_control": "private, no-cache"}
+}
@@ -1,26 +1,20 @@
 import sqlite3
 import os
 
-# Ruta de la base de datos
-DB_PATH = os.path.join(os.path.dirname(__file__), "sistema_matricula.db")
+from config import SQLITE_CONFIG
+from migraciones import migrar
+from storage.motor_sqlite import ConexionSQLite
 
-# Eliminar BD si existe (para empezar limpio)
-if os.path.exists(DB_PATH):
-    os.remove(DB_PATH)
-    print("Base de datos anterior eliminada")
-
-# Crear conexión
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-
-print("Creando tablas...")
+# Ruta de la base de datos (la misma que usa la API con DB_MOTOR = "sqlite")
+DB_PATH = SQLITE_CONFIG["ruta"]
 
 # ═══════════════════════════════════════════════════════════════════════
-# CREAR TABLAS
+# ESQUEMA
 # ═══════════════════════════════════════════════════════════════════════
 
-cursor.execute("""
-CREATE TABLE alumnos (
+TABLAS = [
+    """
+CREATE TABLE IF NOT EXISTS alumnos (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     nombre TEXT NOT NULL,
     apellido TEXT NOT NULL,
@@ -32,10 +26,9 @@ CREATE TABLE alumnos (
     activo INTEGER DEFAULT 1,
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 )
-""")
-
-cursor.execute("""
-CREATE TABLE cursos (
+""",
+    """
+CREATE TABLE IF NOT EXISTS cursos (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     codigo TEXT UNIQUE NOT NULL,
     nombre TEXT NOT NULL,
@@ -44,10 +37,9 @@ CREATE TABLE cursos (
     activo INTEGER DEFAULT 1,
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 )
-""")
-
-cursor.execute("""
-CREATE TABLE matriculas (
+""",
+    """
+CREATE TABLE IF NOT EXISTS matriculas (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     id_alumno INTEGER NOT NULL,
     id_curso INTEGER NOT NULL,
@@ -58,26 +50,30 @@ CREATE TABLE matriculas (
     FOREIGN KEY (id_curso) REFERENCES cursos(id) ON DELETE CASCADE,
     UNIQUE(id_alumno, id_curso, ciclo)
 )
-""")
-
-cursor.execute("""
-CREATE TABLE evaluaciones (
+""",
+    """
+CREATE TABLE IF NOT EXISTS evaluaciones (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     id_matricula INTEGER NOT NULL,
     nota REAL NOT NULL,
     fecha_evaluacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    aprobado INTEGER AS (CASE WHEN nota >= 10.5 THEN 1 ELSE 0 END) STORED,
+    aprobado INTEGER DEFAULT 0,
     FOREIGN KEY (id_matricula) REFERENCES matriculas(id) ON DELETE CASCADE
 )
-""")
+"""
+]
+
+
+def crear_tablas(cursor):
+    for ddl in TABLAS:
+        cursor.execute(ddl)
 
-print("✅ Tablas creadas")
 
 # ═══════════════════════════════════════════════════════════════════════
-# INSERTAR ALUMNOS
+# DATOS DE PRUEBA
 # ═══════════════════════════════════════════════════════════════════════
 
-alumnos = [
+ALUMNOS = [
     ('Juan', 'Pérez García', 20, '72345678', 'juan.perez@univ.edu.pe', '987654321', 1),
     ('María', 'López Torres', 19, '73456789', 'maria.lopez@univ.edu.pe', '987654322', 1),
     ('Carlos', 'Ramírez Silva', 21, '74567890', 'carlos.ramirez@univ.edu.pe', '987654323', 2),
@@ -91,18 +87,8 @@ alumnos = [
     ('Miguel', 'Torres Vargas', 21, '70234567', 'miguel.torres@univ.edu.pe', '987654331', 3)
 ]
 
-cursor.executemany("""
-    INSERT INTO alumnos (nombre, apellido, edad, dni, correo, telefono, ciclo_actual)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
-""", alumnos)
-
-print(f"✅ {len(alumnos)} alumnos insertados")
-
-# ═══════════════════════════════════════════════════════════════════════
-# INSERTAR CURSOS (60 CURSOS)
-# ═══════════════════════════════════════════════════════════════════════
-
-cursos = [
+# 60 CURSOS
+CURSOS = [
     # CICLO 1
     ('MAT101', 'Matemática Básica', 4, 1),
     ('LEN101', 'Lenguaje y Comunicación', 3, 1),
@@ -175,18 +161,7 @@ cursos = [
     ('SUS1001', 'Sustentación de Tesis', 3, 10)
 ]
 
-cursor.executemany("""
-    INSERT INTO cursos (codigo, nombre, creditos, ciclo)
-    VALUES (?, ?, ?, ?)
-""", cursos)
-
-print(f"✅ {len(cursos)} cursos insertados")
-
-# ═══════════════════════════════════════════════════════════════════════
-# INSERTAR MATRÍCULAS
-# ═══════════════════════════════════════════════════════════════════════
-
-matriculas = [
+MATRICULAS = [
     (1, 1, 1), (1, 2, 1), (1, 5, 1),
     (2, 1, 1), (2, 2, 1), (2, 3, 1), (2, 5, 1),
     (3, 7, 2), (3, 8, 2), (3, 10, 2), (3, 11, 2),
@@ -194,50 +169,82 @@ matriculas = [
     (5, 13, 3), (5, 14, 3), (5, 16, 3), (5, 17, 3), (5, 18, 3)
 ]
 
-cursor.executemany("""
-    INSERT INTO matriculas (id_alumno, id_curso, ciclo)
-    VALUES (?, ?, ?)
-""", matriculas)
-
-print(f"✅ {len(matriculas)} matrículas insertadas")
-
-# ═══════════════════════════════════════════════════════════════════════
-# INSERTAR EVALUACIONES
-# ═══════════════════════════════════════════════════════════════════════
-
-evaluaciones = [
+EVALUACIONES = [
     (1, 15.5), (2, 12.0), (3, 14.5),
     (4, 16.0), (5, 13.5), (6, 9.5), (7, 15.0),
     (8, 14.0), (9, 11.5), (10, 17.0), (11, 13.0),
     (12, 10.5), (13, 16.5), (14, 8.0)
 ]
 
-cursor.executemany("""
-    INSERT INTO evaluaciones (id_matricula, nota)
-    VALUES (?, ?)
-""", evaluaciones)
 
-print(f"✅ {len(evaluaciones)} evaluaciones insertadas")
+def crear_bd(ruta=DB_PATH):
+    # Eliminar BD si existe (para empezar limpio)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+        print("Base de datos anterior eliminada")
 
-# ═══════════════════════════════════════════════════════════════════════
-# VERIFICAR
-# ═══════════════════════════════════════════════════════════════════════
+    # Crear conexión
+    conn = sqlite3.connect(ruta)
+    cursor = conn.cursor()
+
+    print("Creando tablas...")
+    crear_tablas(cursor)
+    print("✅ Tablas creadas")
+
+    cursor.executemany("""
+        INSERT INTO alumnos (nombre, apellido, edad, dni, correo, telefono, ciclo_actual)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, ALUMNOS)
+    print(f"✅ {len(ALUMNOS)} alumnos insertados")
+
+    cursor.executemany("""
+        INSERT INTO cursos (codigo, nombre, creditos, ciclo)
+        VALUES (?, ?, ?, ?)
+    """, CURSOS)
+    print(f"✅ {len(CURSOS)} cursos insertados")
+
+    cursor.executemany("""
+        INSERT INTO matriculas (id_alumno, id_curso, ciclo)
+        VALUES (?, ?, ?)
+    """, MATRICULAS)
+    print(f"✅ {len(MATRICULAS)} matrículas insertadas")
+
+    cursor.executemany("""
+        INSERT INTO evaluaciones (id_matricula, nota, aprobado)
+        VALUES (?, ?, ?)
+    """, [(m, nota, 1 if nota >= 10.5 else 0) for m, nota in EVALUACIONES])
+    # Mismo estado que deja POST /api/evaluaciones
+    cursor.executemany("UPDATE matriculas SET estado = ? WHERE id = ?",
+                       [("APROBADO" if nota >= 10.5 else "DESAPROBADO", m) for m, nota in EVALUACIONES])
+    print(f"✅ {len(EVALUACIONES)} evaluaciones insertadas")
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # VERIFICAR
+    # ═══════════════════════════════════════════════════════════════════════
+
+    cursor.execute("SELECT COUNT(*) FROM alumnos")
+    print(f"\n📊 Total alumnos: {cursor.fetchone()[0]}")
+
+    cursor.execute("SELECT COUNT(*) FROM cursos")
+    print(f"📊 Total cursos: {cursor.fetchone()[0]}")
+
+    cursor.execute("SELECT COUNT(*) FROM matriculas")
+    print(f"📊 Total matrículas: {cursor.fetchone()[0]}")
 
-cursor.execute("SELECT COUNT(*) FROM alumnos")
-print(f"\n📊 Total alumnos: {cursor.fetchone()[0]}")
+    cursor.execute("SELECT COUNT(*) FROM evaluaciones")
+    print(f"📊 Total evaluaciones: {cursor.fetchone()[0]}")
 
-cursor.execute("SELECT COUNT(*) FROM cursos")
-print(f"📊 Total cursos: {cursor.fetchone()[0]}")
+    # Guardar cambios
+    conn.commit()
 
-cursor.execute("SELECT COUNT(*) FROM matriculas")
-print(f"📊 Total matrículas: {cursor.fetchone()[0]}")
+    # Tablas de reportes e índices (migraciones versionadas)
+    for version, nombre in migrar(ConexionSQLite(conn), "sqlite"):
+        print(f"✅ Migración {version:03d}: {nombre}")
+    conn.close()
 
-cursor.execute("SELECT COUNT(*) FROM evaluaciones")
-print(f"📊 Total evaluaciones: {cursor.fetchone()[0]}")
+    print("\n✅ BASE DE DATOS CREADA EXITOSAMENTE")
+    print(f"📁 Ubicación: {ruta}")
 
-# Guardar cambios
-conn.commit()
-conn.close()
 
-print("\n✅ BASE DE DATOS CREADA EXITOSAMENTE")
-print(f"📁 Ubicación: {DB_PATH}")
+if __name__ == "__main__":
+    crear_bd()
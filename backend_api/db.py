@@ -1,26 +1,268 @@
 # backend_api/db.py
 
-import mysql.connector
-from mysql.connector import Error
-from config import DB_CONFIG
+import os
+import threading
+import time
+
+from config import DB_MOTOR, POOL_CONFIG
+from storage import cargar_motor
+from utils.metricas import registrar_consulta, registrar_espera_pool
+
+
+# Driver elegido en config.DB_MOTOR ("mysql" o "sqlite")
+motor = cargar_motor(DB_MOTOR)
+MOTOR = motor.NOMBRE
+
+Error = motor.Error
+
+# Violación de UNIQUE / FK (para capturar sin importar el driver en las rutas)
+ErrorIntegridad = motor.ErrorIntegridad
+
+# SQL que cambia según el motor
+BLOQUEO_LECTURA = motor.BLOQUEO_LECTURA
+sql_acumular = motor.sql_acumular
+tabla_inexistente = motor.tabla_inexistente
+
+
+class PoolAgotado(Exception):
+    """No se liberó ninguna conexión dentro del tiempo de espera"""
+
+
+def _conexion_viva(conn):
+    try:
+        conn.ping(reconnect=False)
+        return True
+    except Exception:
+        return False
+
+
+def _cerrar_silencioso(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+# ============================
+# CURSOR MEDIDO
+# ============================
+class CursorMedido:
+    """Cursor que registra la cantidad y duración de cada sentencia (/metrics)"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        finally:
+            registrar_consulta(time.perf_counter() - inicio)
+
+    def executemany(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(*args, **kwargs)
+        finally:
+            registrar_consulta(time.perf_counter() - inicio)
+
+
+# ============================
+# CONEXIÓN PRESTADA
+# ============================
+class ConexionPool:
+    """
+    Envoltura de una conexión prestada por el pool.
+    close() (o salir del bloque `with`) la devuelve al pool en lugar de
+    cerrarla; el resto de atributos se delegan a la conexión real.
+    """
+
+    def __init__(self, pool, conn, creada):
+        self._pool = pool
+        self._conn = conn
+        self._creada = creada
+
+    def __getattr__(self, nombre):
+        if self._conn is None:
+            raise Error("La conexión ya fue devuelta al pool")
+        return getattr(self._conn, nombre)
+
+    def cursor(self, *args, **kwargs):
+        return CursorMedido(self.__getattr__("cursor")(*args, **kwargs))
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool._liberar(conn, self._creada)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+# ============================
+# POOL DE CONEXIONES
+# ============================
+class PoolConexiones:
+    """
+    Pool acotado de conexiones:
+    - min_size conexiones abiertas al crear el pool y max_size como tope
+    - timeout: segundos de espera por una conexión libre (PoolAgotado)
+    - ping_on_borrow: verifica la conexión antes de entregarla
+    - recycle: segundos de vida antes de reemplazar la conexión
+    """
+
+    def __init__(self, crear, min_size=2, max_size=10, timeout=5,
+                 ping_on_borrow=True, recycle=1800):
+        self._crear = crear
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.ping_on_borrow = ping_on_borrow
+        self.recycle = recycle
+
+        self._libres = []          # [(conexion, creada_en)] usado como pila (LIFO)
+        self._abiertas = 0
+        self._cerrado = False
+        self._cond = threading.Condition()
+
+        for _ in range(min(min_size, self.max_size)):
+            self._libres.append((self._crear(), time.monotonic()))
+            self._abiertas += 1
+
+    def _vencida(self, creada):
+        return self.recycle and time.monotonic() - creada > self.recycle
+
+    def obtener(self):
+        inicio = time.perf_counter()
+        limite = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._cerrado:
+                    raise PoolAgotado("El pool está cerrado")
+                if self._libres:
+                    conn, creada = self._libres.pop()
+                    break
+                if self._abiertas < self.max_size:
+                    self._abiertas += 1
+                    conn = None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    registrar_espera_pool(time.perf_counter() - inicio)
+                    raise PoolAgotado(f"Sin conexiones libres tras {self.timeout}s")
+                self._cond.wait(restante)
+
+        # Abrir / verificar fuera del candado para no bloquear a otros hilos
+        if conn is not None and (self._vencida(creada) or
+                                 (self.ping_on_borrow and not _conexion_viva(conn))):
+            _cerrar_silencioso(conn)
+            conn = None
+
+        if conn is None:
+            try:
+                conn, creada = self._crear(), time.monotonic()
+            except Exception:
+                self._descontar()
+                raise
+
+        registrar_espera_pool(time.perf_counter() - inicio)
+        return ConexionPool(self, conn, creada)
+
+    def estadisticas(self):
+        with self._cond:
+            return {"abiertas": self._abiertas, "libres": len(self._libres)}
+
+    def _descontar(self):
+        with self._cond:
+            self._abiertas -= 1
+            self._cond.notify()
+
+    def _liberar(self, conn, creada):
+        # Terminar cualquier transacción (o snapshot de lectura) pendiente
+        try:
+            conn.rollback()
+        except Exception:
+            _cerrar_silencioso(conn)
+            self._descontar()
+            return
+
+        with self._cond:
+            if self._cerrado or self._vencida(creada):
+                self._abiertas -= 1
+                self._cond.notify()
+                descartar = True
+            else:
+                self._libres.append((conn, creada))
+                self._cond.notify()
+                descartar = False
+
+        if descartar:
+            _cerrar_silencioso(conn)
+
+    def cerrar(self):
+        with self._cond:
+            self._cerrado = True
+            libres, self._libres = self._libres, []
+            self._abiertas -= len(libres)
+            self._cond.notify_all()
+        for conn, _ in libres:
+            _cerrar_silencioso(conn)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Pool del proceso actual (se recrea tras un fork)"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = PoolConexiones(motor.conectar, **POOL_CONFIG)
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def cerrar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.cerrar()
+        _pool = None
+
+
+def estadisticas_pool():
+    """Conexiones abiertas/libres del pool del proceso (sin crearlo)"""
+    if _pool is None or _pool_pid != os.getpid():
+        return {"abiertas": 0, "libres": 0}
+    return _pool.estadisticas()
+
 
 def get_connection():
+    """
+    Devuelve una conexión del pool (None si no hay conexión disponible).
+    Se usa igual que antes: conn.close() la devuelve al pool, y también
+    admite `with get_connection() as conn:`.
+    """
     try:
-        conn = mysql.connector.connect(
-            host=DB_CONFIG["host"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
-            database=DB_CONFIG["database"],
-            port=DB_CONFIG.get("port", 3306)
-        )
-
-        if conn.is_connected():
-            print("✔ Conexión MySQL establecida")
-            return conn
-        else:
-            print("❌ No se pudo conectar a MySQL")
-            return None
+        return get_pool().obtener()
+
+    except PoolAgotado as e:
+        print("⏳ POOL DE CONEXIONES AGOTADO:", e)
+        return None
 
     except Error as e:
-        print("🔥 ERROR DE CONEXIÓN MYSQL:", e)
+        print(f"🔥 ERROR DE CONEXIÓN {MOTOR.upper()}:", e)
         return None
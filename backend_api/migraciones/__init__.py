@@ -0,0 +1,184 @@
+"""
+Migraciones versionadas del esquema (MySQL y SQLite).
+
+Cada migración es (versión, nombre, pasos). Un paso es:
+- un string SQL (igual en ambos motores)
+- un dict {"mysql": sql | None, "sqlite": sql | None} cuando difiere
+- una función f(cursor) para pasos que no son solo DDL
+
+Las versiones aplicadas se registran en schema_migraciones. Se asume el
+esquema base (alumnos, cursos, matriculas, evaluaciones) ya creado: en
+SQLite lo crea crear_bd_sqlite.py, que además aplica estas migraciones.
+
+    python -m migraciones            # aplicar las pendientes
+    python -m migraciones --estado   # ver aplicadas / pendientes
+"""
+from db import Error, get_connection
+from routes.matriculas.cupos import TABLAS_CUPOS
+from routes.reportes.historial import TABLAS_HISTORIAL, reiniciar
+from routes.reportes.resumen_ciclos import TABLAS_RESUMEN, reconstruir
+from utils.condicional import RECURSOS, TABLAS_VERSIONES_RECURSOS, completar_fragmentos
+
+TABLA_VERSIONES = """
+CREATE TABLE IF NOT EXISTS schema_migraciones (
+    version INTEGER PRIMARY KEY,
+    nombre VARCHAR(200) NOT NULL,
+    aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+MIGRACIONES = [
+    (1, "tablas de reportes (resumen por ciclo e historial por alumno)",
+     TABLAS_RESUMEN + TABLAS_HISTORIAL + [reconstruir]),
+
+    (2, "índices para los accesos frecuentes", [
+        # Listados de activos ordenados por el cursor de paginación
+        "CREATE INDEX idx_alumnos_activo ON alumnos (activo, id)",
+        "CREATE INDEX idx_cursos_activo_ciclo ON cursos (activo, ciclo, codigo)",
+        # Historial del alumno y ciclos recientes (ORDER BY ciclo DESC)
+        "CREATE INDEX idx_matriculas_alumno_ciclo ON matriculas (id_alumno, ciclo DESC)",
+        # Reportes y arrastre por ciclo
+        "CREATE INDEX idx_matriculas_ciclo ON matriculas (ciclo, id_alumno)",
+        # Listado paginado de matrículas (fecha_matricula DESC, id DESC)
+        "CREATE INDEX idx_matriculas_fecha ON matriculas (fecha_matricula DESC, id DESC)",
+        # MySQL ya indexa la FK; SQLite no crea índices para las FK
+        {"mysql": None, "sqlite": "CREATE INDEX idx_matriculas_curso ON matriculas (id_curso)"},
+        # LEFT JOIN evaluaciones en pendientes y reportes, cubriendo nota y aprobado
+        "CREATE INDEX idx_evaluaciones_matricula ON evaluaciones (id_matricula, nota, aprobado)",
+        # Listado paginado de evaluaciones
+        "CREATE INDEX idx_evaluaciones_fecha ON evaluaciones (fecha_evaluacion DESC, id DESC)",
+    ]),
+
+    (3, "estado de matrícula al día con sus notas e índice de pendientes", [
+        # Matrículas con nota cargadas fuera de la API (datos de ejemplo) quedaban en MATRICULADO.
+        # EXISTS y no una subconsulta escalar: con evaluaciones repetidas MySQL rechaza esta última
+        """
+        UPDATE matriculas SET estado = CASE
+            WHEN EXISTS (SELECT 1 FROM evaluaciones e WHERE e.id_matricula = matriculas.id AND e.aprobado = 1)
+            THEN 'APROBADO' ELSE 'DESAPROBADO' END
+        WHERE id IN (SELECT id_matricula FROM evaluaciones)
+        """,
+        """
+        UPDATE matriculas SET estado = 'MATRICULADO'
+        WHERE (estado IS NULL OR estado <> 'MATRICULADO')
+          AND id NOT IN (SELECT id_matricula FROM evaluaciones)
+        """,
+        # /api/evaluaciones/pendientes: estado + filtros por ciclo y curso (el id va implícito)
+        "CREATE INDEX idx_matriculas_estado ON matriculas (estado, ciclo, id_curso)",
+    ]),
+
+    (4, "cupos por curso y ciclo", TABLAS_CUPOS),
+
+    (5, "listado de matrículas por ciclo", [
+        # GET /api/matriculas?ciclo= y /api/matriculas/inicio?ciclo= sin ordenamiento aparte
+        "CREATE INDEX idx_matriculas_ciclo_fecha ON matriculas (ciclo, fecha_matricula DESC, id DESC)",
+    ]),
+
+    (6, "versiones por tabla para el GET condicional (ETag)", [
+        """
+        CREATE TABLE IF NOT EXISTS versiones_recursos (
+            recurso VARCHAR(50) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0,
+            actualizado TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ] + [f"INSERT INTO versiones_recursos (recurso, version) VALUES ('{r}', 0)" for r in RECURSOS]),
+
+    (7, "una sola evaluación por matrícula", [
+        # Cargas simultáneas podían duplicar la nota: se conserva la primera de cada matrícula
+        """
+        DELETE FROM evaluaciones
+        WHERE id NOT IN (SELECT id FROM (SELECT MIN(id) AS id FROM evaluaciones GROUP BY id_matricula) t)
+        """,
+        """
+        UPDATE matriculas SET estado = CASE
+            WHEN EXISTS (SELECT 1 FROM evaluaciones e WHERE e.id_matricula = matriculas.id AND e.aprobado = 1)
+            THEN 'APROBADO' ELSE 'DESAPROBADO' END
+        WHERE id IN (SELECT id_matricula FROM evaluaciones)
+        """,
+        "CREATE UNIQUE INDEX uq_evaluaciones_matricula ON evaluaciones (id_matricula)",
+        # Resumen e historiales sumaron las notas repetidas
+        reconstruir,
+        reiniciar,
+    ]),
+
+    (8, "resumen por ciclo repartido en fragmentos", [
+        # Una fila por ciclo era un punto de espera para todas las matrículas del ciclo
+        "DROP TABLE IF EXISTS resumen_ciclos",
+        reconstruir,
+    ]),
+
+    (9, "versiones de recursos repartidas en fragmentos", [
+        # Una fila por tabla, bloqueada hasta el commit, ordenaba todas las escrituras.
+        # La versión actual queda en el fragmento 0: la suma no retrocede y no repite ETags viejos
+        "ALTER TABLE versiones_recursos RENAME TO versiones_recursos_v6",
+        TABLAS_VERSIONES_RECURSOS[0],
+        """
+        INSERT INTO versiones_recursos (recurso, fragmento, version, actualizado)
+        SELECT recurso, 0, version, actualizado FROM versiones_recursos_v6
+        """,
+        completar_fragmentos,
+        "DROP TABLE versiones_recursos_v6",
+    ]),
+]
+
+
+def _ejecutar(cursor, paso, motor):
+    if callable(paso):
+        paso(cursor)
+        return
+    if isinstance(paso, dict):
+        paso = paso.get(motor)
+    if paso:
+        cursor.execute(paso)
+
+
+def versiones_aplicadas(cursor):
+    cursor.execute(TABLA_VERSIONES)
+    cursor.execute("SELECT version FROM schema_migraciones")
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def pendientes(cursor):
+    aplicadas = versiones_aplicadas(cursor)
+    return [m for m in MIGRACIONES if m[0] not in aplicadas]
+
+
+def pendientes_esquema():
+    """
+    [(versión, nombre)] sin aplicar según schema_migraciones, sin crear
+    nada (para verificar al arrancar). None si no hay conexión a la BD.
+    """
+    conn = get_connection()
+    if conn is None:
+        return None
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT version FROM schema_migraciones")
+            aplicadas = {fila[0] for fila in cursor.fetchall()}
+        except Error:
+            aplicadas = set()       # Sin la tabla: ninguna aplicada
+        conn.rollback()
+    finally:
+        conn.close()
+    return [(version, nombre) for version, nombre, _ in MIGRACIONES if version not in aplicadas]
+
+
+def migrar(conn, motor, hasta=None):
+    """
+    Aplica en orden las migraciones pendientes (hasta la versión `hasta`).
+    Cada una se confirma por separado: en MySQL el DDL no es transaccional,
+    así que una falla deja registradas solo las versiones completas.
+    """
+    cursor = conn.cursor()
+    aplicadas = []
+    for version, nombre, pasos in pendientes(cursor):
+        if hasta is not None and version > hasta:
+            break
+        for paso in pasos:
+            _ejecutar(cursor, paso, motor)
+        cursor.execute("INSERT INTO schema_migraciones (version, nombre) VALUES (%s, %s)", (version, nombre))
+        conn.commit()
+        aplicadas.append((version, nombre))
+    return aplicadas
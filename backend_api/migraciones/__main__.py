@@ -0,0 +1,36 @@
+import argparse
+import sys
+
+from db import MOTOR, get_connection
+from migraciones import MIGRACIONES, migrar, versiones_aplicadas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones del esquema del Sistema de Matrícula")
+    parser.add_argument("--estado", action="store_true", help="Listar migraciones aplicadas y pendientes")
+    parser.add_argument("--hasta", type=int, help="Aplicar solo hasta esta versión")
+    args = parser.parse_args(argv)
+
+    conn = get_connection()
+    if conn is None:
+        print("❌ No se pudo conectar a la base de datos")
+        return 1
+    try:
+        if args.estado:
+            aplicadas = versiones_aplicadas(conn.cursor())
+            conn.commit()
+            for version, nombre, _ in MIGRACIONES:
+                print(f"{'✅' if version in aplicadas else '⏳'} {version:03d} {nombre}")
+            return 0
+
+        aplicadas = migrar(conn, MOTOR, args.hasta)
+        for version, nombre in aplicadas:
+            print(f"✅ {version:03d} {nombre}")
+        print(f"📦 Esquema al día ({MOTOR})" if aplicadas else "Sin migraciones pendientes")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,20 @@
 from flask import Blueprint, request, jsonify
-from db import get_connection
-from utils.logger import registrar_log, iniciar_medicion, finalizar_medicion
+from config import BUSQUEDA_CONFIG
+from db import Error, get_connection
+from utils.condicional import version_recurso, versionar
+from utils.logger import registrar_log
+from utils.paginacion import Paginacion, ErrorPaginacion
+from utils.streaming import leer_formato, respuesta_stream, FormatoInvalido
+from routes.alumnos.busqueda import indice_alumnos
 
 alumnos_bp = Blueprint("alumnos_bp", __name__, url_prefix="/api/alumnos")
 
+PAGINACION_ALUMNOS = Paginacion(
+    campos={c: c for c in ("id", "nombre", "apellido", "edad", "dni", "correo", "telefono",
+                           "ciclo_actual", "activo", "fecha_registro")},
+    orden=[("id", "ASC")]
+)
+
 
 # ============================
 # VALIDACIÓN DE CAMPOS
@@ -24,28 +35,35 @@ def validar_alumno(data):
 # ============================
 @alumnos_bp.route("", methods=["GET"])
 def listar_alumnos():
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", "=== INICIO: Listar alumnos activos ===")
 
+    try:
+        formato = leer_formato()
+        consulta = PAGINACION_ALUMNOS.leer(stream=formato is not None)
+    except (ErrorPaginacion, FormatoInvalido) as e:
+        registrar_log("alumnos", "WARN", f"Parámetros de listado inválidos: {e}")
+        return jsonify({"error": str(e)}), 400
+
+    if formato:
+        registrar_log("alumnos", "INFO", f"Exportando alumnos activos en formato {formato}")
+        return respuesta_stream(*consulta.sql("alumnos", "activo = 1"), formato, consulta.proyectar)
+
     conn = get_connection()
     if conn is None:
         registrar_log("alumnos", "ERROR", "No se pudo conectar a la BD")
-        finalizar_medicion()
         return jsonify({"error": "Error de conexión a la base de datos"}), 500
 
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM alumnos WHERE activo = 1")
+        cursor.execute(*consulta.sql("alumnos", "activo = 1"))
         data = cursor.fetchall()
 
         registrar_log("alumnos", "INFO", f"Alumnos recuperados exitosamente: {len(data)} registros")
         registrar_log("alumnos", "INFO", "=== FIN: Listar alumnos activos ===")
-        finalizar_medicion()
-        return jsonify(data), 200
+        return jsonify(consulta.resultado(data)), 200
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al listar alumnos: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error interno al listar alumnos"}), 500
 
     finally:
@@ -53,18 +71,42 @@ def listar_alumnos():
         conn.close()
 
 
+# ============================
+# GET: BUSCAR ALUMNOS (DNI, NOMBRE, APELLIDO, CORREO)
+# ============================
+@alumnos_bp.route("/search", methods=["GET"])
+def buscar_alumnos():
+    """?q= (todas las palabras, por prefijo o texto interior, sin distinguir tildes) y ?limit="""
+    texto = request.args.get("q", "").strip()
+    if not texto:
+        return jsonify({"error": "Se requiere el parámetro q"}), 400
+    try:
+        limite = int(request.args.get("limit", BUSQUEDA_CONFIG["limite"]))
+    except ValueError:
+        return jsonify({"error": "limit debe ser un entero"}), 400
+    if not 1 <= limite <= BUSQUEDA_CONFIG["max_limite"]:
+        return jsonify({"error": f"limit debe estar entre 1 y {BUSQUEDA_CONFIG['max_limite']}"}), 400
+
+    try:
+        datos, mas = indice_alumnos.buscar(texto, limite, version_recurso("alumnos"))
+    except Error as e:
+        # Sin índice en el proceso y sin BD para armarlo
+        registrar_log("alumnos", "ERROR", f"Búsqueda '{texto}' sin índice: {e}")
+        return jsonify({"error": "Error al conectar BD"}), 500
+    registrar_log("alumnos", "INFO", f"Búsqueda '{texto}': {len(datos)} resultados")
+    return jsonify({"datos": datos, "mas": mas}), 200
+
+
 # ============================
 # GET: OBTENER ALUMNO POR ID
 # ============================
 @alumnos_bp.route("/<int:alumno_id>", methods=["GET"])
 def obtener_alumno(alumno_id):
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", f"=== INICIO: Obtener alumno ID={alumno_id} ===")
 
     conn = get_connection()
     if conn is None:
         registrar_log("alumnos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error de BD"}), 500
 
     try:
@@ -74,17 +116,14 @@ def obtener_alumno(alumno_id):
 
         if alumno is None:
             registrar_log("alumnos", "WARN", f"Alumno ID={alumno_id} no encontrado o inactivo")
-            finalizar_medicion()
             return jsonify({"error": "Alumno no encontrado"}), 404
 
         registrar_log("alumnos", "INFO", f"Alumno ID={alumno_id} recuperado: {alumno['nombre']} {alumno['apellido']}")
         registrar_log("alumnos", "INFO", f"=== FIN: Obtener alumno ID={alumno_id} ===")
-        finalizar_medicion()
         return jsonify(alumno), 200
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al obtener alumno: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error interno"}), 500
 
     finally:
@@ -97,25 +136,21 @@ def obtener_alumno(alumno_id):
 # ============================
 @alumnos_bp.route("", methods=["POST"])
 def crear_alumno():
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", "=== INICIO: Crear nuevo alumno ===")
 
     data = request.get_json()
     if not data:
         registrar_log("alumnos", "WARN", "Request sin datos JSON o datos inválidos")
-        finalizar_medicion()
         return jsonify({"error": "Datos inválidos"}), 400
 
     errores = validar_alumno(data)
     if errores:
         registrar_log("alumnos", "WARN", f"Validación fallida al crear alumno: {', '.join(errores)}")
-        finalizar_medicion()
         return jsonify({"errores": errores}), 400
 
     conn = get_connection()
     if conn is None:
         registrar_log("alumnos", "ERROR", "Error al conectar a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error al conectar BD"}), 500
 
     try:
@@ -127,18 +162,18 @@ def crear_alumno():
             data["nombre"], data["apellido"], data.get("edad"), data["dni"],
             data.get("correo"), data.get("telefono"), data.get("ciclo_actual", 1)
         ))
+        nuevo_id = cursor.lastrowid
+        versionar(cursor, alumnos_bp.name)
         conn.commit()
 
-        nuevo_id = cursor.lastrowid
+        indice_alumnos.refrescar(conn.cursor(dictionary=True), nuevo_id)
         registrar_log("alumnos", "INFO", f"Alumno creado exitosamente - ID={nuevo_id}, DNI={data['dni']}, Nombre={data['nombre']} {data['apellido']}")
         registrar_log("alumnos", "INFO", "=== FIN: Crear nuevo alumno ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Alumno creado", "id": nuevo_id}), 201
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al crear alumno: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD"}), 500
 
     finally:
@@ -151,25 +186,21 @@ def crear_alumno():
 # ============================
 @alumnos_bp.route("/<int:alumno_id>", methods=["PUT"])
 def actualizar_alumno(alumno_id):
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", f"=== INICIO: Actualizar alumno ID={alumno_id} ===")
 
     data = request.get_json()
     if not data:
         registrar_log("alumnos", "WARN", "Request sin datos JSON")
-        finalizar_medicion()
         return jsonify({"error": "Datos inválidos"}), 400
 
     errores = validar_alumno(data)
     if errores:
         registrar_log("alumnos", "WARN", f"Validación fallida al actualizar: {', '.join(errores)}")
-        finalizar_medicion()
         return jsonify({"errores": errores}), 400
 
     conn = get_connection()
     if conn is None:
         registrar_log("alumnos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error BD"}), 500
 
     try:
@@ -183,22 +214,23 @@ def actualizar_alumno(alumno_id):
             data.get("correo"), data.get("telefono"), data.get("ciclo_actual", 1),
             alumno_id
         ))
+        encontrado = cursor.rowcount
+        if encontrado:
+            versionar(cursor, alumnos_bp.name)
         conn.commit()
 
-        if cursor.rowcount == 0:
+        if encontrado == 0:
             registrar_log("alumnos", "WARN", f"Alumno ID={alumno_id} no encontrado para actualización")
-            finalizar_medicion()
             return jsonify({"error": "Alumno no encontrado"}), 404
+        indice_alumnos.refrescar(conn.cursor(dictionary=True), alumno_id)
 
         registrar_log("alumnos", "INFO", f"Alumno actualizado exitosamente - ID={alumno_id}, Nombre={data['nombre']} {data['apellido']}")
         registrar_log("alumnos", "INFO", f"=== FIN: Actualizar alumno ID={alumno_id} ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Alumno actualizado"}), 200
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al actualizar alumno: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD"}), 500
 
     finally:
@@ -211,34 +243,33 @@ def actualizar_alumno(alumno_id):
 # ============================
 @alumnos_bp.route("/<int:alumno_id>", methods=["DELETE"])
 def eliminar_alumno(alumno_id):
-    iniciar_medicion()
     registrar_log("alumnos", "INFO", f"=== INICIO: Eliminar alumno ID={alumno_id} ===")
 
     conn = get_connection()
     if conn is None:
         registrar_log("alumnos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error BD"}), 500
 
     try:
         cursor = conn.cursor()
         cursor.execute("UPDATE alumnos SET activo = 0 WHERE id = %s", (alumno_id,))
+        encontrado = cursor.rowcount
+        if encontrado:
+            versionar(cursor, alumnos_bp.name)
         conn.commit()
 
-        if cursor.rowcount == 0:
+        if encontrado == 0:
             registrar_log("alumnos", "WARN", f"Alumno ID={alumno_id} no encontrado para eliminación")
-            finalizar_medicion()
             return jsonify({"error": "Alumno no encontrado"}), 404
+        indice_alumnos.refrescar(conn.cursor(dictionary=True), alumno_id)
 
         registrar_log("alumnos", "INFO", f"Alumno marcado como inactivo exitosamente - ID={alumno_id}")
         registrar_log("alumnos", "INFO", f"=== FIN: Eliminar alumno ID={alumno_id} ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Alumno eliminado correctamente"}), 200
 
     except Exception as e:
         registrar_log("alumnos", "ERROR", f"Excepción al eliminar alumno: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error al eliminar alumno"}), 500
 
     finally:
@@ -0,0 +1,294 @@
+"""
+Índice en memoria para buscar alumnos por DNI, nombre, apellido y correo.
+
+Cada campo se parte en palabras normalizadas (minúsculas, sin tildes:
+"Pérez" -> "perez", "Muñoz" -> "munoz"). Por palabra se guardan los ids
+que la contienen y una lista ordenada de palabras, así un prefijo se
+resuelve con bisect; los trigramas de cada palabra permiten además
+encontrar texto interior ("rez" -> "perez", "ramirez").
+
+Una búsqueda recorre las palabras que coinciden con el término más largo
+en orden de relevancia (palabra exacta, luego prefijos en orden
+alfabético, luego texto interior; por id dentro de cada palabra) y se
+detiene al juntar `limite` alumnos, sin recorrer todas las coincidencias.
+Los demás términos se exigen todos (AND) y suman puntaje (exacta 3,
+prefijo 2, interior 1): se toman las primeras limite x factor_candidatos
+coincidencias y se ordenan por ese puntaje. Solo toca el índice, no la BD.
+
+El índice se arma en cada proceso al iniciar la app (create_app, en un
+hilo aparte: la primera búsqueda bajo carga no paga el armado) y lo
+mantienen crear/actualizar/eliminar_alumno con refrescar(). Los cambios hechos en
+otro proceso se detectan con la versión de alumnos de utils/condicional:
+si no cuadra con la del índice más sus cambios propios, se reconstruye
+aparte y mientras tanto se sigue respondiendo con el índice anterior
+(también si la BD no responde; sin ningún índice se lanza db.Error).
+"""
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from config import BUSQUEDA_CONFIG
+from db import Error, get_connection
+from utils.condicional import leer_versiones
+from utils.logger import registrar_log
+
+CAMPOS_INDICE = ("id", "nombre", "apellido", "edad", "dni", "correo", "telefono", "ciclo_actual")
+CAMPOS_BUSCABLES = ("dni", "nombre", "apellido", "correo")
+SEPARADORES = re.compile(r"[^0-9a-z]+")
+
+PUNTAJE_EXACTO = 3
+PUNTAJE_PREFIJO = 2
+PUNTAJE_INTERIOR = 1
+MAX_PALABRAS_TERMINO = 500      # Sobre esto, los términos secundarios se comparan como texto
+
+
+def normalizar(texto):
+    """'José Pérez' -> 'jose perez' (NFKD separa la tilde de la letra y se descarta)"""
+    texto = str(texto)
+    if not texto.isascii():
+        texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return texto.lower()
+
+
+def palabras(texto):
+    return [p for p in SEPARADORES.split(normalizar(texto)) if p]
+
+
+def trigramas(palabra):
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+
+def _puntaje_palabra(palabra, termino):
+    """Para una palabra que ya coincide con el término"""
+    if palabra == termino:
+        return PUNTAJE_EXACTO
+    return PUNTAJE_PREFIJO if palabra.startswith(termino) else PUNTAJE_INTERIOR
+
+
+class IndiceAlumnos:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._armando = threading.Lock()    # Una sola reconstrucción a la vez
+        self._pid = None
+        self._filas = {}            # id -> fila (CAMPOS_INDICE) que devuelve la búsqueda
+        self._palabras_de = {}      # id -> palabras del alumno
+        self._ids_de = {}           # palabra -> ids en orden ascendente
+        self._ordenadas = []        # palabras en orden, para los prefijos
+        self._trigramas = {}        # trigrama -> palabras
+        self.version = None         # versión de alumnos con la que se armó
+        self._propios = 0           # cambios hechos por este proceso desde entonces
+        self._armado_en = None
+
+    # ============================
+    # MANTENIMIENTO
+    # ============================
+    def _agregar(self, fila, en_bloque=False):
+        """en_bloque: filas por id ascendente y _ordenadas se arma al final (reconstruir)"""
+        alumno_id = fila["id"]
+        if not en_bloque:
+            self._quitar(alumno_id)
+        nuevas = set(palabras(" ".join(str(fila[c]) for c in CAMPOS_BUSCABLES if fila.get(c))))
+
+        self._filas[alumno_id] = fila if en_bloque else {c: fila.get(c) for c in CAMPOS_INDICE}
+        self._palabras_de[alumno_id] = nuevas
+        for palabra in nuevas:
+            ids = self._ids_de.get(palabra)
+            if ids is None:
+                self._ids_de[palabra] = ids = []
+                if not en_bloque:
+                    insort(self._ordenadas, palabra)
+                for tri in trigramas(palabra):
+                    self._trigramas.setdefault(tri, set()).add(palabra)
+            if en_bloque or not ids or ids[-1] < alumno_id:
+                ids.append(alumno_id)
+            else:
+                insort(ids, alumno_id)
+
+    def _quitar(self, alumno_id):
+        self._filas.pop(alumno_id, None)
+        for palabra in self._palabras_de.pop(alumno_id, ()):
+            ids = self._ids_de[palabra]
+            del ids[bisect_left(ids, alumno_id)]
+            if ids:
+                continue
+            del self._ids_de[palabra]
+            del self._ordenadas[bisect_left(self._ordenadas, palabra)]
+            for tri in trigramas(palabra):
+                self._trigramas[tri].discard(palabra)
+                if not self._trigramas[tri]:
+                    del self._trigramas[tri]
+
+    def reconstruir(self, version=None):
+        conn = get_connection()
+        if conn is None:
+            raise Error("Sin conexión a la base de datos para el índice de búsqueda")
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"SELECT {', '.join(CAMPOS_INDICE)} FROM alumnos WHERE activo = 1 ORDER BY id")
+            filas = cursor.fetchall()
+            conn.commit()
+        finally:
+            conn.close()
+
+        # Se arma aparte y se reemplaza al final: mientras tanto se sigue buscando en el anterior
+        inicio = time.perf_counter()
+        nuevo = IndiceAlumnos()
+        for fila in filas:
+            nuevo._agregar(fila, en_bloque=True)
+        nuevo._ordenadas = sorted(nuevo._ids_de)
+        with self._lock:
+            self._filas, self._palabras_de = nuevo._filas, nuevo._palabras_de
+            self._ids_de, self._ordenadas, self._trigramas = nuevo._ids_de, nuevo._ordenadas, nuevo._trigramas
+            self.version, self._propios = version, 0
+            self._armado_en = time.monotonic()
+            self._pid = os.getpid()
+        registrar_log("alumnos", "INFO", f"Índice de búsqueda armado: {len(filas)} alumnos, "
+                                         f"{len(self._ordenadas)} palabras en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    def refrescar(self, cursor, alumno_id):
+        """Tras crear/actualizar/eliminar: relee la fila (si sigue activa) con el cursor del llamador"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return      # Sin índice en este proceso: se arma completo al iniciar o al buscar
+        cursor.execute(f"SELECT {', '.join(CAMPOS_INDICE)} FROM alumnos WHERE id = %s AND activo = 1",
+                       (alumno_id,))
+        fila = cursor.fetchone()
+        with self._lock:
+            if fila is None:
+                self._quitar(alumno_id)
+            else:
+                self._agregar(fila)
+            self._propios += 1
+
+    def armar_al_iniciar(self):
+        """Arma el índice en un hilo aparte (create_app); una búsqueda que llegue antes lo espera"""
+        threading.Thread(target=self._armar_inicial, name="indice-alumnos", daemon=True).start()
+
+    def _armar_inicial(self):
+        with self._armando:
+            if self._pid == os.getpid():
+                return      # Ya lo armó una búsqueda
+            try:
+                # La versión se lee antes que las filas: si cambia en el medio, se rearma al buscar
+                version = leer_versiones(("alumnos",))[0].get("alumnos")
+            except Error:
+                version = None
+            try:
+                self.reconstruir(version)
+            except Error as e:
+                registrar_log("alumnos", "WARN", f"Índice de búsqueda no armado al iniciar: {e}")
+
+    def _vigente(self, version):
+        if self._pid != os.getpid() or self._armado_en is None:
+            return False
+        if version is None:     # Sin versiones_recursos: se rearma por tiempo
+            return time.monotonic() - self._armado_en < BUSQUEDA_CONFIG["ttl_sin_versiones"]
+        if self.version is not None and version == self.version + self._propios:
+            self.version, self._propios = version, 0
+            return True
+        return version == self.version
+
+    # ============================
+    # BÚSQUEDA
+    # ============================
+    def _palabras_que_coinciden(self, termino):
+        """Palabras del índice para el término, en orden de relevancia: exacta, prefijos, texto interior"""
+        i = bisect_left(self._ordenadas, termino)
+        while i < len(self._ordenadas) and self._ordenadas[i].startswith(termino):
+            yield self._ordenadas[i]    # La exacta, si existe, es la primera del rango
+            i += 1
+        if len(termino) >= 3:
+            grupos = sorted((self._trigramas.get(t, ()) for t in trigramas(termino)), key=len)
+            for palabra in grupos[0]:
+                if termino in palabra and not palabra.startswith(termino):
+                    yield palabra
+
+    def _candidatos(self, termino):
+        """(puntaje, id) en el orden de _palabras_que_coinciden y por id dentro de cada palabra, sin repetir"""
+        vistos = set()
+        for palabra in self._palabras_que_coinciden(termino):
+            puntaje = _puntaje_palabra(palabra, termino)
+            for alumno_id in self._ids_de[palabra]:
+                if alumno_id not in vistos:
+                    vistos.add(alumno_id)
+                    yield puntaje, alumno_id
+
+    def _puntajes_palabras(self, termino):
+        """{palabra: puntaje} del término, o None si son demasiadas (se compara texto)"""
+        puntajes = {}
+        for palabra in self._palabras_que_coinciden(termino):
+            if len(puntajes) == MAX_PALABRAS_TERMINO:
+                return None
+            puntajes[palabra] = _puntaje_palabra(palabra, termino)
+        return puntajes
+
+    def _puntaje(self, alumno_id, termino, puntajes):
+        if puntajes is not None:
+            propias = self._palabras_de[alumno_id]
+            if puntajes.keys().isdisjoint(propias):     # El caso común, resuelto en C
+                return 0
+            return max(puntajes.get(p, 0) for p in propias)
+        mejor = 0
+        for palabra in self._palabras_de[alumno_id]:
+            if palabra == termino:
+                return PUNTAJE_EXACTO
+            if palabra.startswith(termino):
+                mejor = PUNTAJE_PREFIJO
+            elif not mejor and termino in palabra:
+                mejor = PUNTAJE_INTERIOR
+        return mejor
+
+    def buscar(self, texto, limite=10, version=None):
+        """(mejores `limite` filas, si hay más coincidencias)"""
+        with self._lock:
+            vigente = self._vigente(version)
+        # Sin índice en el proceso se espera al primer armado; si ya hay uno y otro hilo
+        # lo está rearmando, se responde con el actual
+        if not vigente and self._armando.acquire(blocking=self._pid != os.getpid()):
+            try:
+                with self._lock:
+                    vigente = self._vigente(version)
+                if not vigente:
+                    try:
+                        self.reconstruir(version)
+                    except Error as e:
+                        if self._pid != os.getpid():
+                            raise       # No hay índice anterior con el que responder
+                        registrar_log("alumnos", "WARN", f"Índice de búsqueda sin rearmar, se usa el anterior: {e}")
+            finally:
+                self._armando.release()
+
+        # El término más largo suele ser el más selectivo: genera los candidatos
+        terminos = sorted(set(palabras(texto)), key=lambda t: (-len(t), t))
+        if not terminos:
+            return [], False
+        guia, otros = terminos[0], terminos[1:]
+        with self._lock:
+            puntajes = [self._puntajes_palabras(t) for t in otros]
+            if any(p == {} for p in puntajes):     # Un término sin ninguna palabra: sin resultados
+                return [], False
+
+            elegidos = []
+            margen = limite + 1 if not otros else (limite + 1) * BUSQUEDA_CONFIG["factor_candidatos"]
+            for orden, (puntaje, alumno_id) in enumerate(self._candidatos(guia)):
+                for termino, puntajes_termino in zip(otros, puntajes):
+                    parcial = self._puntaje(alumno_id, termino, puntajes_termino)
+                    if not parcial:
+                        break
+                    puntaje += parcial
+                else:
+                    elegidos.append((-puntaje, orden, alumno_id))
+                    if len(elegidos) == margen:
+                        break
+            elegidos.sort()
+            return [self._filas[i] for _, _, i in elegidos[:limite]], len(elegidos) > limite
+
+    def tamano(self):
+        return len(self._filas)
+
+
+# Un índice por proceso
+indice_alumnos = IndiceAlumnos()
@@ -1,9 +1,48 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from config import CACHE_CONFIG
 from db import get_connection
-from utils.logger import registrar_log, iniciar_medicion, finalizar_medicion
+from utils.cache import CacheTTL
+from utils.logger import registrar_log
+from utils.paginacion import Paginacion, ErrorPaginacion
+from utils.streaming import leer_formato, respuesta_stream, FormatoInvalido
+from utils.serializacion import formato_respuesta
+from utils.condicional import version_datos, versionar
+from routes.reportes.historial import invalidar_historiales_curso
 
 cursos_bp = Blueprint("cursos_bp", __name__, url_prefix="/api/cursos")
 
+PAGINACION_CURSOS = Paginacion(
+    campos={c: c for c in ("id", "codigo", "nombre", "creditos", "ciclo", "activo", "fecha_registro")},
+    orden=[("ciclo", "ASC"), ("codigo", "ASC")]
+)
+
+# Catálogo casi estático: se cachea en memoria y se invalida en cada escritura
+# Se guarda el cuerpo ya serializado, por eso la clave incluye el formato negociado (JSON o MessagePack)
+# y la versión de cursos (utils/condicional): una escritura en otro proceso también deja la entrada sin uso
+cache_catalogo = CacheTTL(**CACHE_CONFIG["catalogo"])    # clave: (formato, versión, query string del listado)
+cache_cursos = CacheTTL(**CACHE_CONFIG["cursos"])        # clave: (id del curso, formato, versión)
+
+
+def invalidar_cache_cursos(curso_id=None):
+    # Los listados pueden incluir cualquier curso: se descartan todos. Del curso
+    # individual solo las entradas del modificado (en cualquier formato y versión);
+    # las de versiones anteriores de los demás ya no se consultan y salen por LRU/TTL
+    cache_catalogo.limpiar()
+    if curso_id is not None:
+        cache_cursos.invalidar_donde(lambda clave: clave[0] == curso_id)
+
+
+def _respuesta_cacheable(cuerpo, mimetype):
+    """Cuerpo ya serializado; ETag y Cache-Control los agrega utils/condicional"""
+    response = current_app.response_class(cuerpo, mimetype=mimetype)
+    response.vary.add("Accept")
+    return response
+
+
+def _entrada_cache(data):
+    respuesta = jsonify(data)
+    return respuesta.get_data(), respuesta.mimetype
+
 
 # ============================
 # VALIDACIÓN DE CAMPOS
@@ -31,28 +70,43 @@ def validar_curso(data):
 # ============================
 @cursos_bp.route("", methods=["GET"])
 def listar_cursos():
-    iniciar_medicion()
     registrar_log("cursos", "INFO", "=== INICIO: Listar cursos activos ===")
 
+    try:
+        formato = leer_formato()
+        consulta = PAGINACION_CURSOS.leer(stream=formato is not None)
+    except (ErrorPaginacion, FormatoInvalido) as e:
+        registrar_log("cursos", "WARN", f"Parámetros de listado inválidos: {e}")
+        return jsonify({"error": str(e)}), 400
+
+    if formato:
+        registrar_log("cursos", "INFO", f"Exportando cursos activos en formato {formato}")
+        return respuesta_stream(*consulta.sql("cursos", "activo = 1"), formato, consulta.proyectar)
+
+    clave = (formato_respuesta(), version_datos(), request.query_string.decode("utf-8", "replace"))
+    entrada = cache_catalogo.obtener(clave)
+    if entrada is not None:
+        registrar_log("cursos", "INFO", "Cursos servidos desde caché")
+        return _respuesta_cacheable(*entrada)
+
     conn = get_connection()
     if conn is None:
         registrar_log("cursos", "ERROR", "No se pudo conectar a la BD")
-        finalizar_medicion()
         return jsonify({"error": "Error de conexión a la base de datos"}), 500
 
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM cursos WHERE activo = 1 ORDER BY ciclo, codigo")
+        cursor.execute(*consulta.sql("cursos", "activo = 1"))
         data = cursor.fetchall()
 
         registrar_log("cursos", "INFO", f"Cursos recuperados exitosamente: {len(data)} registros")
         registrar_log("cursos", "INFO", "=== FIN: Listar cursos activos ===")
-        finalizar_medicion()
-        return jsonify(data), 200
+        entrada = _entrada_cache(consulta.resultado(data))
+        cache_catalogo.guardar(clave, entrada)
+        return _respuesta_cacheable(*entrada)
 
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al listar cursos: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error interno al listar cursos"}), 500
 
     finally:
@@ -65,13 +119,17 @@ def listar_cursos():
 # ============================
 @cursos_bp.route("/<int:curso_id>", methods=["GET"])
 def obtener_curso(curso_id):
-    iniciar_medicion()
     registrar_log("cursos", "INFO", f"=== INICIO: Obtener curso ID={curso_id} ===")
 
+    clave = (curso_id, formato_respuesta(), version_datos())
+    entrada = cache_cursos.obtener(clave)
+    if entrada is not None:
+        registrar_log("cursos", "INFO", f"Curso ID={curso_id} servido desde caché")
+        return _respuesta_cacheable(*entrada)
+
     conn = get_connection()
     if conn is None:
         registrar_log("cursos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error de BD"}), 500
 
     try:
@@ -81,17 +139,16 @@ def obtener_curso(curso_id):
 
         if curso is None:
             registrar_log("cursos", "WARN", f"Curso ID={curso_id} no encontrado o inactivo")
-            finalizar_medicion()
             return jsonify({"error": "Curso no encontrado"}), 404
 
         registrar_log("cursos", "INFO", f"Curso ID={curso_id} recuperado: {curso['codigo']} - {curso['nombre']}")
         registrar_log("cursos", "INFO", f"=== FIN: Obtener curso ID={curso_id} ===")
-        finalizar_medicion()
-        return jsonify(curso), 200
+        entrada = _entrada_cache(curso)
+        cache_cursos.guardar(clave, entrada)
+        return _respuesta_cacheable(*entrada)
 
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al obtener curso: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error interno"}), 500
 
     finally:
@@ -104,25 +161,21 @@ def obtener_curso(curso_id):
 # ============================
 @cursos_bp.route("", methods=["POST"])
 def crear_curso():
-    iniciar_medicion()
     registrar_log("cursos", "INFO", "=== INICIO: Crear nuevo curso ===")
 
     data = request.get_json()
     if not data:
         registrar_log("cursos", "WARN", "Request sin datos JSON o datos inválidos")
-        finalizar_medicion()
         return jsonify({"error": "Datos inválidos"}), 400
 
     errores = validar_curso(data)
     if errores:
         registrar_log("cursos", "WARN", f"Validación fallida al crear curso: {', '.join(errores)}")
-        finalizar_medicion()
         return jsonify({"errores": errores}), 400
 
     conn = get_connection()
     if conn is None:
         registrar_log("cursos", "ERROR", "Error al conectar a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error al conectar BD"}), 500
 
     try:
@@ -133,18 +186,18 @@ def crear_curso():
         """, (
             data["codigo"], data["nombre"], data["creditos"], data["ciclo"]
         ))
+        nuevo_id = cursor.lastrowid
+        versionar(cursor, cursos_bp.name)
         conn.commit()
+        invalidar_cache_cursos()
 
-        nuevo_id = cursor.lastrowid
         registrar_log("cursos", "INFO", f"Curso creado exitosamente - ID={nuevo_id}, Código={data['codigo']}, Nombre={data['nombre']}")
         registrar_log("cursos", "INFO", "=== FIN: Crear nuevo curso ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Curso creado", "id": nuevo_id}), 201
 
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al crear curso: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD"}), 500
 
     finally:
@@ -157,25 +210,21 @@ def crear_curso():
 # ============================
 @cursos_bp.route("/<int:curso_id>", methods=["PUT"])
 def actualizar_curso(curso_id):
-    iniciar_medicion()
     registrar_log("cursos", "INFO", f"=== INICIO: Actualizar curso ID={curso_id} ===")
 
     data = request.get_json()
     if not data:
         registrar_log("cursos", "WARN", "Request sin datos JSON")
-        finalizar_medicion()
         return jsonify({"error": "Datos inválidos"}), 400
 
     errores = validar_curso(data)
     if errores:
         registrar_log("cursos", "WARN", f"Validación fallida al actualizar: {', '.join(errores)}")
-        finalizar_medicion()
         return jsonify({"errores": errores}), 400
 
     conn = get_connection()
     if conn is None:
         registrar_log("cursos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error BD"}), 500
 
     try:
@@ -188,22 +237,24 @@ def actualizar_curso(curso_id):
             data["codigo"], data["nombre"], data["creditos"], data["ciclo"],
             curso_id
         ))
+        encontrado = cursor.rowcount
+        if encontrado:
+            invalidar_historiales_curso(cursor, curso_id)
+            versionar(cursor, cursos_bp.name)
         conn.commit()
+        invalidar_cache_cursos(curso_id)
 
-        if cursor.rowcount == 0:
+        if encontrado == 0:
             registrar_log("cursos", "WARN", f"Curso ID={curso_id} no encontrado para actualización")
-            finalizar_medicion()
             return jsonify({"error": "Curso no encontrado"}), 404
 
         registrar_log("cursos", "INFO", f"Curso actualizado exitosamente - ID={curso_id}, Código={data['codigo']}")
         registrar_log("cursos", "INFO", f"=== FIN: Actualizar curso ID={curso_id} ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Curso actualizado"}), 200
 
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al actualizar curso: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error en BD"}), 500
 
     finally:
@@ -216,34 +267,33 @@ def actualizar_curso(curso_id):
 # ============================
 @cursos_bp.route("/<int:curso_id>", methods=["DELETE"])
 def eliminar_curso(curso_id):
-    iniciar_medicion()
     registrar_log("cursos", "INFO", f"=== INICIO: Eliminar curso ID={curso_id} ===")
 
     conn = get_connection()
     if conn is None:
         registrar_log("cursos", "ERROR", "Error de conexión a BD")
-        finalizar_medicion()
         return jsonify({"error": "Error BD"}), 500
 
     try:
         cursor = conn.cursor()
         cursor.execute("UPDATE cursos SET activo = 0 WHERE id = %s", (curso_id,))
+        encontrado = cursor.rowcount
+        if encontrado:
+            versionar(cursor, cursos_bp.name)
         conn.commit()
+        invalidar_cache_cursos(curso_id)
 
-        if cursor.rowcount == 0:
+        if encontrado == 0:
             registrar_log("cursos", "WARN", f"Curso ID={curso_id} no encontrado para eliminación")
-            finalizar_medicion()
             return jsonify({"error": "Curso no encontrado"}), 404
 
         registrar_log("cursos", "INFO", f"Curso marcado como inactivo exitosamente - ID={curso_id}")
         registrar_log("cursos", "INFO", f"=== FIN: Eliminar curso ID={curso_id} ===")
-        finalizar_medicion()
 
         return jsonify({"mensaje": "Curso eliminado correctamente"}), 200
 
     except Exception as e:
         registrar_log("cursos", "ERROR", f"Excepción al eliminar curso: {str(e)}")
-        finalizar_medicion()
         return jsonify({"error": "Error al eliminar curso"}), 500
 
     finally:
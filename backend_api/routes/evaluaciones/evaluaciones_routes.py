@@ -1,40 +1,101 @@
+import csv
+import io
+from itertools import islice
 from flask import Blueprint, request, jsonify
-from db import get_connection
+from config import CACHE_CONFIG
+from db import get_connection, BLOQUEO_LECTURA, ErrorIntegridad
+from utils.cache import CacheTTL
+from utils.condicional import version_datos, versionar
+from utils.paginacion import Paginacion, ErrorPaginacion
+from utils.streaming import leer_formato, respuesta_stream, FormatoInvalido
+from routes.reportes.resumen_ciclos import CambiosResumen
 
 evaluaciones_bp = Blueprint("evaluaciones_bp", __name__, url_prefix="/api/evaluaciones")
 
+PAGINACION_EVALUACIONES = Paginacion(
+    campos={
+        "id": "e.id", "id_matricula": "e.id_matricula", "nota": "e.nota",
+        "fecha_evaluacion": "e.fecha_evaluacion", "aprobado": "e.aprobado",
+        "alumno": "CONCAT(a.nombre,' ',a.apellido)", "curso": "c.nombre", "ciclo": "m.ciclo"
+    },
+    orden=[("e.fecha_evaluacion", "DESC"), ("e.id", "DESC")]
+)
+DESDE_EVALUACIONES = """evaluaciones e
+    JOIN matriculas m ON e.id_matricula = m.id
+    JOIN alumnos a ON m.id_alumno = a.id
+    JOIN cursos c ON m.id_curso = c.id"""
+
+# Pendiente de nota = matrícula en estado MATRICULADO: cada escritura de
+# evaluaciones mantiene el estado, así que basta el índice por estado
+# (idx_matriculas_estado) en vez de cruzar todas las matrículas con evaluaciones
+PAGINACION_PENDIENTES = Paginacion(
+    campos={
+        "id_matricula": "m.id", "alumno": "CONCAT(a.nombre,' ',a.apellido)", "curso": "c.nombre",
+        "ciclo": "m.ciclo", "id_alumno": "m.id_alumno", "id_curso": "m.id_curso"
+    },
+    orden=[("m.id", "ASC")],
+    por_defecto=["id_matricula", "alumno", "curso", "ciclo"]
+)
+DESDE_PENDIENTES = """matriculas m
+    JOIN alumnos a ON m.id_alumno = a.id
+    JOIN cursos c ON m.id_curso = c.id"""
+
+# Clave: query string; se limpia en cada escritura de matrículas o evaluaciones
+cache_pendientes = CacheTTL(**CACHE_CONFIG["pendientes"])
+
+
+def filtro_pendientes(ciclo=None, curso=None):
+    """(donde, params) de las matrículas pendientes, opcionalmente de un ciclo / curso"""
+    condiciones, params = ["m.estado = 'MATRICULADO'"], []
+    if ciclo is not None:
+        condiciones.append("m.ciclo = %s")
+        params.append(ciclo)
+    if curso is not None:
+        condiciones.append("m.id_curso = %s")
+        params.append(curso)
+    return " AND ".join(condiciones), tuple(params)
+
 @evaluaciones_bp.route("", methods=["GET"])
 def listar():
+    try:
+        formato = leer_formato()
+        consulta = PAGINACION_EVALUACIONES.leer(stream=formato is not None)
+    except (ErrorPaginacion, FormatoInvalido) as e:
+        return jsonify({"error": str(e)}), 400
+
+    if formato:
+        return respuesta_stream(*consulta.sql(DESDE_EVALUACIONES), formato, consulta.proyectar)
+
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT e.*, CONCAT(a.nombre,' ',a.apellido) as alumno, c.nombre as curso, m.ciclo
-            FROM evaluaciones e
-            JOIN matriculas m ON e.id_matricula = m.id
-            JOIN alumnos a ON m.id_alumno = a.id
-            JOIN cursos c ON m.id_curso = c.id
-            ORDER BY e.fecha_evaluacion DESC
-        """)
-        return jsonify(cursor.fetchall())
+        cursor.execute(*consulta.sql(DESDE_EVALUACIONES))
+        return jsonify(consulta.resultado(cursor.fetchall()))
     finally:
         if conn: conn.close()
 
 @evaluaciones_bp.route("/pendientes", methods=["GET"])
 def pendientes():
+    """Matrículas sin nota; ?ciclo=&curso= (id) filtran, limit/after/fields paginan"""
+    try:
+        consulta = PAGINACION_PENDIENTES.leer()
+    except ErrorPaginacion as e:
+        return jsonify({"error": str(e)}), 400
+
+    clave = (request.query_string.decode("utf-8", "replace"), version_datos())
+    resultado = cache_pendientes.obtener(clave)
+    if resultado is not None:
+        return jsonify(resultado)
+
+    donde, params = filtro_pendientes(request.args.get("ciclo", type=int),
+                                      request.args.get("curso", type=int))
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT m.id as id_matricula, CONCAT(a.nombre,' ',a.apellido) as alumno,
-                   c.nombre as curso, m.ciclo
-            FROM matriculas m
-            JOIN alumnos a ON m.id_alumno = a.id
-            JOIN cursos c ON m.id_curso = c.id
-            LEFT JOIN evaluaciones e ON m.id = e.id_matricula
-            WHERE e.id IS NULL
-        """)
-        return jsonify(cursor.fetchall())
+        cursor.execute(*consulta.sql(DESDE_PENDIENTES, donde, params))
+        resultado = consulta.resultado(cursor.fetchall())
+        cache_pendientes.guardar(clave, resultado)
+        return jsonify(resultado)
     finally:
         if conn: conn.close()
 
@@ -47,22 +108,189 @@ def crear():
     conn = get_connection()
     try:
         cursor = conn.cursor()
+        # La fila de la matrícula bloqueada serializa las notas simultáneas de la misma matrícula
+        cursor.execute(f"SELECT id_alumno, ciclo FROM matriculas WHERE id=%s{BLOQUEO_LECTURA}",
+                       (data['id_matricula'],))
+        matricula = cursor.fetchone()
+        if not matricula:
+            return jsonify({"error": "Matrícula no encontrada"}), 404
+
         # Verificar si ya existe evaluación para esa matrícula
         cursor.execute("SELECT id FROM evaluaciones WHERE id_matricula=%s", (data['id_matricula'],))
         if cursor.fetchone():
             return jsonify({"error": "Esta matrícula ya tiene nota"}), 400
 
-        cursor.execute("INSERT INTO evaluaciones(id_matricula, nota, aprobado) VALUES (%s, %s, %s)",
-                       (data['id_matricula'], nota, 1 if nota>=10.5 else 0))
+        # uq_evaluaciones_matricula cubre lo que el bloqueo no (p. ej. SQLite con varios procesos)
+        try:
+            cursor.execute("INSERT INTO evaluaciones(id_matricula, nota, aprobado) VALUES (%s, %s, %s)",
+                           (data['id_matricula'], nota, 1 if nota>=10.5 else 0))
+        except ErrorIntegridad:
+            conn.rollback()
+            return jsonify({"error": "Esta matrícula ya tiene nota"}), 400
         
         cursor.execute("UPDATE matriculas SET estado=%s WHERE id=%s", (estado, data['id_matricula']))
+        cambios = CambiosResumen()
+        cambios.cambiar_nota(matricula[1], matricula[0], None, nota)
+        cambios.aplicar(cursor)
+        versionar(cursor, evaluaciones_bp.name)
         conn.commit()
+        cache_pendientes.limpiar()
         return jsonify({"mensaje": "Guardado"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
 
+# ============================
+# CARGA MASIVA DE NOTAS
+# ============================
+TAMANO_LOTE_NOTAS = 1000
+MAX_ERRORES_DETALLE = 100
+
+
+def _filas_csv(archivo):
+    """(número de fila, dict) leyendo el CSV por streaming; cabecera: id_matricula,nota"""
+    lector = csv.DictReader(io.TextIOWrapper(archivo, encoding="utf-8-sig", newline=""))
+    for numero, fila in enumerate(lector, start=2):
+        yield numero, fila
+
+
+def _validar_nota(fila):
+    try:
+        id_matricula = int(fila["id_matricula"])
+        nota = float(fila["nota"])
+    except (KeyError, TypeError, ValueError):
+        return None, "Se requiere id_matricula entero y nota numérica"
+    if not 0 <= nota <= 20:
+        return None, "La nota debe estar entre 0 y 20"
+    return (id_matricula, nota), None
+
+
+def servicio_notas_lote(filas, parcial=False):
+    """
+    Registra notas en lote dentro de una sola transacción. Las filas se
+    procesan en bloques de TAMANO_LOTE_NOTAS: una consulta que bloquea las
+    matrículas existentes, otra para ver cuáles ya tienen nota, un
+    executemany para las evaluaciones y dos UPDATE ... IN (...) para
+    matriculas.estado. Sin parcial=True cualquier fila rechazada deshace
+    toda la carga. Si aun así choca con uq_evaluaciones_matricula, propaga
+    ErrorIntegridad sin registrar nada.
+    """
+    resumen = {"procesadas": 0, "registradas": 0, "rechazadas": 0, "errores": []}
+    vistas = set()
+    matriculas = {}     # id_matricula -> (id_alumno, ciclo) para el resumen por ciclo
+
+    def rechazar(numero, id_matricula, mensaje):
+        resumen["rechazadas"] += 1
+        if len(resumen["errores"]) < MAX_ERRORES_DETALLE:
+            resumen["errores"].append({"fila": numero, "id_matricula": id_matricula, "mensaje": mensaje})
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cambios = CambiosResumen()
+        filas = iter(filas)
+        while True:
+            bloque = list(islice(filas, TAMANO_LOTE_NOTAS))
+            if not bloque:
+                break
+            resumen["procesadas"] += len(bloque)
+
+            candidatas = []
+            for numero, fila in bloque:
+                valor, error = _validar_nota(fila)
+                if error:
+                    rechazar(numero, fila.get("id_matricula") if isinstance(fila, dict) else None, error)
+                elif valor[0] in vistas:
+                    rechazar(numero, valor[0], "Matrícula repetida en la carga")
+                else:
+                    vistas.add(valor[0])
+                    candidatas.append((numero, valor))
+            if not candidatas:
+                continue
+
+            # Matrículas bloqueadas hasta el commit: otra carga con las mismas espera y ve estas notas
+            ids = sorted(v[0] for _, v in candidatas)
+            placeholders = ','.join(['%s'] * len(ids))
+            cursor.execute(f"SELECT id, id_alumno, ciclo FROM matriculas WHERE id IN ({placeholders}) "
+                           f"ORDER BY id{BLOQUEO_LECTURA}", tuple(ids))
+            for id_matricula, id_alumno, ciclo in cursor.fetchall():
+                matriculas[id_matricula] = (id_alumno, ciclo)
+            cursor.execute(f"SELECT id_matricula FROM evaluaciones WHERE id_matricula IN ({placeholders})",
+                           tuple(ids))
+            con_nota = {fila[0] for fila in cursor.fetchall()}
+
+            nuevas = []
+            for numero, (id_matricula, nota) in candidatas:
+                if id_matricula not in matriculas:
+                    rechazar(numero, id_matricula, "Matrícula no encontrada")
+                elif id_matricula in con_nota:
+                    rechazar(numero, id_matricula, "Esta matrícula ya tiene nota")
+                else:
+                    nuevas.append((id_matricula, nota, 1 if nota >= 10.5 else 0))
+                    id_alumno, ciclo = matriculas[id_matricula]
+                    cambios.cambiar_nota(ciclo, id_alumno, None, nota)
+            if not nuevas:
+                continue
+
+            cursor.executemany("INSERT INTO evaluaciones(id_matricula, nota, aprobado) VALUES (%s, %s, %s)", nuevas)
+            for estado, aprobado in (("APROBADO", 1), ("DESAPROBADO", 0)):
+                ids_estado = [n[0] for n in nuevas if n[2] == aprobado]
+                if ids_estado:
+                    placeholders = ','.join(['%s'] * len(ids_estado))
+                    cursor.execute(f"UPDATE matriculas SET estado=%s WHERE id IN ({placeholders})",
+                                   (estado, *ids_estado))
+            resumen["registradas"] += len(nuevas)
+
+        if resumen["rechazadas"] and not parcial:
+            conn.rollback()
+            resumen["registradas"] = 0
+        else:
+            cambios.aplicar(cursor)
+            if resumen["registradas"]:
+                versionar(cursor, evaluaciones_bp.name)
+            conn.commit()
+            cache_pendientes.limpiar()
+        return resumen
+    finally:
+        if conn: conn.close()
+
+
+@evaluaciones_bp.route("/lote", methods=["POST"])
+def crear_lote():
+    """
+    Carga masiva de notas:
+    - JSON: [{"id_matricula", "nota"}, ...] o {"evaluaciones": [...]}
+    - CSV (text/csv en el body o archivo multipart "archivo") con cabecera id_matricula,nota
+    ?parcial=true registra las filas válidas aunque otras se rechacen.
+    """
+    parcial = request.args.get("parcial", "false").lower() in ("1", "true", "si")
+
+    if "archivo" in request.files:
+        filas = _filas_csv(request.files["archivo"].stream)
+    elif request.mimetype == "text/csv":
+        filas = _filas_csv(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        data = data.get("evaluaciones") if isinstance(data, dict) else data
+        if not isinstance(data, list) or not data:
+            return jsonify({"error": "Se requiere una lista de evaluaciones o un archivo CSV"}), 400
+        filas = enumerate(data, start=1)
+
+    try:
+        resumen = servicio_notas_lote(filas, parcial)
+    except ErrorIntegridad:
+        return jsonify({"error": "Otra carga registró notas para las mismas matrículas, reintente"}), 409
+    except (UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": f"CSV inválido: {e}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    if resumen["rechazadas"] and not parcial:
+        return jsonify(resumen), 422
+    return jsonify(resumen), 201 if resumen["registradas"] else 200
+
+
 @evaluaciones_bp.route("/<int:id>", methods=["PUT"])
 def editar(id):
     data = request.get_json()
@@ -73,14 +301,18 @@ def editar(id):
     try:
         cursor = conn.cursor()
         
-        # 1. Obtener id_matricula de esta evaluación
-        cursor.execute("SELECT id_matricula FROM evaluaciones WHERE id=%s", (id,))
+        # 1. Obtener id_matricula (y la nota anterior) de esta evaluación
+        cursor.execute("""
+            SELECT e.id_matricula, e.nota, m.id_alumno, m.ciclo FROM evaluaciones e
+            JOIN matriculas m ON e.id_matricula = m.id
+            WHERE e.id=%s
+        """, (id,))
         row = cursor.fetchone()
         
         if not row:
             return jsonify({"error": "Evaluación no encontrada"}), 404
         
-        id_matricula = row[0]
+        id_matricula, nota_anterior, id_alumno, ciclo = row
         
         # 2. Actualizar Evaluación
         cursor.execute("UPDATE evaluaciones SET nota=%s, aprobado=%s WHERE id=%s",
@@ -88,7 +320,11 @@ def editar(id):
         
         # 3. Actualizar Estado de Matrícula
         cursor.execute("UPDATE matriculas SET estado=%s WHERE id=%s", (estado, id_matricula))
-        
+
+        cambios = CambiosResumen()
+        cambios.cambiar_nota(ciclo, id_alumno, nota_anterior, nota)
+        cambios.aplicar(cursor)
+        versionar(cursor, evaluaciones_bp.name)
         conn.commit()
         return jsonify({"mensaje": "Nota actualizada correctamente"}), 200
     except Exception as e:
@@ -101,7 +337,11 @@ def eliminar(id):
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT id_matricula FROM evaluaciones WHERE id=%s", (id,))
+        cursor.execute("""
+            SELECT e.id_matricula, e.nota, m.id_alumno, m.ciclo FROM evaluaciones e
+            JOIN matriculas m ON e.id_matricula = m.id
+            WHERE e.id=%s
+        """, (id,))
         row = cursor.fetchone()
         
         if row:
@@ -109,7 +349,13 @@ def eliminar(id):
             cursor.execute("UPDATE matriculas SET estado='MATRICULADO' WHERE id=%s", (row[0],))
         
         cursor.execute("DELETE FROM evaluaciones WHERE id=%s", (id,))
+        if row:
+            cambios = CambiosResumen()
+            cambios.cambiar_nota(row[3], row[2], row[1], None)
+            cambios.aplicar(cursor)
+            versionar(cursor, evaluaciones_bp.name)
         conn.commit()
+        cache_pendientes.limpiar()
         return jsonify({"mensaje": "Eliminado"}), 200
     finally:
         if conn: conn.close()
\ No newline at end of file
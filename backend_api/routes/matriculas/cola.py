@@ -0,0 +1,207 @@
+"""
+Cola de matrículas para los picos de apertura de matrícula.
+
+POST /api/matriculas/cola solo valida y encola la solicitud (sin tocar la
+BD) y devuelve un ticket; un grupo fijo de hilos toma las solicitudes por
+lotes y las procesa con servicio_matricula_lote, así la BD recibe pocas
+transacciones grandes en lugar de una por request. Cada hilo tiene su
+propia cola y las solicitudes de un alumno van siempre a la misma
+(id_alumno % workers): dos lotes del mismo alumno no corren a la vez y no
+compiten por el bloqueo de su fila. El cliente consulta
+GET /api/matriculas/cola/<ticket> hasta que el estado sea COMPLETADO.
+
+Cuando la cola supera max_profundidad se rechaza con 429 y Retry-After.
+La cola y los tickets viven en memoria del proceso: cada proceso del
+servidor tiene la suya.
+"""
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from utils.logger import registrar_log
+
+
+class ColaLlena(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Cola de matrícula llena")
+        self.retry_after = retry_after
+
+
+class ColaMatriculas:
+    """
+    - encolar() devuelve el ticket o lanza ColaLlena
+    - cada hilo atiende su propia cola (max_profundidad repartida entre
+      los hilos), elegida por id_alumno
+    - cada hilo junta hasta tamano_lote solicitudes (esperando como máximo
+      espera_lote segundos) y las procesa en una sola llamada
+    - los tickets terminados se conservan ttl_tickets segundos
+    - cerrar() procesa lo pendiente y detiene los hilos
+    """
+
+    _FIN = object()
+    REINTENTOS = 3      # Conflictos de UNIQUE con otro lote en paralelo
+
+    def __init__(self, procesar, workers=2, max_profundidad=5000, tamano_lote=200,
+                 espera_lote=0.05, retry_after=2, ttl_tickets=600, max_tickets=100000):
+        self.procesar = procesar
+        self.workers = workers
+        self.max_profundidad = max_profundidad
+        self.tamano_lote = tamano_lote
+        self.espera_lote = espera_lote
+        self.retry_after = retry_after
+        self.ttl_tickets = ttl_tickets
+        self.max_tickets = max_tickets
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._colas = []
+        self._hilos = []
+        self._tickets = {}                 # ticket -> dict de estado
+        self._terminados = OrderedDict()   # ticket -> hora de término (en orden de término)
+        self._procesadas = 0
+        self._inicio = None
+
+    # ---------- API ----------
+    def encolar(self, solicitud):
+        self._iniciar()
+        ticket = uuid.uuid4().hex
+        with self._lock:
+            self._purgar()
+            self._tickets[ticket] = {"ticket": ticket, "estado": "EN_COLA", "solicitud": solicitud,
+                                     "creado": time.time()}
+        try:
+            self._cola_de(solicitud).put_nowait((ticket, solicitud))
+        except queue.Full:
+            with self._lock:
+                del self._tickets[ticket]
+            raise ColaLlena(self._estimar_espera())
+        return ticket
+
+    def consultar(self, ticket):
+        with self._lock:
+            estado = self._tickets.get(ticket)
+            if estado is None:
+                return None
+            respuesta = dict(estado)
+        if respuesta["estado"] == "EN_COLA":
+            respuesta["en_cola"] = self.profundidad()
+        return respuesta
+
+    def profundidad(self):
+        if not self._colas or self._pid != os.getpid():
+            return 0
+        return sum(cola.qsize() for cola in self._colas)
+
+    def cerrar(self, timeout=10):
+        if not self._colas or self._pid != os.getpid():
+            return
+        for cola in self._colas:
+            cola.put(self._FIN)      # Después de lo pendiente: se procesa todo antes de salir
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._colas = []
+        self._hilos = []
+
+    # ---------- internos ----------
+    def _iniciar(self):
+        """Arranca los hilos en el primer uso (y de nuevo en el proceso hijo tras un fork)"""
+        if self._colas and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._colas and self._pid == os.getpid():
+                return
+            self._tickets.clear()
+            self._terminados.clear()
+            por_hilo = math.ceil(self.max_profundidad / self.workers)
+            self._colas = [queue.Queue(maxsize=por_hilo) for _ in range(self.workers)]
+            self._inicio = time.monotonic()
+            self._procesadas = 0
+            self._hilos = [threading.Thread(target=self._ejecutar, args=(cola,),
+                                            name=f"cola-matriculas-{i}", daemon=True)
+                           for i, cola in enumerate(self._colas)]
+            for hilo in self._hilos:
+                hilo.start()
+            self._pid = os.getpid()
+
+    def _cola_de(self, solicitud):
+        """Misma cola (y mismo hilo) para todas las solicitudes de un alumno"""
+        return self._colas[solicitud["id_alumno"] % len(self._colas)]
+
+    def _estimar_espera(self):
+        """Segundos sugeridos en Retry-After según el ritmo observado (mínimo retry_after)"""
+        transcurrido = time.monotonic() - self._inicio if self._inicio else 0
+        ritmo = self._procesadas / transcurrido if transcurrido > 0 else 0
+        if not ritmo:
+            return self.retry_after
+        return max(self.retry_after, math.ceil(self.profundidad() / ritmo))
+
+    def _purgar(self):
+        """Descarta tickets terminados vencidos (y los más viejos si se excede max_tickets)"""
+        limite = time.time() - self.ttl_tickets
+        while self._terminados:
+            ticket, terminado = next(iter(self._terminados.items()))
+            if terminado >= limite and len(self._tickets) <= self.max_tickets:
+                break
+            self._terminados.popitem(last=False)
+            self._tickets.pop(ticket, None)
+
+    def _tomar_lote(self, cola):
+        """Bloquea hasta la primera solicitud y junta las que lleguen durante espera_lote"""
+        lote = [cola.get()]
+        if lote[0] is self._FIN:
+            return [], True
+        limite = time.monotonic() + self.espera_lote
+        while len(lote) < self.tamano_lote:
+            try:
+                item = cola.get(timeout=max(limite - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is self._FIN:
+                return lote, True
+            lote.append(item)
+        return lote, False
+
+    def _ejecutar(self, cola):
+        fin = False
+        while not fin:
+            lote, fin = self._tomar_lote(cola)
+            if lote:
+                self._procesar_lote(lote)
+
+    def _procesar_lote(self, lote):
+        tickets = [ticket for ticket, _ in lote]
+        with self._lock:
+            for ticket in tickets:
+                self._tickets[ticket]["estado"] = "PROCESANDO"
+
+        resultados, error = None, None
+        for _ in range(self.REINTENTOS):
+            try:
+                resultados = self.procesar([solicitud for _, solicitud in lote])
+                break
+            except Exception as e:
+                # Un UNIQUE violado por otro lote en paralelo se resuelve reintentando
+                # (las filas ya insertadas salen como DUPLICADA)
+                error = e
+        if resultados is None:
+            registrar_log("matriculas", "ERROR", f"Cola de matrícula: lote de {len(lote)} falló: {error}")
+
+        terminado = time.time()
+        with self._lock:
+            for i, ticket in enumerate(tickets):
+                estado = self._tickets.get(ticket)
+                if estado is None:
+                    continue
+                estado["terminado"] = terminado
+                self._terminados[ticket] = terminado
+                if resultados is None:
+                    estado.update(estado="ERROR", error=str(error))
+                else:
+                    resultado = dict(resultados[i])
+                    resultado.pop("indice", None)
+                    estado.update(estado="COMPLETADO", resultado=resultado)
+            self._procesadas += len(lote)
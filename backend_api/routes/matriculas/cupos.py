@@ -0,0 +1,139 @@
+"""
+Cupos por curso y ciclo de matrícula.
+
+cupos_cursos guarda la capacidad de un curso en un ciclo y cuántas
+matrículas la ocupan. Un curso sin fila en cupos_cursos no tiene límite.
+
+Reservar es un UPDATE condicional (ocupados + n <= capacidad): atómico en
+ambos motores, sin SELECT previo con bloqueo, así que cientos de requests
+simultáneas no pueden pasarse de la capacidad. Antes de abrir la
+transacción, hay_cupo() hace una lectura sin bloqueos para rechazar de
+inmediato cuando el curso ya está lleno.
+
+Las escrituras de matrículas toman primero los cupos (por clave ascendente
+si son varios) y después insertan, mueven o borran la matrícula: con un
+mismo orden en todas las rutas, dos transacciones no se bloquean en cruz.
+"""
+from db import BLOQUEO_LECTURA, ErrorIntegridad
+
+TAMANO_BLOQUE = 500
+
+TABLAS_CUPOS = [
+    """
+CREATE TABLE IF NOT EXISTS cupos_cursos (
+    id_curso INTEGER NOT NULL,
+    ciclo INTEGER NOT NULL,
+    capacidad INTEGER NOT NULL,
+    ocupados INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_curso, ciclo)
+)
+"""
+]
+
+
+# ============================
+# RESERVA Y LIBERACIÓN (dentro de la transacción del llamador, cursor de tuplas)
+# ============================
+def hay_cupo(cursor, id_curso, ciclo):
+    """Lectura sin bloqueo: False solo si el curso tiene capacidad y ya está lleno"""
+    cursor.execute("SELECT capacidad - ocupados FROM cupos_cursos WHERE id_curso = %s AND ciclo = %s",
+                   (id_curso, ciclo))
+    fila = cursor.fetchone()
+    return fila is None or fila[0] > 0
+
+
+def reservar(cursor, id_curso, ciclo, cantidad=1):
+    """Ocupa `cantidad` cupos; False si no alcanzan (el curso sin capacidad definida siempre acepta)"""
+    cursor.execute("""
+        UPDATE cupos_cursos SET ocupados = ocupados + %s
+        WHERE id_curso = %s AND ciclo = %s AND ocupados + %s <= capacidad
+    """, (cantidad, id_curso, ciclo, cantidad))
+    if cursor.rowcount:
+        return True
+    cursor.execute("SELECT 1 FROM cupos_cursos WHERE id_curso = %s AND ciclo = %s", (id_curso, ciclo))
+    return cursor.fetchone() is None
+
+
+def liberar(cursor, id_curso, ciclo, cantidad=1):
+    cursor.execute("""
+        UPDATE cupos_cursos SET ocupados = CASE WHEN ocupados > %s THEN ocupados - %s ELSE 0 END
+        WHERE id_curso = %s AND ciclo = %s
+    """, (cantidad, cantidad, id_curso, ciclo))
+
+
+def bloquear_libres(cursor, claves):
+    """
+    {(id_curso, ciclo): cupos libres} de los cursos con capacidad, con sus
+    filas bloqueadas hasta el commit (para decidir un lote completo). Se
+    bloquean en orden para que dos lotes no se crucen.
+    """
+    claves = sorted(set(claves))
+    libres = {}
+    for i in range(0, len(claves), TAMANO_BLOQUE):
+        bloque = claves[i:i + TAMANO_BLOQUE]
+        condiciones = " OR ".join(["(id_curso = %s AND ciclo = %s)"] * len(bloque))
+        params = tuple(v for clave in bloque for v in clave)
+        # SQLite no tiene FOR UPDATE: el UPDATE sin cambios toma el bloqueo de escritura
+        cursor.execute(f"UPDATE cupos_cursos SET ocupados = ocupados WHERE {condiciones}", params)
+        cursor.execute(f"SELECT id_curso, ciclo, capacidad - ocupados FROM cupos_cursos "
+                       f"WHERE {condiciones}{BLOQUEO_LECTURA}", params)
+        libres.update(((id_curso, ciclo), n) for id_curso, ciclo, n in cursor.fetchall())
+    return libres
+
+
+def bloquear_ciclo(cursor, ciclo):
+    """Bloquea en orden todos los cupos definidos de un ciclo (antes de una escritura por conjunto)"""
+    cursor.execute("SELECT id_curso FROM cupos_cursos WHERE ciclo = %s", (ciclo,))
+    return bloquear_libres(cursor, [(fila[0], ciclo) for fila in cursor.fetchall()])
+
+
+def recontar(cursor, ciclo):
+    """Ocupados = matrículas reales del ciclo (tras escrituras por conjunto, como el arrastre)"""
+    cursor.execute("""
+        UPDATE cupos_cursos SET ocupados = (
+            SELECT COUNT(*) FROM matriculas m
+            WHERE m.id_curso = cupos_cursos.id_curso AND m.ciclo = cupos_cursos.ciclo
+        )
+        WHERE ciclo = %s
+    """, (ciclo,))
+
+
+# ============================
+# CONFIGURACIÓN
+# ============================
+def configurar(cursor, id_curso, ciclo, capacidad):
+    """Define la capacidad (None la quita); ocupados arranca con las matrículas existentes"""
+    if capacidad is None:
+        cursor.execute("DELETE FROM cupos_cursos WHERE id_curso = %s AND ciclo = %s", (id_curso, ciclo))
+        return
+
+    cursor.execute("SELECT 1 FROM cupos_cursos WHERE id_curso = %s AND ciclo = %s", (id_curso, ciclo))
+    if cursor.fetchone() is None:
+        try:
+            cursor.execute("""
+                INSERT INTO cupos_cursos (id_curso, ciclo, capacidad, ocupados)
+                SELECT %s, %s, %s, COUNT(*) FROM matriculas WHERE id_curso = %s AND ciclo = %s
+            """, (id_curso, ciclo, capacidad, id_curso, ciclo))
+            return
+        except ErrorIntegridad:
+            pass    # Otra request la creó: se actualiza la capacidad abajo
+    cursor.execute("UPDATE cupos_cursos SET capacidad = %s WHERE id_curso = %s AND ciclo = %s",
+                   (capacidad, id_curso, ciclo))
+
+
+def listar(cursor, ciclo=None, id_curso=None):
+    condiciones, params = [], []
+    if ciclo is not None:
+        condiciones.append("ciclo = %s")
+        params.append(ciclo)
+    if id_curso is not None:
+        condiciones.append("id_curso = %s")
+        params.append(id_curso)
+    donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    cursor.execute(f"""
+        SELECT id_curso, ciclo, capacidad, ocupados,
+               CASE WHEN capacidad > ocupados THEN capacidad - ocupados ELSE 0 END AS libres
+        FROM cupos_cursos {donde}
+        ORDER BY ciclo, id_curso
+    """, tuple(params))
+    return cursor.fetchall()
@@ -1,78 +1,378 @@
+import atexit
+import time
 from flask import Blueprint, request, jsonify
-from db import get_connection
-from utils.logger import registrar_log, iniciar_medicion, finalizar_medicion
+from config import COLA_MATRICULA_CONFIG
+from db import get_connection, ErrorIntegridad, BLOQUEO_LECTURA
+from utils.logger import registrar_log
+from utils.condicional import sin_condicional, versionar
+from utils.paginacion import Paginacion, ConsultaPaginada, ErrorPaginacion
+from utils.streaming import leer_formato, respuesta_stream, FormatoInvalido
+from routes.reportes.resumen_ciclos import CambiosResumen, leer_resumen, reconstruir_ciclo
+from routes.reportes.historial import historial_alumno, invalidar_historiales
+from routes.evaluaciones.evaluaciones_routes import cache_pendientes
+from routes.matriculas import cupos
+from routes.matriculas.cola import ColaMatriculas, ColaLlena
+from routes.alumnos.alumnos_routes import PAGINACION_ALUMNOS
+from routes.cursos.cursos_routes import PAGINACION_CURSOS
 
 matriculas_bp = Blueprint("matriculas_bp", __name__, url_prefix="/api/matriculas")
 
+PAGINACION_MATRICULAS = Paginacion(
+    campos={
+        "id": "m.id", "id_alumno": "m.id_alumno", "id_curso": "m.id_curso",
+        "ciclo": "m.ciclo", "estado": "m.estado",
+        "alumno": "CONCAT(a.nombre, ' ', a.apellido)", "curso": "c.nombre",
+        "fecha_matricula": "m.fecha_matricula"
+    },
+    orden=[("m.fecha_matricula", "DESC"), ("m.id", "DESC")],
+    por_defecto=["id", "id_alumno", "id_curso", "ciclo", "estado", "alumno", "curso"]
+)
+DESDE_MATRICULAS = """matriculas m
+    JOIN alumnos a ON m.id_alumno = a.id
+    JOIN cursos c ON m.id_curso = c.id"""
+
+# Inicio de la página de matrícula: solo lo que usan los combos
+LIMITE_INICIO = 50
+CAMPOS_ALUMNOS_COMBO = ["id", "nombre", "apellido", "dni"]
+CAMPOS_CURSOS_COMBO = ["id", "codigo", "nombre", "ciclo"]
+
 # ============================
 # SERVICIOS (Lógica)
 # ============================
 def servicio_rendimiento_alumno(alumno_id, filtro="TODOS"):
+    # Historial precalculado por alumno (se recalcula solo si cambiaron sus datos)
+    return historial_alumno(alumno_id, filtro)
+
+def servicio_reporte_alumnos_ciclo():
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        ciclos_filtrar = []
-        params = [alumno_id]
-        
-        if filtro != "TODOS":
-            limit = 1 if filtro == "ULTIMO" else 3
-            cursor.execute("SELECT DISTINCT ciclo FROM matriculas WHERE id_alumno=%s ORDER BY ciclo DESC LIMIT %s", (alumno_id, limit))
-            ciclos_filtrar = [r['ciclo'] for r in cursor.fetchall()]
-            if not ciclos_filtrar: return {}
-
-        query = """
-            SELECT m.ciclo, c.codigo, c.nombre as curso, c.creditos, e.nota,
-                   CASE WHEN e.nota IS NULL THEN 'SIN NOTA' WHEN e.aprobado=1 THEN 'APROBADO' ELSE 'DESAPROBADO' END as estado_curso,
-                   e.fecha_evaluacion
-            FROM matriculas m
-            JOIN cursos c ON m.id_curso = c.id
-            LEFT JOIN evaluaciones e ON m.id = e.id_matricula
-            WHERE m.id_alumno = %s
-        """
-        if ciclos_filtrar:
-            placeholders = ','.join(['%s']*len(ciclos_filtrar))
-            query += f" AND m.ciclo IN ({placeholders})"
-            params.extend(ciclos_filtrar)
-        
-        query += " ORDER BY m.ciclo DESC, c.codigo ASC"
-        cursor.execute(query, tuple(params))
-        
-        data = cursor.fetchall()
-        agrupado = {}
-        for row in data:
-            c = row['ciclo']
-            if c not in agrupado: agrupado[c] = []
-            agrupado[c].append(row)
-        return agrupado
+        # Tabla resumen mantenida por las escrituras: una fila por ciclo
+        return leer_resumen(cursor)
     finally:
         if conn: conn.close()
 
-def servicio_reporte_alumnos_ciclo():
+MAX_CURSOS_POR_CICLO = 6
+TAMANO_BLOQUE_IN = 1000
+
+
+def _en_bloques(valores, tamano=TAMANO_BLOQUE_IN):
+    valores = list(valores)
+    for i in range(0, len(valores), tamano):
+        yield valores[i:i + tamano]
+
+
+def _ids_existentes(cursor, tabla, ids):
+    """Ids activos de alumnos/cursos, consultados por bloques con IN (...)"""
+    encontrados = set()
+    for bloque in _en_bloques(ids):
+        placeholders = ','.join(['%s'] * len(bloque))
+        cursor.execute(f"SELECT id FROM {tabla} WHERE activo = 1 AND id IN ({placeholders})", tuple(bloque))
+        encontrados.update(r[0] for r in cursor.fetchall())
+    return encontrados
+
+
+def _bloquear_alumnos(cursor, ids):
+    """
+    Bloquea hasta el commit las filas de los alumnos, por id ascendente: dos
+    lotes del mismo alumno cuentan sus matrículas del ciclo uno detrás del otro.
+    """
+    for bloque in _en_bloques(sorted(ids)):
+        placeholders = ','.join(['%s'] * len(bloque))
+        # SQLite no tiene FOR UPDATE: el UPDATE sin cambios toma el bloqueo de escritura
+        cursor.execute(f"UPDATE alumnos SET activo = activo WHERE id IN ({placeholders})", tuple(bloque))
+
+
+class SinConexion(Exception):
+    pass
+
+
+def servicio_matricula_lote(solicitudes):
+    """
+    Matricula muchas tuplas (id_alumno, id_curso, ciclo) en una sola transacción.
+    Alumnos/cursos válidos, duplicados y el límite de cursos por ciclo se
+    resuelven con unas pocas consultas por conjunto (no una por fila) y las
+    filas aceptadas se insertan con executemany. Devuelve el resultado por fila.
+    """
+    resultados = []
+    validas = []
+    for indice, s in enumerate(solicitudes):
+        try:
+            tupla = (int(s["id_alumno"]), int(s["id_curso"]), int(s["ciclo"]))
+        except (KeyError, TypeError, ValueError):
+            resultados.append({"indice": indice, "estado": "INVALIDA",
+                               "mensaje": "Se requiere id_alumno, id_curso y ciclo numéricos"})
+            continue
+        resultados.append({"indice": indice, "id_alumno": tupla[0], "id_curso": tupla[1], "ciclo": tupla[2]})
+        validas.append((indice, tupla))
+
+    if not validas:
+        return resultados
+
+    conn = get_connection()
+    if conn is None:
+        raise SinConexion("Error al conectar BD")
+    try:
+        cursor = conn.cursor()
+        alumnos = _ids_existentes(cursor, "alumnos", {t[0] for _, t in validas})
+        cursos = _ids_existentes(cursor, "cursos", {t[1] for _, t in validas})
+
+        # Orden de bloqueo: cupos, luego alumnos, luego matrículas y resumen
+        # (el alta individual toma el del alumno al insertar, por la FK)
+        libres = cupos.bloquear_libres(cursor, {(t[1], t[2]) for _, t in validas if t[1] in cursos})
+        _bloquear_alumnos(cursor, alumnos)
+
+        # Matrículas ya registradas de esos alumnos en esos ciclos; con el
+        # alumno bloqueado, otro lote no puede sumarle cursos hasta el commit
+        existentes = set()
+        ciclos = sorted({t[2] for _, t in validas})
+        placeholders_ciclos = ','.join(['%s'] * len(ciclos))
+        for bloque in _en_bloques(alumnos):
+            placeholders = ','.join(['%s'] * len(bloque))
+            cursor.execute(f"""
+                SELECT id_alumno, id_curso, ciclo FROM matriculas
+                WHERE id_alumno IN ({placeholders}) AND ciclo IN ({placeholders_ciclos}){BLOQUEO_LECTURA}
+            """, tuple(bloque) + tuple(ciclos))
+            existentes.update(tuple(r) for r in cursor.fetchall())
+
+        ocupados = {}
+        for id_alumno, _, ciclo in existentes:
+            ocupados[(id_alumno, ciclo)] = ocupados.get((id_alumno, ciclo), 0) + 1
+
+        aceptadas = []
+        for indice, (id_alumno, id_curso, ciclo) in validas:
+            resultado = resultados[indice]
+            if id_alumno not in alumnos:
+                resultado.update(estado="ALUMNO_NO_EXISTE", mensaje="Alumno no encontrado o inactivo")
+            elif id_curso not in cursos:
+                resultado.update(estado="CURSO_NO_EXISTE", mensaje="Curso no encontrado o inactivo")
+            elif (id_alumno, id_curso, ciclo) in existentes:
+                resultado.update(estado="DUPLICADA", mensaje="El alumno ya está en este curso")
+            elif ocupados.get((id_alumno, ciclo), 0) >= MAX_CURSOS_POR_CICLO:
+                resultado.update(estado="LIMITE_CICLO",
+                                 mensaje=f"Máximo {MAX_CURSOS_POR_CICLO} cursos por ciclo")
+            elif libres.get((id_curso, ciclo), 1) <= 0:
+                resultado.update(estado="SIN_CUPO", mensaje="Curso sin cupos disponibles")
+            else:
+                if (id_curso, ciclo) in libres:
+                    libres[(id_curso, ciclo)] -= 1
+                existentes.add((id_alumno, id_curso, ciclo))
+                ocupados[(id_alumno, ciclo)] = ocupados.get((id_alumno, ciclo), 0) + 1
+                aceptadas.append((id_alumno, id_curso, ciclo))
+                resultado.update(estado="CREADA")
+
+        if aceptadas:
+            cursor.executemany(
+                "INSERT INTO matriculas(id_alumno, id_curso, ciclo, estado) VALUES (%s,%s,%s,'MATRICULADO')",
+                aceptadas)
+            por_cupo = {}
+            for _, id_curso, ciclo in aceptadas:
+                if (id_curso, ciclo) in libres:
+                    por_cupo[(id_curso, ciclo)] = por_cupo.get((id_curso, ciclo), 0) + 1
+            for (id_curso, ciclo), cantidad in sorted(por_cupo.items()):
+                cupos.reservar(cursor, id_curso, ciclo, cantidad)    # Filas ya bloqueadas: alcanza
+            cambios = CambiosResumen()
+            for id_alumno, _, ciclo in aceptadas:
+                cambios.agregar(ciclo, id_alumno)
+            cambios.aplicar(cursor)
+            versionar(cursor, matriculas_bp.name)
+        conn.commit()
+        cache_pendientes.limpiar()
+        return resultados
+    finally:
+        if conn: conn.close()
+
+
+# ============================
+# ARRASTRE DE CURSOS DESAPROBADOS
+# ============================
+MAX_DETALLE_ARRASTRE = 100
+
+# Cursos desaprobados en el ciclo de cierre que el alumno aún no tiene en el
+# ciclo siguiente, numerados por alumno (primero los de ciclos anteriores del
+# plan) y sumando las matrículas que ya tiene allí: posicion > 6 no entra.
+PLAN_ARRASTRE = """
+    SELECT p.id_alumno, p.id_curso, p.codigo, p.orden + COALESCE(o.ocupados, 0) AS posicion
+    FROM (
+        SELECT m.id_alumno, m.id_curso, c.codigo,
+               ROW_NUMBER() OVER (PARTITION BY m.id_alumno ORDER BY c.ciclo, c.codigo) AS orden
+        FROM matriculas m
+        JOIN evaluaciones e ON e.id_matricula = m.id AND e.aprobado = 0
+        JOIN cursos c ON c.id = m.id_curso AND c.activo = 1
+        JOIN alumnos a ON a.id = m.id_alumno AND a.activo = 1
+        WHERE m.ciclo = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM matriculas d
+              WHERE d.id_alumno = m.id_alumno AND d.id_curso = m.id_curso AND d.ciclo = %s
+          )
+    ) p
+    LEFT JOIN (
+        SELECT id_alumno, COUNT(*) AS ocupados FROM matriculas WHERE ciclo = %s GROUP BY id_alumno
+    ) o ON o.id_alumno = p.id_alumno
+"""
+
+
+def servicio_arrastre(ciclo, dry_run=True):
+    """
+    Lleva al ciclo siguiente los cursos desaprobados en `ciclo`, con un
+    INSERT ... SELECT en una sola transacción (respeta el máximo de cursos
+    por ciclo y no duplica matrículas). Con dry_run solo informa el plan.
+    """
+    destino = ciclo + 1
+    params = (ciclo, destino, destino)
+    tiempos = {}
+    inicio = time.perf_counter()
+
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT m.ciclo, COUNT(DISTINCT m.id_alumno) as total_alumnos, COUNT(m.id) as total_matriculas FROM matriculas m GROUP BY m.ciclo ORDER BY m.ciclo")
-        return cursor.fetchall()
+        cursor.execute(f"SELECT * FROM ({PLAN_ARRASTRE}) plan ORDER BY id_alumno, posicion", params)
+        plan = cursor.fetchall()
+        # Desaprobadas que no entran al plan: ya están en el destino o su alumno/curso está inactivo
+        cursor.execute("""
+            SELECT COUNT(*) AS total,
+                   SUM(CASE WHEN d.ya = 1 THEN 1 ELSE 0 END) AS ya_matriculadas,
+                   SUM(CASE WHEN d.ya = 0 AND (a.activo = 0 OR c.activo = 0) THEN 1 ELSE 0 END) AS inactivas
+            FROM (
+                SELECT m.id_alumno, m.id_curso,
+                       CASE WHEN EXISTS (
+                           SELECT 1 FROM matriculas x
+                           WHERE x.id_alumno = m.id_alumno AND x.id_curso = m.id_curso AND x.ciclo = %s
+                       ) THEN 1 ELSE 0 END AS ya
+                FROM matriculas m
+                JOIN evaluaciones e ON e.id_matricula = m.id AND e.aprobado = 0
+                WHERE m.ciclo = %s
+            ) d
+            JOIN alumnos a ON a.id = d.id_alumno
+            JOIN cursos c ON c.id = d.id_curso
+        """, (destino, ciclo))
+        conteo = cursor.fetchone()
+        desaprobadas = conteo["total"]
+        tiempos["planificar_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+
+        generar = [f for f in plan if f["posicion"] <= MAX_CURSOS_POR_CICLO]
+        excedidas = [f for f in plan if f["posicion"] > MAX_CURSOS_POR_CICLO]
+        reporte = {
+            "ciclo_cierre": ciclo,
+            "ciclo_destino": destino,
+            "dry_run": dry_run,
+            "desaprobadas": desaprobadas,
+            "ya_matriculadas": int(conteo["ya_matriculadas"] or 0),
+            "excluidas_inactivos": int(conteo["inactivas"] or 0),
+            "omitidas_limite": len(excedidas),
+            "alumnos": len({f["id_alumno"] for f in generar}),
+            "generadas": len(generar),
+        }
+
+        if not dry_run and generar:
+            paso = time.perf_counter()
+            # Cupos del destino bloqueados antes de insertar, en el mismo orden que el lote
+            cupos.bloquear_ciclo(conn.cursor(), destino)
+            cursor.execute(f"""
+                INSERT INTO matriculas(id_alumno, id_curso, ciclo, estado)
+                SELECT id_alumno, id_curso, %s, 'MATRICULADO' FROM ({PLAN_ARRASTRE}) plan
+                WHERE posicion <= %s
+            """, (destino, *params, MAX_CURSOS_POR_CICLO))
+            reporte["generadas"] = cursor.rowcount
+            tiempos["insertar_ms"] = round((time.perf_counter() - paso) * 1000, 2)
+
+            paso = time.perf_counter()
+            cupos.recontar(cursor, destino)     # El arrastre no se limita por cupos, pero los ocupa
+            invalidar_historiales(cursor, [f["id_alumno"] for f in generar])
+            reconstruir_ciclo(cursor, destino)
+            tiempos["resumen_ms"] = round((time.perf_counter() - paso) * 1000, 2)
+            versionar(cursor, matriculas_bp.name)
+            conn.commit()
+            cache_pendientes.limpiar()
+
+        tiempos["total_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+        reporte["tiempos"] = tiempos
+        reporte["detalle"] = [
+            {"id_alumno": f["id_alumno"], "id_curso": f["id_curso"], "codigo": f["codigo"],
+             "estado": "GENERADA" if f["posicion"] <= MAX_CURSOS_POR_CICLO else "LIMITE_CICLO"}
+            for f in plan[:MAX_DETALLE_ARRASTRE]
+        ]
+        return reporte
     finally:
         if conn: conn.close()
 
+
 # ============================
 # RUTAS CRUD
 # ============================
+def filtro_matriculas(ciclo=None):
+    """(donde, params) del listado; ?ciclo= limita a un ciclo"""
+    if ciclo is None:
+        return None, ()
+    return "m.ciclo = %s", (ciclo,)
+
+
 @matriculas_bp.route("", methods=["GET"])
 def listar_matriculas():
+    try:
+        formato = leer_formato()
+        consulta = PAGINACION_MATRICULAS.leer(stream=formato is not None)
+    except (ErrorPaginacion, FormatoInvalido) as e:
+        return jsonify({"error": str(e)}), 400
+    donde, params = filtro_matriculas(request.args.get("ciclo", type=int))
+
+    if formato:
+        return respuesta_stream(*consulta.sql(DESDE_MATRICULAS, donde, params), formato, consulta.proyectar)
+
     conn = get_connection()
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT m.id, m.id_alumno, m.id_curso, m.ciclo, m.estado,
-                   CONCAT(a.nombre, ' ', a.apellido) as alumno, c.nombre as curso
-            FROM matriculas m
-            JOIN alumnos a ON m.id_alumno = a.id
-            JOIN cursos c ON m.id_curso = c.id
-            ORDER BY m.fecha_matricula DESC
-        """)
-        return jsonify(cursor.fetchall()), 200
+        cursor.execute(*consulta.sql(DESDE_MATRICULAS, donde, params))
+        return jsonify(consulta.resultado(cursor.fetchall())), 200
+    finally:
+        if conn: conn.close()
+
+# ============================
+# INICIO DE PÁGINA (combos + primera página en una request)
+# ============================
+def alumnos_combo(cursor):
+    """Alumnos activos con lo justo para un <select> (mismo orden que /api/alumnos)"""
+    consulta = ConsultaPaginada(PAGINACION_ALUMNOS, None, None, CAMPOS_ALUMNOS_COMBO)
+    cursor.execute(*consulta.sql("alumnos", "activo = 1"))
+    return consulta.resultado(cursor.fetchall())
+
+
+def cursos_por_ciclo(cursor):
+    """{ciclo: [cursos activos del ciclo]} (el listado ya viene ordenado por ciclo y código)"""
+    consulta = ConsultaPaginada(PAGINACION_CURSOS, None, None, CAMPOS_CURSOS_COMBO)
+    cursor.execute(*consulta.sql("cursos", "activo = 1"))
+    agrupados = {}
+    for curso in consulta.resultado(cursor.fetchall()):
+        ciclo = curso.pop("ciclo")
+        agrupados.setdefault(ciclo, []).append(curso)
+    return agrupados
+
+
+@matriculas_bp.route("/inicio", methods=["GET"])
+def inicio_matriculas():
+    """
+    Todo lo que carga la página de matrícula con una sola conexión: alumnos
+    activos, cursos activos por ciclo y la primera página del listado
+    (admite limit/fields/ciclo como GET /api/matriculas; el cursor
+    'siguiente' sirve para continuar con GET /api/matriculas).
+    """
+    try:
+        consulta = PAGINACION_MATRICULAS.leer()
+    except ErrorPaginacion as e:
+        return jsonify({"error": str(e)}), 400
+    if consulta.limite is None:
+        consulta.limite = LIMITE_INICIO
+    donde, params = filtro_matriculas(request.args.get("ciclo", type=int))
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        # Una transacción de lectura: las tres partes ven los mismos datos
+        respuesta = {"alumnos": alumnos_combo(cursor), "cursos": cursos_por_ciclo(cursor)}
+        cursor.execute(*consulta.sql(DESDE_MATRICULAS, donde, params))
+        respuesta["matriculas"] = consulta.resultado(cursor.fetchall())
+        conn.commit()
+        return jsonify(respuesta), 200
     finally:
         if conn: conn.close()
 
@@ -93,40 +393,228 @@ def crear_matricula():
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        # Validar duplicado exacto
-        cursor.execute("SELECT id FROM matriculas WHERE id_alumno=%s AND id_curso=%s AND ciclo=%s", 
-                      (data['id_alumno'], data['id_curso'], data['ciclo']))
-        if cursor.fetchone(): return jsonify({"error": "El alumno ya está en este curso"}), 400
-        
-        cursor.execute("INSERT INTO matriculas(id_alumno, id_curso, ciclo, estado) VALUES (%s,%s,%s,'MATRICULADO')",
-                       (data['id_alumno'], data['id_curso'], data['ciclo']))
+        # Rechazo inmediato, sin tomar bloqueos, si el curso ya no tiene cupos
+        if not cupos.hay_cupo(cursor, data['id_curso'], data['ciclo']):
+            return jsonify({"error": "Curso sin cupos disponibles"}), 409
+
+        # Mismo orden de bloqueo que el lote: primero el cupo, después la matrícula y el resumen
+        if not cupos.reservar(cursor, data['id_curso'], data['ciclo']):
+            conn.rollback()
+            return jsonify({"error": "Curso sin cupos disponibles"}), 409
+
+        # El UNIQUE (id_alumno, id_curso, ciclo) resuelve el duplicado aun entre requests simultáneas
+        try:
+            cursor.execute("INSERT INTO matriculas(id_alumno, id_curso, ciclo, estado) VALUES (%s,%s,%s,'MATRICULADO')",
+                           (data['id_alumno'], data['id_curso'], data['ciclo']))
+        except ErrorIntegridad:
+            conn.rollback()     # Devuelve también el cupo reservado
+            cursor.execute("SELECT id FROM matriculas WHERE id_alumno=%s AND id_curso=%s AND ciclo=%s",
+                           (data['id_alumno'], data['id_curso'], data['ciclo']))
+            if cursor.fetchone():
+                return jsonify({"error": "El alumno ya está en este curso"}), 400
+            raise
+        cambios = CambiosResumen()
+        cambios.agregar(int(data['ciclo']), int(data['id_alumno']))
+        cambios.aplicar(cursor)
+        versionar(cursor, matriculas_bp.name)
         conn.commit()
+        cache_pendientes.limpiar()
         return jsonify({"mensaje": "Matrícula creada"}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
         if conn: conn.close()
 
+@matriculas_bp.route("/lote", methods=["POST"])
+def crear_matriculas_lote():
+    """Body: {"matriculas": [{"id_alumno", "id_curso", "ciclo"}, ...]} (o la lista directamente)"""
+    data = request.get_json(silent=True)
+    solicitudes = data.get("matriculas") if isinstance(data, dict) else data
+    if not isinstance(solicitudes, list) or not solicitudes:
+        return jsonify({"error": "Se requiere una lista de matrículas"}), 400
+
+    return _responder_lote(solicitudes)
+
+
+# Matrícula encolada: se procesa por lotes con servicio_matricula_lote (que sube la versión)
+cola_matriculas = ColaMatriculas(servicio_matricula_lote, **COLA_MATRICULA_CONFIG)
+atexit.register(cola_matriculas.cerrar)
+
+
+@matriculas_bp.route("/cola", methods=["POST"])
+def encolar_matricula():
+    """Body: {"id_alumno", "id_curso", "ciclo"} -> 202 con el ticket a consultar"""
+    data = request.get_json(silent=True) or {}
+    try:
+        solicitud = {c: int(data[c]) for c in ("id_alumno", "id_curso", "ciclo")}
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Se requiere id_alumno, id_curso y ciclo numéricos"}), 400
+
+    try:
+        ticket = cola_matriculas.encolar(solicitud)
+    except ColaLlena as e:
+        registrar_log("matriculas", "WARN", f"Cola de matrícula llena, reintentar en {e.retry_after} s")
+        response = jsonify({"error": "Demasiadas solicitudes de matrícula, reintente luego",
+                            "retry_after": e.retry_after})
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 429
+
+    response = jsonify({"ticket": ticket, "estado": "EN_COLA", "en_cola": cola_matriculas.profundidad()})
+    response.headers["Location"] = f"{matriculas_bp.url_prefix}/cola/{ticket}"
+    return response, 202
+
+
+@matriculas_bp.route("/cola/<ticket>", methods=["GET"])
+@sin_condicional
+def estado_ticket(ticket):
+    """EN_COLA, PROCESANDO, COMPLETADO (con el resultado de servicio_matricula_lote) o ERROR"""
+    estado = cola_matriculas.consultar(ticket)
+    if estado is None:
+        return jsonify({"error": "Ticket no encontrado o vencido"}), 404
+    return jsonify(estado), 200
+
+
+@matriculas_bp.route("/flexible", methods=["POST"])
+def crear_matricula_flexible():
+    """Body: {"id_alumno", "ciclo", "cursos": [id_curso, ...]} (hasta 6 cursos)"""
+    data = request.get_json(silent=True) or {}
+    cursos = data.get("cursos")
+    if not isinstance(cursos, list) or not cursos:
+        return jsonify({"error": "Se requiere la lista de cursos"}), 400
+    if len(cursos) > MAX_CURSOS_POR_CICLO:
+        return jsonify({"error": f"Máximo {MAX_CURSOS_POR_CICLO} cursos por ciclo"}), 400
+
+    solicitudes = [{"id_alumno": data.get("id_alumno"), "id_curso": c, "ciclo": data.get("ciclo")}
+                   for c in cursos]
+    return _responder_lote(solicitudes)
+
+
+def _responder_lote(solicitudes):
+    try:
+        resultados = servicio_matricula_lote(solicitudes)
+    except SinConexion as e:
+        registrar_log("matriculas", "ERROR", f"Matrícula por lote sin conexión: {e}")
+        return jsonify({"error": str(e)}), 503
+    except ErrorIntegridad as e:
+        # Otra request insertó alguna de las mismas matrículas en paralelo
+        registrar_log("matriculas", "WARN", f"Conflicto en matrícula por lote: {e}")
+        return jsonify({"error": "Conflicto con otra matrícula en curso, reintente"}), 409
+    except Exception as e:
+        registrar_log("matriculas", "ERROR", f"Error en matrícula por lote: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    creadas = sum(1 for r in resultados if r["estado"] == "CREADA")
+    registrar_log("matriculas", "INFO",
+                  f"Matrícula por lote: {creadas} creadas de {len(resultados)} solicitadas")
+    return jsonify({
+        "creadas": creadas,
+        "rechazadas": len(resultados) - creadas,
+        "resultados": resultados
+    }), 201 if creadas else 200
+
+
+@matriculas_bp.route("/arrastre", methods=["POST"])
+def arrastre():
+    """Body: {"ciclo": N, "dry_run": true|false} (dry_run por defecto: true)"""
+    data = request.get_json(silent=True) or {}
+    ciclo = data.get("ciclo")
+    if not isinstance(ciclo, int) or ciclo < 1:
+        return jsonify({"error": "Se requiere el ciclo de cierre (entero positivo)"}), 400
+    dry_run = data.get("dry_run", True) is not False
+
+    try:
+        reporte = servicio_arrastre(ciclo, dry_run)
+    except ErrorIntegridad as e:
+        registrar_log("matriculas", "WARN", f"Conflicto en arrastre del ciclo {ciclo}: {e}")
+        return jsonify({"error": "Conflicto con otra matrícula en curso, reintente"}), 409
+    except Exception as e:
+        registrar_log("matriculas", "ERROR", f"Error en arrastre del ciclo {ciclo}: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    registrar_log("matriculas", "INFO",
+                  f"Arrastre ciclo {ciclo} -> {ciclo + 1} ({'simulación' if dry_run else 'aplicado'}): "
+                  f"{reporte['generadas']} matrículas, {reporte['omitidas_limite']} omitidas por límite, "
+                  f"{reporte['tiempos']['total_ms']} ms")
+    return jsonify(reporte), 201 if reporte["generadas"] and not dry_run else 200
+
+
+@matriculas_bp.route("/cupos", methods=["GET"])
+def listar_cupos():
+    """Capacidad, ocupados y libres por curso y ciclo; ?ciclo=&curso=<id> filtran"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        return jsonify(cupos.listar(cursor, request.args.get("ciclo", type=int),
+                                    request.args.get("curso", type=int)))
+    finally:
+        if conn: conn.close()
+
+
+@matriculas_bp.route("/cupos", methods=["PUT"])
+def configurar_cupos():
+    """Body: {"id_curso", "ciclo", "capacidad"} (capacidad null quita el límite)"""
+    data = request.get_json(silent=True) or {}
+    id_curso, ciclo, capacidad = data.get("id_curso"), data.get("ciclo"), data.get("capacidad")
+    if not isinstance(id_curso, int) or not isinstance(ciclo, int):
+        return jsonify({"error": "Se requieren id_curso y ciclo enteros"}), 400
+    if capacidad is not None and (not isinstance(capacidad, int) or capacidad < 0):
+        return jsonify({"error": "La capacidad debe ser un entero no negativo (o null)"}), 400
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cupos.configurar(cursor, id_curso, ciclo, capacidad)
+        versionar(cursor, matriculas_bp.name)
+        conn.commit()
+        registrar_log("matriculas", "INFO", f"Cupos del curso {id_curso} en ciclo {ciclo}: {capacidad}")
+        return jsonify({"mensaje": "Cupos actualizados"}), 200
+    except Exception as e:
+        registrar_log("matriculas", "ERROR", f"Error al configurar cupos: {e}")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn: conn.close()
+
+
 @matriculas_bp.route("/<int:id>", methods=["PUT"])
 def actualizar_matricula(id):
     data = request.get_json()
     conn = get_connection()
     try:
         cursor = conn.cursor()
+        cursor.execute("""
+            SELECT m.id_alumno, m.ciclo, e.nota, m.id_curso FROM matriculas m
+            LEFT JOIN evaluaciones e ON e.id_matricula = m.id
+            WHERE m.id=%s
+        """, (id,))
+        anterior = cursor.fetchone()
+        if not anterior:
+            return jsonify({"error": "No encontrado"}), 404
+
+        id_alumno, ciclo_anterior, nota, curso_anterior = anterior
+        nuevo = (int(data['id_curso']), int(data['ciclo']))
+        if (curso_anterior, ciclo_anterior) != nuevo:
+            # Los dos cupos en orden de clave, como bloquear_libres, y antes que la matrícula
+            for clave in sorted([(curso_anterior, ciclo_anterior), nuevo]):
+                if clave != nuevo:
+                    cupos.liberar(cursor, *clave)
+                elif not cupos.reservar(cursor, *clave):
+                    conn.rollback()
+                    return jsonify({"error": "Curso sin cupos disponibles"}), 409
+
         # Permitimos actualizar Curso y Ciclo (Si hubo error al matricular)
         cursor.execute("""
             UPDATE matriculas 
             SET id_curso=%s, ciclo=%s
             WHERE id=%s
         """, (data['id_curso'], data['ciclo'], id))
-        
-        if cursor.rowcount == 0:
-            # A veces rowcount es 0 si los datos son iguales, pero verificamos existencia
-            cursor.execute("SELECT id FROM matriculas WHERE id=%s", (id,))
-            if not cursor.fetchone():
-                return jsonify({"error": "No encontrado"}), 404
 
+        cambios = CambiosResumen()
+        cambios.quitar(ciclo_anterior, id_alumno, nota)
+        cambios.agregar(int(data['ciclo']), id_alumno, nota)
+        cambios.aplicar(cursor)
+        versionar(cursor, matriculas_bp.name)
         conn.commit()
+        cache_pendientes.limpiar()
         return jsonify({"mensaje": "Actualizado correctamente"}), 200
     except Exception as e:
         registrar_log("matriculas", "ERROR", str(e))
@@ -139,8 +627,25 @@ def eliminar_matricula(id):
     conn = get_connection()
     try:
         cursor = conn.cursor()
+        cursor.execute("""
+            SELECT m.id_alumno, m.ciclo, e.nota, m.id_curso FROM matriculas m
+            LEFT JOIN evaluaciones e ON e.id_matricula = m.id
+            WHERE m.id=%s
+        """, (id,))
+        anterior = cursor.fetchone()
+        if anterior:
+            cupos.liberar(cursor, anterior[3], anterior[1])     # El cupo antes que la matrícula
         cursor.execute("DELETE FROM matriculas WHERE id=%s", (id,))
+        if anterior and not cursor.rowcount:
+            conn.rollback()     # Otra request la borró entre la lectura y el DELETE
+            anterior = None
+        if anterior:
+            cambios = CambiosResumen()
+            cambios.quitar(anterior[1], anterior[0], anterior[2])
+            cambios.aplicar(cursor)
+            versionar(cursor, matriculas_bp.name)
         conn.commit()
+        cache_pendientes.limpiar()
         return jsonify({"mensaje": "Eliminado"}), 200
     finally:
         if conn: conn.close()
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Analítica académica de todo el alumnado en una sola pasada (NumPy).
+
+Se extraen una vez las columnas (id_alumno, ciclo, creditos, nota) de
+matriculas + cursos + evaluaciones, por lotes de fetchmany y columna por
+columna (np.fromiter), sin armar la lista de todas las filas; todo lo
+demás son operaciones sobre arreglos: promedio ponderado por créditos, créditos aprobados y rankings
+(global y por ciclo). Los ids se usan directamente como índice de
+np.bincount, así que el cálculo es lineal en la cantidad de matrículas.
+"""
+import math
+import time
+
+import numpy as np
+
+from db import get_connection
+
+APROBATORIA = 10.5
+DECIMALES = 2
+TAMANO_LOTE = 10000     # Filas por fetchmany en la extracción
+
+
+# ============================
+# EXTRACCIÓN COLUMNAR
+# ============================
+SQL_EXTRAER = """
+    SELECT m.id_alumno, m.ciclo, c.creditos, e.nota
+    FROM matriculas m
+    JOIN cursos c ON m.id_curso = c.id
+    LEFT JOIN evaluaciones e ON e.id_matricula = m.id
+"""
+
+
+def extraer(cursor, tamano_lote=TAMANO_LOTE):
+    """Arreglos paralelos por matrícula; nota = NaN si aún no tiene evaluación"""
+    cursor.execute(SQL_EXTRAER)
+    partes = {"id_alumno": [], "ciclo": [], "creditos": [], "nota": []}
+    while True:
+        filas = cursor.fetchmany(tamano_lote)
+        if not filas:
+            break
+        n = len(filas)
+        # Cada columna directo a su arreglo, sin pasar por una matriz de filas
+        partes["id_alumno"].append(np.fromiter((f[0] for f in filas), np.int64, n))
+        partes["ciclo"].append(np.fromiter((f[1] for f in filas), np.int64, n))
+        partes["creditos"].append(np.fromiter((f[2] for f in filas), np.float64, n))
+        partes["nota"].append(np.fromiter((np.nan if f[3] is None else f[3] for f in filas), np.float64, n))
+    tipos = {"id_alumno": np.int64, "ciclo": np.int64, "creditos": np.float64, "nota": np.float64}
+    return {nombre: np.concatenate(lotes) if lotes else np.empty(0, dtype=tipos[nombre])
+            for nombre, lotes in partes.items()}
+
+
+# ============================
+# CÁLCULO VECTORIZADO
+# ============================
+ESCALA = 10 ** DECIMALES
+NIVELES = 20 * ESCALA + 1      # Promedios posibles (0.00 .. 20.00) en centésimas
+
+
+def _ranking(grupos, valores):
+    """
+    Ranking de competencia (1, 2, 2, 4) de valores descendentes dentro de
+    cada grupo, sin ordenar: los promedios van en centésimas, así que basta
+    un histograma por grupo y su suma acumulada desde la nota más alta.
+    NaN queda fuera del ranking (0).
+    """
+    rank = np.zeros(len(valores), dtype=np.int64)
+    validos = ~np.isnan(valores)
+    if not validos.any():
+        return rank
+
+    g = grupos[validos]
+    puntaje = np.clip(np.rint(valores[validos] * ESCALA).astype(np.int64), 0, NIVELES - 1)
+    n_grupos = int(g.max()) + 1
+    hist = np.bincount(g * NIVELES + puntaje, minlength=n_grupos * NIVELES).reshape(n_grupos, NIVELES)
+    # Cuántos del grupo tienen un puntaje estrictamente mayor
+    mayores = np.cumsum(hist[:, ::-1], axis=1)[:, ::-1] - hist
+    rank[validos] = mayores[g, puntaje] + 1
+    return rank
+
+
+def _promedio(suma, pesos):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.round(np.where(pesos > 0, suma / pesos, np.nan), DECIMALES)
+
+
+def calcular(columnas):
+    """Indicadores por (alumno, ciclo) y por alumno como arreglos"""
+    ids, ciclos = columnas["id_alumno"], columnas["ciclo"]
+    creditos, notas = columnas["creditos"], columnas["nota"]
+
+    evaluada = ~np.isnan(notas)
+    aprobada = notas >= APROBATORIA        # NaN compara como False
+    ponderada = np.where(evaluada, notas * creditos, 0.0)
+    creditos_evaluados = np.where(evaluada, creditos, 0.0)
+    creditos_aprobados = np.where(aprobada, creditos, 0.0)
+
+    # ---- Por (alumno, ciclo): clave = id_alumno * ancho + ciclo (una pasada sobre las matrículas)
+    ancho = int(ciclos.max()) + 1 if len(ciclos) else 1
+    largo = (int(ids.max()) + 1 if len(ids) else 0) * ancho
+    claves = ids * ancho + ciclos
+
+    def sumar(pesos=None):
+        return np.bincount(claves, weights=pesos, minlength=largo)
+
+    cursos = sumar()
+    pares = np.flatnonzero(cursos)
+    par = {
+        "cursos": cursos[pares],
+        "cursos_aprobados": sumar(aprobada)[pares],
+        "creditos_matriculados": sumar(creditos)[pares],
+        "creditos_evaluados": sumar(creditos_evaluados)[pares],
+        "creditos_aprobados": sumar(creditos_aprobados)[pares],
+        "suma_ponderada": sumar(ponderada)[pares],
+    }
+    id_par, ciclo_par = pares // ancho, pares % ancho
+    promedio_par = _promedio(par["suma_ponderada"], par["creditos_evaluados"])
+
+    por_ciclo = {
+        "id_alumno": id_par,
+        "ciclo": ciclo_par,
+        "cursos": par["cursos"],
+        "creditos_evaluados": par["creditos_evaluados"].astype(np.int64),
+        "creditos_aprobados": par["creditos_aprobados"].astype(np.int64),
+        "promedio_ponderado": promedio_par,
+        "ranking": _ranking(ciclo_par, promedio_par),
+    }
+
+    # ---- Por alumno: se suman los pares, que ya vienen ordenados por id_alumno
+    inicio = np.flatnonzero(np.r_[True, id_par[1:] != id_par[:-1]]) if len(pares) else pares
+    alumnos = id_par[inicio]
+    totales = {nombre: np.add.reduceat(valores.astype(np.float64), inicio) if len(pares) else valores
+               for nombre, valores in par.items()}
+    promedio = _promedio(totales["suma_ponderada"], totales["creditos_evaluados"])
+
+    por_alumno = {
+        "id_alumno": alumnos,
+        "cursos": totales["cursos"].astype(np.int64),
+        "cursos_aprobados": totales["cursos_aprobados"].astype(np.int64),
+        "creditos_matriculados": totales["creditos_matriculados"].astype(np.int64),
+        "creditos_evaluados": totales["creditos_evaluados"].astype(np.int64),
+        "creditos_aprobados": totales["creditos_aprobados"].astype(np.int64),
+        "promedio_ponderado": promedio,
+        "ranking": _ranking(np.zeros(len(alumnos), dtype=np.int64), promedio),
+    }
+    return por_alumno, por_ciclo
+
+
+# ============================
+# RESULTADO
+# ============================
+class Analitica:
+    """Resultado de una pasada; las consultas por alumno/ciclo son búsquedas en los arreglos"""
+
+    def __init__(self, por_alumno, por_ciclo, segundos, segundos_extraccion=0.0):
+        self.por_alumno = por_alumno
+        self.por_ciclo = por_ciclo
+        self.segundos = segundos
+        self.segundos_extraccion = segundos_extraccion
+
+    @staticmethod
+    def _filas(columnas, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        nombres = list(columnas)
+        filas = [dict(zip(nombres, valores))
+                 for valores in zip(*(columnas[n][indices].tolist() for n in nombres))]
+        for fila in filas:
+            # Sin notas todavía: sin promedio ni puesto en el ranking
+            if math.isnan(fila["promedio_ponderado"]):
+                fila["promedio_ponderado"] = None
+            fila["ranking"] = fila["ranking"] or None
+        return filas
+
+    def meta(self):
+        return {"alumnos": int(len(self.por_alumno["id_alumno"])),
+                "extraccion_ms": round(self.segundos_extraccion * 1000, 1),
+                "calculo_ms": round(self.segundos * 1000, 1),
+                "total_ms": round((self.segundos_extraccion + self.segundos) * 1000, 1)}
+
+    def alumnos(self, top=None):
+        """Todos los alumnos, o los `top` primeros del ranking global"""
+        indices = np.arange(len(self.por_alumno["id_alumno"]))
+        if top is not None:
+            ranking = self.por_alumno["ranking"]
+            indices = indices[ranking > 0]
+            indices = indices[np.argsort(ranking[indices], kind="stable")][:top]
+        return self._filas(self.por_alumno, indices)
+
+    def alumno(self, id_alumno):
+        ids = self.por_alumno["id_alumno"]
+        i = np.searchsorted(ids, id_alumno)
+        if i >= len(ids) or ids[i] != id_alumno:
+            return None
+        resultado = self._filas(self.por_alumno, [i])[0]
+        # por_ciclo está ordenado por (id_alumno, ciclo)
+        ids_ciclo = self.por_ciclo["id_alumno"]
+        desde, hasta = np.searchsorted(ids_ciclo, [id_alumno, id_alumno + 1])
+        resultado["ciclos"] = self._filas(self.por_ciclo, range(desde, hasta))
+        return resultado
+
+    def ranking_ciclo(self, ciclo, top=None):
+        ranking = self.por_ciclo["ranking"]
+        indices = np.flatnonzero((self.por_ciclo["ciclo"] == ciclo) & (ranking > 0))
+        indices = indices[np.argsort(ranking[indices], kind="stable")]
+        return self._filas(self.por_ciclo, indices[:top] if top is not None else indices)
+
+
+def analizar():
+    conn = get_connection()
+    if conn is None:
+        raise RuntimeError("Error de conexión a la base de datos")
+    inicio = time.perf_counter()
+    try:
+        columnas = extraer(conn.cursor())
+    finally:
+        conn.close()
+    extraccion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    por_alumno, por_ciclo = calcular(columnas)
+    return Analitica(por_alumno, por_ciclo, time.perf_counter() - inicio, extraccion)
@@ -0,0 +1,137 @@
+"""
+Secciones de reportes consultadas en paralelo.
+
+Los drivers del proyecto (mysql-connector y sqlite3) son bloqueantes, así
+que cada sección de un tablero corre en un grupo acotado de hilos con su
+conexión del pool: las secciones independientes se lanzan juntas y el
+tablero tarda lo que la consulta más lenta, no la suma. El grupo de hilos
+no debe superar POOL_CONFIG["max_size"], para no dejar consultas
+esperando conexión. La vista espera con concurrent.futures.wait, sin un
+bucle de eventos por request.
+
+Los hilos del grupo corren fuera del contexto de la request, cada sección
+en un contexto de aplicación propio (current_app disponible, con su propio
+`g`): no tocan el `g` de la request (varios a la vez incrementarían sin
+lock su contador de consultas). Cada sección cuenta sus consultas aparte
+(utils.metricas.medir_consultas) y reunir() las suma a la request al
+terminar. Lo que necesite de la request (p. ej. version_datos()) se
+resuelve antes y se pasa como argumento.
+
+Un hilo no se puede interrumpir: cuando una sección supera el timeout el
+tablero responde sin ella, pero su consulta sigue en el hilo, con su
+conexión del pool, hasta terminar. Para que unas pocas consultas lentas
+no dejen a los tableros siguientes esperando en la cola del grupo, cada
+proceso admite a lo sumo REPORTES_ASYNC_CONFIG["max_pendientes"]
+secciones entre las que corren y las que esperan hilo (las vencidas
+cuentan hasta que terminan); pasado ese número se lanza EjecutorSaturado
+sin encolar nada y la vista responde 503 con Retry-After.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from flask import current_app
+
+from config import REPORTES_ASYNC_CONFIG
+from utils.metricas import medir_consultas, sumar_consultas
+
+_ejecutor = None
+_ejecutor_pid = None
+_ejecutor_lock = threading.Lock()
+_pendientes = 0         # Secciones enviadas al grupo que aún no terminaron (o no se cancelaron)
+
+
+class EjecutorSaturado(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Grupo de hilos de reportes saturado")
+        self.retry_after = retry_after
+
+
+def _obtener_ejecutor():
+    """Grupo de hilos del proceso (se crea de nuevo en el proceso hijo tras un fork)"""
+    global _ejecutor, _ejecutor_pid, _pendientes
+    if _ejecutor is None or _ejecutor_pid != os.getpid():
+        with _ejecutor_lock:
+            if _ejecutor is None or _ejecutor_pid != os.getpid():
+                _ejecutor = ThreadPoolExecutor(max_workers=REPORTES_ASYNC_CONFIG["hilos"],
+                                               thread_name_prefix="reportes")
+                _ejecutor_pid = os.getpid()
+                _pendientes = 0
+    return _ejecutor
+
+
+def _reservar(cantidad):
+    """Cupo para `cantidad` secciones, todas o ninguna"""
+    global _pendientes
+    _obtener_ejecutor()
+    with _ejecutor_lock:
+        if _pendientes + cantidad > REPORTES_ASYNC_CONFIG["max_pendientes"]:
+            raise EjecutorSaturado(REPORTES_ASYNC_CONFIG["retry_after"])
+        _pendientes += cantidad
+
+
+def _liberar(futuro=None):
+    global _pendientes
+    with _ejecutor_lock:
+        _pendientes -= 1
+
+
+def pendientes():
+    """Secciones en curso o esperando hilo en este proceso"""
+    return _pendientes if _ejecutor_pid == os.getpid() else 0
+
+
+# ============================
+# EJECUCIÓN
+# ============================
+def _medida(app, funcion, args, medicion):
+    with app.app_context(), medir_consultas(medicion):
+        return funcion(*args)
+
+
+def _enviar(funcion, *args):
+    """
+    Envía al grupo una función ya reservada. El cupo se libera cuando la
+    función termina en su hilo o cuando se cancela antes de empezar, no al
+    vencer el timeout del tablero.
+    """
+    try:
+        futuro = _obtener_ejecutor().submit(funcion, *args)
+    except RuntimeError:
+        _liberar()
+        raise
+    futuro.add_done_callback(_liberar)
+    return futuro
+
+
+def reunir(secciones, timeout=None):
+    """
+    {nombre: (funcion, *args)} -> ({nombre: resultado}, {nombre: error}).
+    Todas las secciones corren a la vez; una que falla o no termina en
+    `timeout` segundos no tumba a las demás. EjecutorSaturado si el grupo
+    no admite todas las secciones.
+    """
+    timeout = REPORTES_ASYNC_CONFIG["timeout"] if timeout is None else timeout
+    _reservar(len(secciones))
+    app = current_app._get_current_object()
+    mediciones = {nombre: [0, 0.0] for nombre in secciones}
+    futuros = {nombre: _enviar(_medida, app, funcion, args, mediciones[nombre])
+               for nombre, (funcion, *args) in secciones.items()}
+    if futuros:
+        wait(futuros.values(), timeout=timeout)
+
+    resultados, errores = {}, {}
+    for nombre, futuro in futuros.items():
+        if not futuro.done():
+            futuro.cancel()
+            errores[nombre] = f"Sin respuesta en {timeout}s"
+            continue
+        # Solo las terminadas: la medición de una vencida sigue cambiando en su hilo
+        sumar_consultas(*mediciones[nombre])
+        if futuro.cancelled():
+            errores[nombre] = "Cancelada"
+        elif futuro.exception() is not None:
+            errores[nombre] = str(futuro.exception())
+        else:
+            resultados[nombre] = futuro.result()
+    return resultados, errores
@@ -0,0 +1,137 @@
+"""
+Historial académico precalculado para /api/reportes/rendimiento_alumno.
+
+historial_alumnos guarda por alumno el historial completo ya agrupado por
+ciclo (serializado una vez) y un número de versión. Cualquier cambio en sus
+matrículas o evaluaciones sube la versión y borra el historial; la próxima
+lectura lo recalcula y solo lo guarda si la versión no cambió mientras tanto,
+así una escritura concurrente nunca queda tapada por un historial viejo.
+
+Crear la tabla (o descartar todos los historiales guardados):
+
+    python -m routes.reportes.historial
+"""
+import json
+
+from flask import current_app
+from db import get_connection, sql_acumular, ErrorIntegridad
+
+TABLAS_HISTORIAL = [
+    """
+CREATE TABLE IF NOT EXISTS historial_alumnos (
+    id_alumno INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    datos MEDIUMTEXT
+)
+"""
+]
+
+TAMANO_BLOQUE = 1000
+
+SQL_HISTORIAL = """
+    SELECT m.ciclo, c.codigo, c.nombre as curso, c.creditos, e.nota,
+           CASE WHEN e.nota IS NULL THEN 'SIN NOTA' WHEN e.aprobado=1 THEN 'APROBADO' ELSE 'DESAPROBADO' END as estado_curso,
+           e.fecha_evaluacion
+    FROM matriculas m
+    JOIN cursos c ON m.id_curso = c.id
+    LEFT JOIN evaluaciones e ON m.id = e.id_matricula
+    WHERE m.id_alumno = %s
+    ORDER BY m.ciclo DESC, c.codigo ASC
+"""
+
+
+# ============================
+# INVALIDACIÓN (dentro de la transacción del llamador)
+# ============================
+def invalidar_historiales(cursor, ids_alumnos):
+    ids = sorted(set(ids_alumnos))
+    if ids:
+        cursor.executemany(sql_acumular("historial_alumnos", ["id_alumno"], ["version"], anular=["datos"]),
+                           [(id_alumno, 1) for id_alumno in ids])
+
+
+def invalidar_historiales_curso(cursor, curso_id):
+    """El nombre o los créditos de un curso aparecen en el historial de sus alumnos"""
+    cursor.execute("""
+        UPDATE historial_alumnos SET version = version + 1, datos = NULL
+        WHERE id_alumno IN (SELECT id_alumno FROM matriculas WHERE id_curso = %s)
+    """, (curso_id,))
+
+
+# ============================
+# CÁLCULO Y LECTURA
+# ============================
+def _calcular(cursor, alumno_id):
+    """[[ciclo, [cursos]], ...] del ciclo más reciente al más antiguo"""
+    cursor.execute(SQL_HISTORIAL, (alumno_id,))
+
+    ciclos = []
+    for row in cursor.fetchall():
+        if not ciclos or ciclos[-1][0] != row['ciclo']:
+            ciclos.append([row['ciclo'], []])
+        ciclos[-1][1].append(row)
+    return ciclos
+
+
+def _guardar(cursor, alumno_id, version, datos):
+    if version is None:
+        try:
+            cursor.execute("INSERT INTO historial_alumnos (id_alumno, version, datos) VALUES (%s, 0, %s)",
+                           (alumno_id, datos))
+        except ErrorIntegridad:
+            return   # Otra request lo creó (o lo invalidó) mientras se calculaba
+    else:
+        cursor.execute("UPDATE historial_alumnos SET datos = %s WHERE id_alumno = %s AND version = %s",
+                       (datos, alumno_id, version))
+
+
+def historial_alumno(alumno_id, filtro="TODOS"):
+    """
+    {ciclo: [cursos]} con los ciclos pedidos: TODOS, ULTIMO o los 3 últimos
+    (cualquier otro filtro). Es una lectura por clave si el historial está vigente.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT version, datos FROM historial_alumnos WHERE id_alumno = %s", (alumno_id,))
+        guardado = cursor.fetchone()
+
+        if guardado and guardado['datos'] is not None:
+            ciclos = json.loads(guardado['datos'])
+        else:
+            # Mismo formato que jsonify (fechas, decimales) para que la respuesta no cambie
+            ciclos = json.loads(current_app.json.dumps(_calcular(cursor, alumno_id)))
+            if ciclos:
+                _guardar(cursor, alumno_id, guardado['version'] if guardado else None,
+                         json.dumps(ciclos, separators=(",", ":")))
+                conn.commit()
+
+        if filtro != "TODOS":
+            ciclos = ciclos[:1 if filtro == "ULTIMO" else 3]
+        return {ciclo: cursos for ciclo, cursos in ciclos}
+    finally:
+        if conn: conn.close()
+
+
+def reiniciar(cursor):
+    """Crea la tabla si falta y descarta todos los historiales guardados"""
+    for ddl in TABLAS_HISTORIAL:
+        cursor.execute(ddl)
+    cursor.execute("DELETE FROM historial_alumnos")
+
+
+def main():
+    conn = get_connection()
+    if conn is None:
+        raise SystemExit("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        reiniciar(cursor)
+        conn.commit()
+        print("✅ Historiales académicos descartados (se recalculan en la próxima consulta)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,31 @@
 from flask import Blueprint, jsonify, request
+from config import CACHE_CONFIG
+from db import get_connection
+from utils.cache import CacheTTL
+from utils.condicional import version_datos
+from utils.logger import registrar_log
 # Solo importamos los servicios que vamos a usar
-from routes.matriculas.matriculas_routes import servicio_rendimiento_alumno, servicio_reporte_alumnos_ciclo
+from routes.matriculas.matriculas_routes import servicio_rendimiento_alumno, servicio_reporte_alumnos_ciclo, alumnos_combo
+from routes.reportes.resumen_ciclos import leer_resumen
+from utils.streaming import leer_formato, respuesta_stream, FormatoInvalido
+from routes.reportes.analitica import analizar
+from routes.reportes import asincrono
 
 reportes_bp = Blueprint("reportes_bp", __name__, url_prefix="/api/reportes")
 
+# Una sola pasada sobre todo el alumnado, reutilizada durante el TTL
+cache_analitica = CacheTTL(**CACHE_CONFIG["analitica"])
+
+SQL_EXPORTAR = """
+    SELECT m.id as id_matricula, m.ciclo, m.id_alumno, a.dni,
+           CONCAT(a.nombre, ' ', a.apellido) as alumno,
+           c.codigo, c.nombre as curso, c.creditos, m.estado, e.nota
+    FROM matriculas m
+    JOIN alumnos a ON m.id_alumno = a.id
+    JOIN cursos c ON m.id_curso = c.id
+    LEFT JOIN evaluaciones e ON m.id = e.id_matricula
+"""
+
 # ============================
 # REPORTE 1: RENDIMIENTO POR ALUMNO (Inteligente)
 # ============================
@@ -24,4 +46,155 @@ def alumnos_ciclo():
     try:
         return jsonify(servicio_reporte_alumnos_ciclo()), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+# ============================
+# INICIO DE PÁGINA: combo de alumnos + reporte 2 en una request
+# ============================
+@reportes_bp.route("/inicio", methods=["GET"])
+def inicio_reportes():
+    conn = get_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        respuesta = {"alumnos": alumnos_combo(cursor), "alumnos_ciclo": leer_resumen(cursor)}
+        conn.commit()
+        return jsonify(respuesta), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        conn.close()
+
+# ============================
+# REPORTE 3: EXPORTACIÓN DE NOTAS (streaming)
+# ============================
+@reportes_bp.route("/exportar", methods=["GET"])
+def exportar_notas():
+    """Todas las matrículas con su nota; ?format=ndjson|json-stream (por defecto json-stream)"""
+    try:
+        formato = leer_formato() or "json-stream"
+    except FormatoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = SQL_EXPORTAR
+    params = []
+    ciclo = request.args.get("ciclo", type=int)
+    if ciclo is not None:
+        query += " WHERE m.ciclo = %s"
+        params.append(ciclo)
+    query += " ORDER BY m.ciclo, m.id_alumno, c.codigo"
+
+    try:
+        return respuesta_stream(query, tuple(params), formato)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# ============================
+# REPORTE 4: ANALÍTICA (promedio ponderado, créditos, rankings)
+# ============================
+def _analitica(version):
+    # La clave incluye las versiones de los datos (version_datos() de la request):
+    # una escritura (en cualquier proceso) la invalida
+    clave = ("todo", version)
+    resultado = cache_analitica.obtener(clave)
+    if resultado is None:
+        resultado = analizar()
+        cache_analitica.guardar(clave, resultado)
+    return resultado
+
+
+def _leer_top():
+    top = request.args.get("top", type=int)
+    if top is not None and top < 1:
+        raise ValueError("'top' debe ser un entero positivo")
+    return top
+
+
+@reportes_bp.route("/analitica/alumnos", methods=["GET"])
+def analitica_alumnos():
+    """Todos los alumnos; ?top=N devuelve los N primeros del ranking por promedio ponderado"""
+    try:
+        top = _leer_top()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        analitica = _analitica(version_datos())
+        return jsonify({**analitica.meta(), "datos": analitica.alumnos(top)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@reportes_bp.route("/analitica/alumnos/<int:alumno_id>", methods=["GET"])
+def analitica_alumno(alumno_id):
+    try:
+        resultado = _analitica(version_datos()).alumno(alumno_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    if resultado is None:
+        return jsonify({"error": "El alumno no tiene matrículas"}), 404
+    return jsonify(resultado), 200
+
+
+@reportes_bp.route("/analitica/ciclos/<int:ciclo>/ranking", methods=["GET"])
+def analitica_ranking_ciclo(ciclo):
+    try:
+        top = _leer_top()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        analitica = _analitica(version_datos())
+        return jsonify({**analitica.meta(), "ciclo": ciclo, "datos": analitica.ranking_ciclo(ciclo, top)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# ============================
+# REPORTE 5: TABLERO (secciones consultadas en paralelo)
+# ============================
+def _seccion_analitica(version, top, alumno_id=None, ciclo=None):
+    """Ranking global, del ciclo y del alumno con una sola pasada de analítica"""
+    analitica = _analitica(version)
+    seccion = {**analitica.meta(), "ranking": analitica.alumnos(top)}
+    if ciclo is not None:
+        seccion["ranking_ciclo"] = analitica.ranking_ciclo(ciclo, top)
+    if alumno_id is not None:
+        seccion["alumno"] = analitica.alumno(alumno_id)
+    return seccion
+
+
+def servicio_tablero(top=10, alumno_id=None, ciclo=None):
+    # Las secciones corren fuera de la request: la versión de los datos se lee aquí
+    secciones = {
+        "alumnos_ciclo": (servicio_reporte_alumnos_ciclo,),
+        "analitica": (_seccion_analitica, version_datos(), top, alumno_id, ciclo),
+    }
+    if alumno_id is not None:
+        secciones["historial"] = (servicio_rendimiento_alumno, alumno_id, "TODOS")
+        secciones["ultimo_ciclo"] = (servicio_rendimiento_alumno, alumno_id, "ULTIMO")
+    return asincrono.reunir(secciones)
+
+
+@reportes_bp.route("/tablero", methods=["GET"])
+def tablero():
+    """Resumen por ciclo + analítica (?top, ?ciclo) + historial de ?alumno, en una sola request"""
+    try:
+        top = _leer_top() or 10
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    alumno_id = request.args.get("alumno", type=int)
+    ciclo = request.args.get("ciclo", type=int)
+
+    try:
+        datos, errores = servicio_tablero(top, alumno_id, ciclo)
+    except asincrono.EjecutorSaturado as e:
+        # Secciones lentas ocupan los hilos: se rechaza en vez de encolar detrás de ellas
+        registrar_log("reportes", "WARN", f"Tablero rechazado: {asincrono.pendientes()} secciones pendientes")
+        response = jsonify({"error": "Reportes saturados, reintente luego", "retry_after": e.retry_after})
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 503
+    if not datos:
+        return jsonify({"error": "No se pudo armar el tablero", "errores": errores}), 500
+    response = jsonify({**datos, "errores": errores})
+    if errores:
+        response.headers["Cache-Control"] = "no-store"     # Tablero parcial: sin ETag, no se guarda
+    return response, 200
@@ -0,0 +1,201 @@
+"""
+Resumen materializado por ciclo para /api/reportes/alumnos_ciclo.
+
+resumen_ciclos guarda alumnos distintos, matrículas, aprobados,
+desaprobados, sin nota y la suma de notas (el promedio se calcula al leer).
+Cada ciclo se reparte en FRAGMENTOS filas según id_alumno % FRAGMENTOS y
+la lectura las suma: con una sola fila por ciclo, todas las matrículas del
+ciclo actualizaban la misma fila y en MySQL esperaban una detrás de otra
+hasta el commit; así solo se cruzan las de alumnos del mismo fragmento.
+resumen_ciclo_alumno lleva las matrículas de cada alumno en cada ciclo para
+saber cuándo un alumno entra o sale del conteo de alumnos distintos.
+
+Las rutas de matrículas y evaluaciones acumulan sus cambios en un
+CambiosResumen y lo aplican en la misma transacción, justo antes del commit
+(también invalida el historial precalculado de los alumnos afectados).
+Bloquea siempre en el mismo orden: historial_alumnos, resumen_ciclo_alumno
+y resumen_ciclos, cada una por clave ascendente.
+
+Reconstruir desde las tablas base (crea las tablas si faltan):
+
+    python -m routes.reportes.resumen_ciclos
+"""
+from db import get_connection, sql_acumular, BLOQUEO_LECTURA
+from routes.reportes.historial import invalidar_historiales
+
+APROBATORIA = 10.5
+TAMANO_BLOQUE = 500
+FRAGMENTOS = 16     # Cambiarlo exige reconstruir el resumen
+
+TABLAS_RESUMEN = [
+    """
+CREATE TABLE IF NOT EXISTS resumen_ciclos (
+    ciclo INTEGER NOT NULL,
+    fragmento INTEGER NOT NULL,
+    alumnos INTEGER NOT NULL DEFAULT 0,
+    matriculas INTEGER NOT NULL DEFAULT 0,
+    aprobados INTEGER NOT NULL DEFAULT 0,
+    desaprobados INTEGER NOT NULL DEFAULT 0,
+    sin_nota INTEGER NOT NULL DEFAULT 0,
+    evaluadas INTEGER NOT NULL DEFAULT 0,
+    suma_notas DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (ciclo, fragmento)
+)
+""",
+    """
+CREATE TABLE IF NOT EXISTS resumen_ciclo_alumno (
+    ciclo INTEGER NOT NULL,
+    id_alumno INTEGER NOT NULL,
+    matriculas INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (ciclo, id_alumno)
+)
+"""
+]
+
+COLUMNAS_CICLO = ["alumnos", "matriculas", "aprobados", "desaprobados", "sin_nota", "evaluadas", "suma_notas"]
+
+
+# ============================
+# MANTENIMIENTO INCREMENTAL
+# ============================
+class CambiosResumen:
+    """
+    Deltas pendientes de aplicar. Cada matrícula aporta (ciclo, alumno, nota):
+    al crearla se agrega, al borrarla se quita y al cambiar su ciclo o su
+    nota se quita la versión anterior y se agrega la nueva.
+    """
+
+    def __init__(self):
+        self._ciclos = {}     # (ciclo, fragmento) -> [delta por columna de COLUMNAS_CICLO]
+        self._pares = {}      # (ciclo, id_alumno) -> delta de matrículas
+
+    def agregar(self, ciclo, id_alumno, nota=None, signo=1):
+        delta = self._ciclos.setdefault((ciclo, id_alumno % FRAGMENTOS), [0] * len(COLUMNAS_CICLO))
+        delta[1] += signo
+        if nota is None:
+            delta[4] += signo
+        else:
+            delta[2 if nota >= APROBATORIA else 3] += signo
+            delta[5] += signo
+            delta[6] += signo * float(nota)     # DECIMAL en MySQL, REAL en SQLite
+        self._pares[(ciclo, id_alumno)] = self._pares.get((ciclo, id_alumno), 0) + signo
+
+    def quitar(self, ciclo, id_alumno, nota=None):
+        self.agregar(ciclo, id_alumno, nota, signo=-1)
+
+    def cambiar_nota(self, ciclo, id_alumno, anterior, nueva):
+        self.quitar(ciclo, id_alumno, anterior)
+        self.agregar(ciclo, id_alumno, nueva)
+
+    def aplicar(self, cursor):
+        """Suma los deltas en las tablas de resumen (dentro de la transacción del llamador)"""
+        invalidar_historiales(cursor, [id_alumno for _, id_alumno in self._pares])
+        pares = sorted((k, d) for k, d in self._pares.items() if d)
+        if pares:
+            cursor.executemany(sql_acumular("resumen_ciclo_alumno", ["ciclo", "id_alumno"], ["matriculas"]),
+                               [(c, a, d) for (c, a), d in pares])
+            # Con el valor nuevo se sabe si el alumno entró (0 -> d) o salió (-> 0) del ciclo
+            for i in range(0, len(pares), TAMANO_BLOQUE):
+                bloque = pares[i:i + TAMANO_BLOQUE]
+                condiciones = " OR ".join(["(ciclo = %s AND id_alumno = %s)"] * len(bloque))
+                cursor.execute(f"SELECT ciclo, id_alumno, matriculas FROM resumen_ciclo_alumno "
+                               f"WHERE {condiciones}{BLOQUEO_LECTURA}",
+                               tuple(v for (c, a), _ in bloque for v in (c, a)))
+                actuales = {(r[0], r[1]): r[2] for r in cursor.fetchall()}
+                for (ciclo, id_alumno), d in bloque:
+                    fragmento = self._ciclos[(ciclo, id_alumno % FRAGMENTOS)]
+                    if d > 0 and actuales.get((ciclo, id_alumno)) == d:
+                        fragmento[0] += 1
+                    elif d < 0 and actuales.get((ciclo, id_alumno)) == 0:
+                        fragmento[0] -= 1
+
+        filas = [(*clave, *delta) for clave, delta in sorted(self._ciclos.items()) if any(delta)]
+        if filas:
+            cursor.executemany(sql_acumular("resumen_ciclos", ["ciclo", "fragmento"], COLUMNAS_CICLO), filas)
+        self._ciclos.clear()
+        self._pares.clear()
+
+
+# ============================
+# LECTURA
+# ============================
+SQL_RESUMEN = """
+    SELECT ciclo, SUM(alumnos) AS total_alumnos, SUM(matriculas) AS total_matriculas,
+           SUM(aprobados) AS aprobados, SUM(desaprobados) AS desaprobados, SUM(sin_nota) AS sin_nota,
+           SUM(evaluadas) AS evaluadas, SUM(suma_notas) AS suma_notas
+    FROM resumen_ciclos
+    GROUP BY ciclo
+    HAVING SUM(matriculas) > 0
+    ORDER BY ciclo
+"""
+CONTEOS_RESUMEN = ("total_alumnos", "total_matriculas", "aprobados", "desaprobados", "sin_nota")
+
+
+def leer_resumen(cursor):
+    cursor.execute(SQL_RESUMEN)
+    filas = cursor.fetchall()
+    for fila in filas:
+        for columna in CONTEOS_RESUMEN:
+            fila[columna] = int(fila[columna])     # MySQL devuelve SUM() como DECIMAL
+        evaluadas = int(fila.pop("evaluadas"))
+        suma = fila.pop("suma_notas")
+        fila["promedio"] = round(float(suma) / evaluadas, 2) if evaluadas else None
+    return filas
+
+
+# ============================
+# RECONSTRUCCIÓN
+# ============================
+def _recalcular(cursor, ciclo=None):
+    filtro, params = ("WHERE ciclo = %s", (ciclo,)) if ciclo is not None else ("", ())
+    cursor.execute(f"DELETE FROM resumen_ciclo_alumno {filtro}", params)
+    cursor.execute(f"DELETE FROM resumen_ciclos {filtro}", params)
+    cursor.execute(f"""
+        INSERT INTO resumen_ciclo_alumno (ciclo, id_alumno, matriculas)
+        SELECT ciclo, id_alumno, COUNT(*) FROM matriculas {filtro} GROUP BY ciclo, id_alumno
+    """, params)
+    cursor.execute(f"""
+        INSERT INTO resumen_ciclos (ciclo, fragmento, {', '.join(COLUMNAS_CICLO)})
+        SELECT m.ciclo, m.id_alumno % {FRAGMENTOS},
+               COUNT(DISTINCT m.id_alumno),
+               COUNT(*),
+               SUM(CASE WHEN e.nota >= {APROBATORIA} THEN 1 ELSE 0 END),
+               SUM(CASE WHEN e.nota < {APROBATORIA} THEN 1 ELSE 0 END),
+               SUM(CASE WHEN e.id IS NULL THEN 1 ELSE 0 END),
+               COUNT(e.id),
+               COALESCE(SUM(e.nota), 0)
+        FROM matriculas m
+        LEFT JOIN evaluaciones e ON e.id_matricula = m.id
+        {filtro.replace("ciclo", "m.ciclo")}
+        GROUP BY m.ciclo, m.id_alumno % {FRAGMENTOS}
+    """, params)
+
+
+def reconstruir(cursor):
+    """Recalcula ambas tablas desde matriculas y evaluaciones"""
+    for ddl in TABLAS_RESUMEN:
+        cursor.execute(ddl)
+    _recalcular(cursor)
+
+
+def reconstruir_ciclo(cursor, ciclo):
+    """Recalcula solo un ciclo (tras escrituras por conjunto, como el arrastre)"""
+    _recalcular(cursor, ciclo)
+
+
+def main():
+    conn = get_connection()
+    if conn is None:
+        raise SystemExit("No se pudo conectar a la base de datos")
+    try:
+        cursor = conn.cursor()
+        reconstruir(cursor)
+        conn.commit()
+        cursor.execute("SELECT COUNT(DISTINCT ciclo) FROM resumen_ciclos")
+        print(f"✅ Resumen por ciclo reconstruido: {cursor.fetchone()[0]} ciclos")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Servidor de producción: varios procesos (pre-fork) con hilos, sobre Werkzeug.
+
+El proceso principal abre el socket y crea `workers` procesos hijos que lo
+comparten; cada hijo arma su propia app con create_app() (su pool de
+conexiones, su caché y su escritor de logs) y atiende con un grupo fijo de
+`hilos`. Si un hijo termina inesperadamente se reemplaza por otro con el
+mismo número de worker.
+
+Cada worker escribe sus logs en archivos propios (logs/sistema_completo.w0.log,
+logs/acceso/acceso.w0.log, ...) y los rota él solo: con archivos compartidos
+cada proceso rotaba por tamaño y fecha los mismos archivos y los renombraba
+mientras otro escribía en ellos. El proceso principal no registra en los
+logs (no arranca el hilo escritor antes del fork); informa por consola.
+
+Con SIGTERM o Ctrl+C cada hijo deja de aceptar conexiones, termina las
+requests en curso, procesa la cola de matrícula y cierra el pool de
+conexiones y los logs antes de salir.
+
+    python servidor.py                          # SERVIDOR_CONFIG de config.py
+    python servidor.py --workers 4 --hilos 8 --puerto 8000
+    DB_MOTOR=sqlite python servidor.py
+
+En sistemas sin fork (Windows) o con --workers 1 atiende en un solo proceso.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from config import SERVIDOR_CONFIG
+
+
+# ============================
+# SERVIDOR DE UN PROCESO
+# ============================
+class Manejador(WSGIRequestHandler):
+    # Una conexión por request: con hilos acotados, un keep-alive ocioso ocuparía un hilo
+    protocol_version = "HTTP/1.0"
+
+    def log_request(self, *args, **kwargs):
+        pass    # La app ya registra cada request (utils.logger.registrar_acceso)
+
+
+class ServidorHilos(BaseWSGIServer):
+    """BaseWSGIServer que atiende cada conexión en un grupo fijo de hilos"""
+
+    multithread = True
+
+    def __init__(self, host, port, app, hilos=8, fd=None):
+        super().__init__(host, port, app, handler=Manejador, fd=fd)
+        if fd is not None:
+            # Socket compartido: todos los procesos despiertan con cada conexión y solo uno
+            # la acepta; sin bloqueo, los demás vuelven al bucle en lugar de quedar en accept()
+            self.socket.setblocking(False)
+        self._hilos = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="http")
+
+    def process_request(self, request, client_address):
+        self._hilos.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        # Espera a que terminen las requests en curso (BaseWSGIServer también
+        # lo llama dentro de __init__, antes de que exista el grupo de hilos)
+        if getattr(self, "_hilos", None) is not None:
+            self._hilos.shutdown(wait=True)
+        super().server_close()
+
+
+def cerrar_recursos():
+    """Lo que cada proceso vacía al terminar: cola de matrícula, pool y logs"""
+    from db import cerrar_pool
+    from routes.matriculas.matriculas_routes import cola_matriculas
+    from utils.logger import cerrar_logs
+
+    cola_matriculas.cerrar()
+    cerrar_pool()
+    cerrar_logs()
+
+
+def atender(host, puerto, hilos, fd=None):
+    """Arma la app y atiende hasta recibir SIGTERM / SIGINT (cierre ordenado)"""
+    from app import create_app
+
+    servidor = ServidorHilos(host, puerto, create_app(), hilos=hilos, fd=fd)
+
+    def detener(signum, frame):
+        # shutdown() espera al bucle de serve_forever: se llama desde otro hilo
+        threading.Thread(target=servidor.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, detener)
+    signal.signal(signal.SIGINT, detener)
+    try:
+        servidor.serve_forever(poll_interval=0.5)
+    finally:
+        servidor.server_close()
+        cerrar_recursos()
+
+
+# ============================
+# PRE-FORK
+# ============================
+class Supervisor:
+    ESPERA_REINICIO = 1     # Segundos antes de reemplazar un worker que murió al arrancar
+
+    def __init__(self, host, puerto, workers, hilos, timeout_cierre=10, backlog=128):
+        self.host = host
+        self.puerto = puerto
+        self.workers = workers
+        self.hilos = hilos
+        self.timeout_cierre = timeout_cierre
+        self.backlog = backlog
+        self.hijos = {}         # pid -> (hora de inicio, número de worker)
+        self.cerrando = False
+
+    def _crear_hijo(self, sock, numero):
+        pid = os.fork()
+        if pid:
+            self.hijos[pid] = (time.monotonic(), numero)
+            return
+        # Proceso hijo: atiende sobre el socket compartido y nunca vuelve al bucle del padre
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        from utils.logger import archivos_propios
+        archivos_propios(f"w{numero}")
+        codigo = 0
+        try:
+            atender(self.host, self.puerto, self.hilos, fd=sock.fileno())
+        except BaseException as e:
+            print(f"🔥 Worker {os.getpid()} terminó con error: {e}", file=sys.stderr)
+            codigo = 1
+        finally:
+            os._exit(codigo)
+
+    def _detener(self, signum, frame):
+        self.cerrando = True
+
+    def ejecutar(self):
+        sock = socket.create_server((self.host, self.puerto), backlog=self.backlog)
+        sock.set_inheritable(True)
+        signal.signal(signal.SIGTERM, self._detener)
+        signal.signal(signal.SIGINT, self._detener)
+
+        for numero in range(self.workers):
+            self._crear_hijo(sock, numero)
+        print(f"🚀 Servidor en http://{self.host}:{self.puerto} "
+              f"({self.workers} procesos x {self.hilos} hilos, pid {os.getpid()})", flush=True)
+
+        while not self.cerrando:
+            try:
+                pid, estado = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                hijo = self.hijos.pop(pid, None)
+                if not self.cerrando and hijo is not None:
+                    inicio, numero = hijo
+                    print(f"⚠️  Worker {pid} terminó (estado {estado}); se reemplaza", file=sys.stderr)
+                    if time.monotonic() - inicio < self.ESPERA_REINICIO:
+                        time.sleep(self.ESPERA_REINICIO)    # Falla al arrancar: no reintentar en bucle
+                    self._crear_hijo(sock, numero)
+            else:
+                time.sleep(0.2)
+
+        sock.close()
+        self._terminar_hijos()
+        print("👋 Servidor detenido", flush=True)
+
+    def _terminar_hijos(self):
+        for pid in self.hijos:
+            _enviar(pid, signal.SIGTERM)
+        limite = time.monotonic() + self.timeout_cierre
+        while self.hijos and time.monotonic() < limite:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.hijos.pop(pid, None)
+            else:
+                time.sleep(0.1)
+        for pid in self.hijos:
+            print(f"⚠️  Worker {pid} no terminó en {self.timeout_cierre}s; se fuerza", file=sys.stderr)
+            _enviar(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+
+def _enviar(pid, senal):
+    try:
+        os.kill(pid, senal)
+    except ProcessLookupError:
+        pass
+
+
+def esquema_al_dia():
+    """
+    Antes de abrir el socket: con migraciones pendientes no se arranca
+    (exigir_migraciones). Informa por consola: cada worker deja además el
+    aviso en su log al armar la app (verificar_esquema).
+    """
+    from db import cerrar_pool
+    from migraciones import pendientes_esquema
+    from utils.logger import cerrar_logs
+
+    pendientes = pendientes_esquema()
+    cerrar_pool()       # Los hijos abren su propio pool
+    cerrar_logs()       # Por si get_connection() registró un error: sin hilo escritor antes del fork
+    if pendientes is None:
+        print("⚠️  No se pudo verificar schema_migraciones: base de datos no disponible", file=sys.stderr)
+    elif pendientes and SERVIDOR_CONFIG["exigir_migraciones"]:
+        print("❌ Migraciones pendientes: " + ", ".join(f"{v:03d} {n}" for v, n in pendientes), file=sys.stderr)
+        print("   Aplicarlas con: python -m migraciones", file=sys.stderr)
+        return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de la API (varios procesos con hilos)")
+    parser.add_argument("--host", default=SERVIDOR_CONFIG["host"])
+    parser.add_argument("--puerto", type=int, default=SERVIDOR_CONFIG["puerto"])
+    parser.add_argument("--workers", type=int, default=SERVIDOR_CONFIG["workers"], help="Procesos")
+    parser.add_argument("--hilos", type=int, default=SERVIDOR_CONFIG["hilos"], help="Hilos por proceso")
+    args = parser.parse_args(argv)
+
+    if not esquema_al_dia():
+        return 1
+
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        print(f"🚀 Servidor en http://{args.host}:{args.puerto} (1 proceso x {args.hilos} hilos)", flush=True)
+        atender(args.host, args.puerto, args.hilos)
+        print("👋 Servidor detenido", flush=True)
+        return 0
+
+    Supervisor(args.host, args.puerto, args.workers, args.hilos,
+               SERVIDOR_CONFIG["timeout_cierre"], SERVIDOR_CONFIG["backlog"]).ejecutar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""
+Motores de almacenamiento detrás de db.get_connection.
+
+Cada módulo motor_<nombre>.py expone:
+- NOMBRE: identificador del motor ("mysql", "sqlite")
+- Error / ErrorIntegridad: excepciones del driver
+- conectar(): conexión nueva con la interfaz de mysql.connector que usan
+  las rutas (cursor(dictionary=True), marcadores %s, commit/rollback, ping)
+- BLOQUEO_LECTURA y sql_acumular(): las diferencias de SQL entre motores
+"""
+import importlib
+
+MOTORES = {
+    "mysql": "storage.motor_mysql",
+    "sqlite": "storage.motor_sqlite",
+}
+
+
+def cargar_motor(nombre):
+    """Importa solo el driver elegido (SQLite no necesita mysql-connector)"""
+    if nombre not in MOTORES:
+        raise ValueError(f"Motor de BD no soportado: {nombre}. Use {' o '.join(MOTORES)}.")
+    return importlib.import_module(MOTORES[nombre])
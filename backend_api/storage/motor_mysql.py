@@ -0,0 +1,44 @@
+import mysql.connector
+from config import DB_CONFIG
+
+NOMBRE = "mysql"
+
+Error = mysql.connector.Error
+ErrorIntegridad = mysql.connector.IntegrityError
+
+
+def conectar():
+    conn = mysql.connector.connect(
+        host=DB_CONFIG["host"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        database=DB_CONFIG["database"],
+        port=DB_CONFIG.get("port", 3306)
+    )
+
+    if not conn.is_connected():
+        raise Error(msg="No se pudo conectar a MySQL")
+
+    print("✔ Conexión MySQL establecida")
+    return conn
+
+
+# ============================
+# DIALECTO
+# ============================
+# Lectura que bloquea las filas hasta el commit (ve la última versión confirmada)
+BLOQUEO_LECTURA = " FOR UPDATE"
+ER_NO_SUCH_TABLE = 1146
+
+
+def tabla_inexistente(error):
+    """El error es por una tabla sin crear (migraciones sin aplicar)"""
+    return getattr(error, "errno", None) == ER_NO_SUCH_TABLE
+
+
+def sql_acumular(tabla, claves, columnas, anular=()):
+    """INSERT de una fila que, si la clave ya existe, suma las columnas (y pone en NULL las de anular)"""
+    todas = claves + columnas
+    sumas = ", ".join([f"{c} = {c} + VALUES({c})" for c in columnas] + [f"{c} = NULL" for c in anular])
+    return (f"INSERT INTO {tabla} ({', '.join(todas)}) VALUES ({', '.join(['%s'] * len(todas))}) "
+            f"ON DUPLICATE KEY UPDATE {sumas}")
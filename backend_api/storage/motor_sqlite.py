@@ -0,0 +1,141 @@
+import re
+import sqlite3
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from config import SQLITE_CONFIG
+
+NOMBRE = "sqlite"
+
+Error = sqlite3.Error
+ErrorIntegridad = sqlite3.IntegrityError
+
+
+# ============================
+# COMPATIBILIDAD CON MYSQL
+# ============================
+_MARCADOR = re.compile(r"%s|%%")
+
+
+@lru_cache(maxsize=1024)
+def traducir(sql):
+    """Marcadores de mysql.connector (%s, %%) al estilo de sqlite3 (?, %)"""
+    return _MARCADOR.sub(lambda m: "?" if m.group(0) == "%s" else "%", sql)
+
+
+def _concat(*valores):
+    # Igual que CONCAT de MySQL: NULL si algún argumento es NULL
+    if any(v is None for v in valores):
+        return None
+    return "".join(str(v) for v in valores)
+
+
+def _leer_fecha(valor):
+    # Columnas TIMESTAMP como datetime, igual que las devuelve mysql.connector
+    texto = valor.decode("utf-8")
+    try:
+        return datetime.fromisoformat(texto)
+    except ValueError:
+        return texto
+
+
+sqlite3.register_converter("TIMESTAMP", _leer_fecha)
+
+
+def _fila_dict(cursor, fila):
+    return {col[0]: valor for col, valor in zip(cursor.description, fila)}
+
+
+class CursorSQLite:
+    """Cursor con la interfaz de mysql.connector (dictionary=True, %s)"""
+
+    def __init__(self, cursor, dictionary=False):
+        if dictionary:
+            cursor.row_factory = _fila_dict
+        self._cursor = cursor
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(traducir(sql), params or ())
+
+    def executemany(self, sql, filas):
+        self._cursor.executemany(traducir(sql), filas)
+
+
+class ConexionSQLite:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def cursor(self, dictionary=False, **_):
+        return CursorSQLite(self._conn.cursor(), dictionary)
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1")
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except Error:
+            return False
+
+
+# ============================
+# DIALECTO
+# ============================
+# Sin FOR UPDATE: la transacción de escritura ya tiene el archivo bloqueado
+BLOQUEO_LECTURA = ""
+
+
+def tabla_inexistente(error):
+    """El error es por una tabla sin crear (migraciones sin aplicar)"""
+    return isinstance(error, sqlite3.OperationalError) and "no such table" in str(error)
+
+
+def sql_acumular(tabla, claves, columnas, anular=()):
+    """INSERT de una fila que, si la clave ya existe, suma las columnas (y pone en NULL las de anular)"""
+    todas = claves + columnas
+    sumas = ", ".join([f"{c} = {c} + excluded.{c}" for c in columnas] + [f"{c} = NULL" for c in anular])
+    return (f"INSERT INTO {tabla} ({', '.join(todas)}) VALUES ({', '.join(['%s'] * len(todas))}) "
+            f"ON CONFLICT ({', '.join(claves)}) DO UPDATE SET {sumas}")
+
+
+# ============================
+# CONEXIÓN
+# ============================
+def _uri():
+    parametros = []
+    if SQLITE_CONFIG.get("solo_lectura"):
+        parametros.append("mode=ro")
+    if SQLITE_CONFIG.get("cache_compartida"):
+        parametros.append("cache=shared")
+    uri = Path(SQLITE_CONFIG["ruta"]).absolute().as_uri()
+    return uri + ("?" + "&".join(parametros) if parametros else "")
+
+
+def conectar():
+    conn = sqlite3.connect(
+        _uri(),
+        uri=True,
+        timeout=SQLITE_CONFIG["pragmas"].get("busy_timeout", 5000) / 1000,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False     # El pool la presta a distintos hilos (de a uno)
+    )
+    conn.create_function("CONCAT", -1, _concat, deterministic=True)
+
+    for pragma, valor in SQLITE_CONFIG["pragmas"].items():
+        # journal_mode persiste en el archivo: una réplica de solo lectura no lo cambia
+        if pragma == "journal_mode" and SQLITE_CONFIG.get("solo_lectura"):
+            continue
+        conn.execute(f"PRAGMA {pragma} = {valor}")
+
+    return ConexionSQLite(conn)
@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """
+    Caché en memoria del proceso, acotada por cantidad (LRU) y por tiempo (TTL).
+    Segura entre hilos; cada worker tiene la suya, por eso las escrituras
+    invalidan y el TTL acota lo que puede quedar desactualizado en otros procesos.
+    """
+
+    def __init__(self, max_items=256, ttl=300):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._datos = OrderedDict()     # clave -> (expira_en, valor)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] < ahora:
+                if entrada is not None:
+                    del self._datos[clave]
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_items:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def invalidar_donde(self, condicion):
+        """Quita las entradas cuya clave cumple condicion(clave) (p. ej. todas las de un id)"""
+        with self._lock:
+            for clave in [c for c in self._datos if condicion(c)]:
+                del self._datos[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
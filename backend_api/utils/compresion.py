@@ -0,0 +1,93 @@
+"""
+Compresión de respuestas según Accept-Encoding (after_request).
+
+- br (si el módulo brotli está instalado) o gzip, respetando las
+  preferencias (q=) del cliente
+- respuestas completas: solo si superan COMPRESION_CONFIG["umbral"] bytes
+- respuestas en streaming (exportaciones): se comprime cada bloque a
+  medida que sale, sin esperar al final
+- el ETag pasa a débil: identifica el contenido, no los bytes comprimidos
+"""
+import zlib
+
+from flask import request
+
+from config import COMPRESION_CONFIG
+
+try:
+    import brotli
+except ImportError:     # Sin brotli se ofrece solo gzip
+    brotli = None
+
+TIPOS_COMPRIMIBLES = {
+    "application/json", "application/msgpack", "application/x-ndjson",
+    "text/csv", "text/plain", "text/html",
+}
+CODIFICACIONES = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def _elegir_codificacion():
+    mejor = request.accept_encodings.best_match(CODIFICACIONES)
+    return mejor if mejor in CODIFICACIONES else None
+
+
+def _compresor(codificacion):
+    """(comprimir_bloque, terminar) con vaciado por bloque para el streaming"""
+    if codificacion == "br":
+        c = brotli.Compressor(quality=COMPRESION_CONFIG["calidad_brotli"])
+        return lambda bloque: c.process(bloque) + c.flush(), c.finish
+    c = zlib.compressobj(COMPRESION_CONFIG["nivel_gzip"], zlib.DEFLATED, 31)    # 31: formato gzip
+    return lambda bloque: c.compress(bloque) + c.flush(zlib.Z_SYNC_FLUSH), c.flush
+
+
+def comprimir_datos(datos, codificacion):
+    if codificacion == "br":
+        return brotli.compress(datos, quality=COMPRESION_CONFIG["calidad_brotli"])
+    c = zlib.compressobj(COMPRESION_CONFIG["nivel_gzip"], zlib.DEFLATED, 31)
+    return c.compress(datos) + c.flush()
+
+
+def _comprimir_stream(original, bloques, codificacion):
+    comprimir, terminar = _compresor(codificacion)
+    try:
+        for bloque in bloques:
+            salida = comprimir(bloque)
+            if salida:
+                yield salida
+        yield terminar()
+    finally:
+        # Devuelve la conexión del stream al pool aunque el cliente corte la descarga
+        if hasattr(original, "close"):
+            original.close()
+
+
+def comprimir(response):
+    """after_request: comprime si el cliente lo acepta y vale la pena"""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in TIPOS_COMPRIMIBLES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    codificacion = _elegir_codificacion()
+    if codificacion is None:
+        return response
+
+    if response.is_streamed:
+        if not COMPRESION_CONFIG["streaming"]:
+            return response
+        original = response.response
+        response.response = _comprimir_stream(original, response.iter_encoded(), codificacion)
+        response.headers.pop("Content-Length", None)
+    else:
+        datos = response.get_data()
+        if len(datos) < COMPRESION_CONFIG["umbral"]:
+            return response
+        response.set_data(comprimir_datos(datos, codificacion))
+
+    response.headers["Content-Encoding"] = codificacion
+    etag, debil = response.get_etag()
+    if etag and not debil:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,220 @@
+"""
+GET condicional (ETag / Last-Modified -> 304) y Cache-Control por blueprint.
+
+versiones_recursos guarda un contador por tabla (alumnos, cursos,
+matriculas, evaluaciones). Cada escritura exitosa incrementa los de las
+tablas que toca, así que las versiones de las tablas de las que depende
+una ruta identifican su contenido en todos los procesos del servidor.
+Cada contador se reparte en FRAGMENTOS filas y la lectura las suma: la
+escritura sube una fila al azar y la mantiene bloqueada hasta su commit,
+así solo esperan entre sí las escrituras que caen en el mismo fragmento
+(con una sola fila por tabla todas las escrituras se ordenaban detrás de
+ella, igual que pasaba con resumen_ciclos).
+
+- before_request (GET): lee las versiones con una consulta por clave
+  primaria; si coinciden con If-None-Match responde 304 sin ejecutar la
+  vista (ni su consulta)
+- after_request: agrega ETag, Last-Modified y Cache-Control a los GET
+- las escrituras llaman a versionar(cursor, blueprint) antes del commit:
+  la versión sube en la misma transacción que los datos, solo si algo se
+  confirma (un POST de simulación, como el arrastre con dry_run, no la
+  toca) y no se pierde si la request falla después. Si la tabla no
+  existe la escritura sigue sin ETag; cualquier otro error (espera de
+  bloqueo agotada, deadlock) hace fallar la escritura, para que los datos
+  no se confirmen con la versión vieja
+
+Qué lee y qué modifica cada blueprint está en CACHE_HTTP_CONFIG. Las rutas
+cuya respuesta no sale solo de la BD se excluyen con @sin_condicional.
+Si la BD se modifica por fuera de la API, llamar a incrementar().
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, g, has_request_context, request
+
+from config import CACHE_HTTP_CONFIG
+from db import Error, get_connection, tabla_inexistente
+from utils.logger import registrar_log
+from utils.serializacion import formato_respuesta
+
+RECURSOS = ("alumnos", "cursos", "matriculas", "evaluaciones")
+FRAGMENTOS = 16     # Se puede subir (completar_fragmentos agrega las filas); bajarlo pierde versiones
+
+
+def completar_fragmentos(cursor):
+    """Crea en 0 las filas (recurso, fragmento) que falten"""
+    cursor.execute("SELECT recurso, fragmento FROM versiones_recursos")
+    existentes = {(fila[0], fila[1]) for fila in cursor.fetchall()}
+    faltantes = [(r, f) for r in RECURSOS for f in range(FRAGMENTOS) if (r, f) not in existentes]
+    if faltantes:
+        cursor.executemany("INSERT INTO versiones_recursos (recurso, fragmento, version) VALUES (%s, %s, 0)",
+                           faltantes)
+
+
+TABLAS_VERSIONES_RECURSOS = [
+    """
+CREATE TABLE IF NOT EXISTS versiones_recursos (
+    recurso VARCHAR(50) NOT NULL,
+    fragmento INTEGER NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    actualizado TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (recurso, fragmento)
+)
+""",
+    completar_fragmentos
+]
+
+
+def sin_condicional(vista):
+    """Excluye una vista (p. ej. estado en memoria del proceso) del ETag por versiones"""
+    vista.sin_condicional = True
+    return vista
+
+
+# ============================
+# VERSIONES
+# ============================
+def _a_fecha(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        valor = datetime.strptime(valor[:19], "%Y-%m-%d %H:%M:%S")
+    return valor if valor.tzinfo else valor.replace(tzinfo=timezone.utc)
+
+
+def _conexion():
+    """get_connection() devuelve None con el pool agotado o la BD caída: aquí es un Error"""
+    conn = get_connection()
+    if conn is None:
+        raise Error("Sin conexión a la base de datos para versiones_recursos")
+    return conn
+
+
+def leer_versiones(recursos):
+    """({recurso: version}, última modificación) en una sola consulta (suma de los fragmentos)"""
+    conn = _conexion()
+    try:
+        cursor = conn.cursor()
+        placeholders = ",".join(["%s"] * len(recursos))
+        cursor.execute(f"SELECT recurso, SUM(version), MAX(actualizado) FROM versiones_recursos "
+                       f"WHERE recurso IN ({placeholders}) GROUP BY recurso", tuple(recursos))
+        filas = cursor.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+    versiones = {recurso: int(version) for recurso, version, _ in filas}     # SUM es DECIMAL en MySQL
+    fechas = [f for f in (_a_fecha(fila[2]) for fila in filas) if f is not None]
+    return versiones, max(fechas) if fechas else None
+
+
+def incrementar_con(cursor, recursos):
+    """
+    Dentro de la transacción del llamador. Sube en 1 la suma de cada recurso
+    tocando un solo fragmento, el mismo para todos (las filas se bloquean
+    por clave ascendente y dos escrituras no se cruzan).
+    """
+    placeholders = ",".join(["%s"] * len(recursos))
+    cursor.execute(f"UPDATE versiones_recursos SET version = version + 1, actualizado = CURRENT_TIMESTAMP "
+                   f"WHERE recurso IN ({placeholders}) AND fragmento = %s",
+                   (*recursos, random.randrange(FRAGMENTOS)))
+
+
+def versionar(cursor, blueprint):
+    """
+    Sube las versiones que modifica el blueprint (CACHE_HTTP_CONFIG), dentro
+    de la transacción de la escritura. Sin la tabla (migraciones sin aplicar)
+    se registra y la escritura sigue; otro error se propaga y la escritura
+    se deshace, porque confirmarla sin subir la versión dejaría a los
+    clientes recibiendo 304 con datos viejos.
+    """
+    recursos = CACHE_HTTP_CONFIG.get(blueprint, {}).get("modifica")
+    if not recursos:
+        return
+    try:
+        incrementar_con(cursor, recursos)
+    except Error as e:
+        if not tabla_inexistente(e):
+            raise
+        registrar_log("sistema", "ERROR", f"No se pudo actualizar versiones_recursos: {e}")
+
+
+def incrementar(recursos=RECURSOS):
+    conn = _conexion()
+    try:
+        incrementar_con(conn.cursor(), recursos)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def version_datos():
+    """Versiones leídas por esta request (None fuera de las rutas condicionales).
+    Sirve de clave para las cachés en memoria: un cambio hecho en otro proceso
+    las deja sin efecto, igual que al ETag"""
+    return g.get("version_datos") if has_request_context() else None
+
+
+def version_recurso(recurso):
+    """Versión de una tabla leída por esta request, o None"""
+    return g.get("versiones", {}).get(recurso) if has_request_context() else None
+
+
+# ============================
+# HOOKS
+# ============================
+def _politica():
+    """Configuración del blueprint de la request (None si no participa)"""
+    if request.blueprint not in CACHE_HTTP_CONFIG:
+        return None
+    vista = current_app.view_functions.get(request.endpoint)
+    if vista is None or getattr(vista, "sin_condicional", False):
+        return None
+    return CACHE_HTTP_CONFIG[request.blueprint]
+
+
+def _no_modificado(etag, ultima):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    ims = request.if_modified_since
+    # Last-Modified tiene resolución de segundos: solo se confía en segundos ya cerrados
+    return (ims is not None and ultima is not None and ultima <= ims
+            and ultima < datetime.now(timezone.utc) - timedelta(seconds=1))
+
+
+def verificar():
+    """before_request: 304 si el cliente ya tiene la versión actual"""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    politica = _politica()
+    if politica is None:
+        return None
+    try:
+        versiones, ultima = leer_versiones(politica["lee"])
+    except Error as e:
+        # Sin la tabla (migraciones sin aplicar) se responde normal, sin ETag
+        registrar_log("sistema", "WARN", f"GET condicional desactivado: {e}")
+        return None
+
+    g.versiones = versiones
+    g.version_datos = "-".join(str(versiones.get(r, 0)) for r in politica["lee"])
+    etag = f"{formato_respuesta()}-{g.version_datos}"
+    g.condicional = (etag, ultima, politica["cache_control"])
+    if _no_modificado(etag, ultima):
+        return current_app.response_class(status=304)
+    return None
+
+
+def marcar(response):
+    """after_request: cabeceras de caché en los GET (las versiones las sube cada escritura)"""
+    if "condicional" not in g or response.status_code not in (200, 304):
+        return response
+    if response.cache_control.no_store:    # La vista pidió no guardar esta respuesta (p. ej. parcial)
+        return response
+    etag, ultima, cache_control = g.condicional
+    if response.get_etag()[0] is None:
+        response.set_etag(etag)
+    if ultima is not None:
+        response.last_modified = ultima
+    response.headers["Cache-Control"] = cache_control
+    response.vary.update(("Accept", "Accept-Encoding"))
+    return response
@@ -1,15 +1,194 @@
 import os
+import atexit
+import queue
+import threading
 from datetime import datetime, timezone
 import time
-from flask import request
+from flask import request, g, has_request_context
+from config import LOG_CONFIG
 
 # Ruta fija del backend
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 BASE_LOG_DIR = os.path.join(BASE_DIR, "..", "logs")
 BASE_LOG_DIR = os.path.abspath(BASE_LOG_DIR)
 
-# Variable global para medir tiempos de procesamiento
-tiempos_inicio = {}
+# ============================
+# ESCRITOR DE LOGS EN SEGUNDO PLANO
+# ============================
+class EscritorLogs:
+    """
+    Hilo dedicado que escribe los logs por lotes:
+    - registrar_log solo encola la línea (sin abrir archivos en la request)
+    - se escribe al juntar batch_size líneas o cada flush_interval segundos
+    - los archivos quedan abiertos y rotan por tamaño y/o por fecha
+    - con sufijo (un worker de servidor.py) escribe en archivos propios,
+      modulo.<sufijo>.log: cada proceso rota solo los suyos y ninguno
+      renombra un archivo en el que otro está escribiendo
+    - cerrar() vacía la cola antes de terminar
+    """
+
+    _FIN = object()
+
+    def __init__(self, base_dir, batch_size=200, flush_interval=0.5, queue_size=10000,
+                 max_bytes=0, backup_count=5, rotar_diario=True, sufijo=None):
+        self.base_dir = base_dir
+        self.sufijo = f".{sufijo}" if sufijo else ""
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotar_diario = rotar_diario
+
+        self._cola = queue.Queue(maxsize=queue_size)
+        self._archivos = {}       # ruta -> (archivo, fecha de apertura)
+        self._hilo = threading.Thread(target=self._ejecutar, name="escritor-logs", daemon=True)
+        self._hilo.start()
+
+    def encolar(self, modulo, linea):
+        self._cola.put((modulo, linea))
+
+    def profundidad(self):
+        return self._cola.qsize()
+
+    def cerrar(self, timeout=5):
+        self._cola.put(self._FIN)
+        self._hilo.join(timeout)
+
+    # ---------- hilo escritor ----------
+    def _ejecutar(self):
+        pendientes = {}
+        total = 0
+        limite = time.monotonic() + self.flush_interval
+        activo = True
+
+        while activo:
+            try:
+                item = self._cola.get(timeout=max(limite - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            if item is self._FIN:
+                activo = False
+            elif item is not None:
+                modulo, linea = item
+                pendientes.setdefault(os.path.join(modulo, f"{modulo}{self.sufijo}.log"), []).append(linea)
+                pendientes.setdefault(f"sistema_completo{self.sufijo}.log", []).append(linea)
+                total += 1
+
+            if total and (total >= self.batch_size or not activo or time.monotonic() >= limite):
+                self._escribir(pendientes)
+                pendientes = {}
+                total = 0
+            if time.monotonic() >= limite:
+                limite = time.monotonic() + self.flush_interval
+
+        for archivo, _ in self._archivos.values():
+            archivo.close()
+        self._archivos = {}
+
+    def _escribir(self, pendientes):
+        for relativa, lineas in pendientes.items():
+            datos = "".join(lineas)
+            try:
+                archivo = self._archivo(os.path.join(self.base_dir, relativa), len(datos))
+                archivo.write(datos)
+                archivo.flush()
+            except OSError as e:
+                print("🔥 ERROR ESCRIBIENDO LOG:", e)
+
+    def _archivo(self, ruta, por_escribir):
+        hoy = datetime.now(timezone.utc).date()
+        abierto = self._archivos.get(ruta)
+
+        if abierto:
+            archivo, fecha = abierto
+            if self.rotar_diario and fecha != hoy:
+                archivo.close()
+                self._rotar_fecha(ruta, fecha)
+                abierto = None
+            elif self._excede(archivo, por_escribir):
+                archivo.close()
+                self._rotar_tamano(ruta)
+                abierto = None
+
+        if not abierto:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            fecha = hoy
+            if os.path.exists(ruta):
+                # Conservar la fecha del archivo existente para rotarlo al cambiar el día
+                fecha = datetime.fromtimestamp(os.path.getmtime(ruta), timezone.utc).date()
+            abierto = (open(ruta, "a", encoding="utf-8"), fecha)
+            self._archivos[ruta] = abierto
+            if (self.rotar_diario and fecha != hoy) or self._excede(abierto[0], por_escribir):
+                return self._archivo(ruta, por_escribir)
+
+        return abierto[0]
+
+    def _excede(self, archivo, por_escribir):
+        # Un archivo vacío nunca se rota, aunque el lote supere max_bytes
+        posicion = archivo.tell()
+        return bool(self.max_bytes) and posicion > 0 and posicion + por_escribir > self.max_bytes
+
+    def _rotar_fecha(self, ruta, fecha):
+        del self._archivos[ruta]
+        destino = f"{ruta}.{fecha.isoformat()}"
+        n = 1
+        while os.path.exists(destino):
+            destino = f"{ruta}.{fecha.isoformat()}.{n}"
+            n += 1
+        os.replace(ruta, destino)
+
+    def _rotar_tamano(self, ruta):
+        del self._archivos[ruta]
+        if self.backup_count <= 0:
+            os.remove(ruta)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{ruta}.{i}"):
+                os.replace(f"{ruta}.{i}", f"{ruta}.{i + 1}")
+        os.replace(ruta, f"{ruta}.1")
+
+
+_escritor = None
+_escritor_pid = None
+_escritor_lock = threading.Lock()
+_sufijo = None
+
+
+def _get_escritor():
+    """Escritor del proceso actual (se recrea tras un fork)"""
+    global _escritor, _escritor_pid
+    if _escritor is None or _escritor_pid != os.getpid():
+        with _escritor_lock:
+            if _escritor is None or _escritor_pid != os.getpid():
+                _escritor = EscritorLogs(BASE_LOG_DIR, sufijo=_sufijo, **LOG_CONFIG)
+                _escritor_pid = os.getpid()
+    return _escritor
+
+
+def archivos_propios(sufijo):
+    """Logs de este proceso en archivos propios (modulo.<sufijo>.log), antes del primer registrar_log"""
+    global _sufijo
+    _sufijo = sufijo
+
+
+def cerrar_logs():
+    """Escribe todo lo pendiente y detiene el hilo escritor"""
+    global _escritor
+    with _escritor_lock:
+        if _escritor is not None and _escritor_pid == os.getpid():
+            _escritor.cerrar()
+        _escritor = None
+
+
+def profundidad_cola_logs():
+    """Líneas de log en cola pendientes de escribir"""
+    if _escritor is None or _escritor_pid != os.getpid():
+        return 0
+    return _escritor.profundidad()
+
+
+atexit.register(cerrar_logs)
 
 
 def registrar_log(modulo: str, nivel: str, mensaje: str):
@@ -30,8 +209,8 @@ def registrar_log(modulo: str, nivel: str, mensaje: str):
     now = datetime.now(timezone.utc)
     timestamp = now.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
     
-    # 2. TRANSACTION ID ÚNICO
-    tx_id = f"TX-{int(time.time() * 1000000) % 1000000000}"
+    # 2. TRANSACTION ID ÚNICO (compartido por todas las líneas de la request)
+    tx_id = g.tx_id if has_request_context() and "tx_id" in g else nuevo_tx_id()
     
     # 3. IP DEL CLIENTE (manejando X-Forwarded-For para proxies)
     ip_cliente = "UNKNOWN"
@@ -59,21 +238,17 @@ def registrar_log(modulo: str, nivel: str, mensaje: str):
     except:
         pass
     
-    # 6. CÓDIGO HTTP STATUS
-    status_code = 200
-    try:
-        if request:
-            # Intentar obtener el status code del contexto
-            status_code = getattr(request, '_status_code', 200)
-    except:
-        pass
-    
-    # 7. TIEMPO DE PROCESAMIENTO (si está disponible)
+    # 6. CÓDIGO HTTP STATUS (real, lo fija after_request; "---" si aún no hay respuesta)
+    status_code = "---"
+    # 7. TIEMPO DE PROCESAMIENTO (medido desde before_request)
     duracion_ms = ""
-    request_id = id(request) if request else None
-    if request_id and request_id in tiempos_inicio:
-        duracion = (time.time() - tiempos_inicio[request_id]) * 1000
-        duracion_ms = f" [{duracion:.2f}ms]"
+    if has_request_context():
+        status_code = g.get("status_code", "---")
+        if "duracion_ms" in g:
+            duracion_ms = f" [{g.duracion_ms:.2f}ms]"
+        elif "inicio" in g:
+            duracion = (time.perf_counter() - g.inicio) * 1000
+            duracion_ms = f" [{duracion:.2f}ms]"
     
     # FORMATO COMPLETO DEL LOG CON TODOS LOS METADATOS
     linea_log = (
@@ -88,37 +263,50 @@ def registrar_log(modulo: str, nivel: str, mensaje: str):
         f"{mensaje}\n"
     )
     
-    # Crear carpeta del módulo si no existe
-    ruta_modulo = os.path.join(BASE_LOG_DIR, modulo)
-    os.makedirs(ruta_modulo, exist_ok=True)
-    
-    # Guardar en archivo del módulo
-    ruta_log = os.path.join(ruta_modulo, f"{modulo}.log")
-    with open(ruta_log, "a", encoding="utf-8") as file:
-        file.write(linea_log)
-    
-    # También guardar en log centralizado
-    log_centralizado = os.path.join(BASE_LOG_DIR, "sistema_completo.log")
-    with open(log_centralizado, "a", encoding="utf-8") as file:
-        file.write(linea_log)
+    # Escritura diferida: el hilo escritor agrega la línea al log del módulo
+    # y al log centralizado
+    _get_escritor().encolar(modulo, linea_log)
 
 
-def iniciar_medicion():
-    """Inicia el contador de tiempo para la request actual"""
-    try:
-        if request:
-            request_id = id(request)
-            tiempos_inicio[request_id] = time.time()
-    except:
-        pass
+def nuevo_tx_id():
+    return f"TX-{int(time.time() * 1000000) % 1000000000}"
 
 
-def finalizar_medicion():
-    """Limpia el contador de tiempo de la request"""
-    try:
-        if request:
-            request_id = id(request)
-            if request_id in tiempos_inicio:
-                del tiempos_inicio[request_id]
-    except:
-        pass
\ No newline at end of file
+# ============================
+# MEDICIÓN POR REQUEST (hooks de la app)
+# ============================
+def iniciar_request():
+    """before_request: marca el inicio y asigna el Transaction ID"""
+    g.inicio = time.perf_counter()
+    g.tx_id = nuevo_tx_id()
+
+
+def finalizar_request(response):
+    """after_request: guarda el status real y escribe la línea de acceso"""
+    g.status_code = response.status_code
+    response.headers["X-Transaction-ID"] = g.get("tx_id", "")
+    registrar_acceso(response.status_code)
+    return response
+
+
+def cerrar_request(error=None):
+    """teardown_request: registra la request si after_request no llegó a ejecutarse"""
+    if not g.get("acceso_registrado"):
+        g.status_code = 500
+        registrar_acceso(500, error)
+
+
+def registrar_acceso(status_code, error=None):
+    """Una línea estructurada por request en logs/acceso/acceso.log"""
+    g.acceso_registrado = True
+    duracion = (time.perf_counter() - g.inicio) * 1000 if "inicio" in g else 0.0
+    g.duracion_ms = duracion
+    nivel = "ERROR" if status_code >= 500 else "WARN" if status_code >= 400 else "INFO"
+    mensaje = (
+        f"endpoint={request.endpoint or '-'} "
+        f"status={status_code} "
+        f"duracion_ms={duracion:.2f}"
+    )
+    if error is not None:
+        mensaje += f" error={type(error).__name__}"
+    registrar_log("acceso", nivel, mensaje)
@@ -0,0 +1,225 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from flask import request, g, has_request_context
+
+# Límites (en segundos) de los histogramas de latencia
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear_etiquetas(nombres, valores, extra=""):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+# ============================
+# TIPOS DE MÉTRICA
+# ============================
+class Contador:
+    """Contador monotónico por combinación de etiquetas"""
+
+    tipo = "counter"
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valores=(), cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def muestras(self):
+        with self._lock:
+            valores = list(self._valores.items())
+        for etiquetas, valor in sorted(valores):
+            yield f"{self.nombre}{_formatear_etiquetas(self.etiquetas, etiquetas)} {_numero(valor)}"
+
+
+class Histograma:
+    """Histograma acumulado por buckets (formato Prometheus)"""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}          # etiquetas -> [conteo por bucket..., +Inf, suma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, valores=()):
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [0] * (len(self.buckets) + 2)
+            serie[indice] += 1
+            serie[-1] += valor
+
+    def muestras(self):
+        with self._lock:
+            series = [(k, list(v)) for k, v in self._series.items()]
+        for etiquetas, serie in sorted(series):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + ("+Inf",), serie[:-1]):
+                acumulado += conteo
+                le = f'le="{limite}"'
+                yield f"{self.nombre}_bucket{_formatear_etiquetas(self.etiquetas, etiquetas, le)} {acumulado}"
+            base = _formatear_etiquetas(self.etiquetas, etiquetas)
+            yield f"{self.nombre}_sum{base} {_numero(serie[-1])}"
+            yield f"{self.nombre}_count{base} {acumulado}"
+
+
+class Medidor:
+    """Valor instantáneo calculado al momento de exponer (gauge)"""
+
+    tipo = "gauge"
+
+    def __init__(self, nombre, ayuda, funcion):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+
+    def muestras(self):
+        try:
+            valor = self.funcion()
+        except Exception:
+            return
+        yield f"{self.nombre} {_numero(valor)}"
+
+
+# ============================
+# REGISTRO
+# ============================
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica):
+        # Idempotente: create_app puede llamarse varias veces en el mismo proceso
+        with self._lock:
+            return self._metricas.setdefault(metrica.nombre, metrica)
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def medidor(self, nombre, ayuda, funcion):
+        with self._lock:
+            self._metricas[nombre] = Medidor(nombre, ayuda, funcion)
+
+    def exponer(self):
+        """Texto en formato de exposición Prometheus 0.0.4"""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        lineas = []
+        for m in metricas:
+            lineas.append(f"# HELP {m.nombre} {m.ayuda}")
+            lineas.append(f"# TYPE {m.nombre} {m.tipo}")
+            lineas.extend(m.muestras())
+        return "\n".join(lineas) + "\n"
+
+
+registro = RegistroMetricas()
+
+ETIQUETAS_RUTA = ("blueprint", "ruta", "metodo", "status")
+
+requests_total = registro.contador(
+    "http_requests_total", "Requests atendidas", ETIQUETAS_RUTA)
+request_duracion = registro.histograma(
+    "http_request_duracion_segundos", "Latencia de la request", ETIQUETAS_RUTA)
+db_consultas_total = registro.contador(
+    "db_consultas_total", "Sentencias SQL ejecutadas", ("blueprint", "ruta"))
+db_consulta_duracion = registro.histograma(
+    "db_consulta_duracion_segundos", "Duración de cada sentencia SQL")
+db_consultas_request = registro.histograma(
+    "db_consultas_por_request", "Sentencias SQL por request", ("blueprint", "ruta"), BUCKETS_CONSULTAS)
+db_tiempo_request = registro.histograma(
+    "db_tiempo_por_request_segundos", "Tiempo en BD por request", ("blueprint", "ruta"))
+pool_espera = registro.histograma(
+    "db_pool_espera_segundos", "Espera para obtener una conexión del pool")
+
+
+def _ruta_actual():
+    regla = request.url_rule
+    return (request.blueprint or "app", regla.rule if regla is not None else "sin_ruta")
+
+
+# ============================
+# PUNTOS DE MEDICIÓN
+# ============================
+_hilo = threading.local()
+
+
+def registrar_consulta(duracion):
+    """Llamado por el cursor medido de db.py tras cada execute/executemany"""
+    db_consulta_duracion.observar(duracion)
+    medicion = getattr(_hilo, "medicion", None)
+    if medicion is not None:
+        medicion[0] += 1
+        medicion[1] += duracion
+    elif has_request_context():
+        g.db_consultas = g.get("db_consultas", 0) + 1
+        g.db_tiempo = g.get("db_tiempo", 0.0) + duracion
+
+
+@contextmanager
+def medir_consultas(medicion):
+    """
+    En un hilo auxiliar (secciones del tablero): las consultas del hilo se
+    acumulan en medicion = [cantidad, segundos] en lugar de en `g`, que es
+    de la request y no se comparte entre hilos. El dueño de la request las
+    agrega después con sumar_consultas.
+    """
+    _hilo.medicion = medicion
+    try:
+        yield medicion
+    finally:
+        _hilo.medicion = None
+
+
+def sumar_consultas(cantidad, segundos):
+    """Suma a la request actual consultas medidas en otro hilo"""
+    if cantidad and has_request_context():
+        g.db_consultas = g.get("db_consultas", 0) + cantidad
+        g.db_tiempo = g.get("db_tiempo", 0.0) + segundos
+
+
+def registrar_espera_pool(duracion):
+    pool_espera.observar(duracion)
+
+
+def registrar_request(response):
+    """after_request: contador, latencia y uso de BD de la request"""
+    blueprint, ruta = _ruta_actual()
+    etiquetas = (blueprint, ruta, request.method, str(response.status_code))
+    duracion = time.perf_counter() - g.inicio if "inicio" in g else 0.0
+
+    requests_total.inc(etiquetas)
+    request_duracion.observar(duracion, etiquetas)
+
+    consultas = g.get("db_consultas", 0)
+    if consultas:
+        db_consultas_total.inc((blueprint, ruta), consultas)
+    db_consultas_request.observar(consultas, (blueprint, ruta))
+    db_tiempo_request.observar(g.get("db_tiempo", 0.0), (blueprint, ruta))
+    return response
@@ -0,0 +1,141 @@
+import base64
+import json
+from flask import request
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+
+class ErrorPaginacion(ValueError):
+    """Parámetros limit / after / fields inválidos (se responde 400)"""
+
+
+def _codificar_cursor(valores):
+    texto = json.dumps(valores, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decodificar_cursor(token, cantidad):
+    try:
+        relleno = "=" * (-len(token) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(token + relleno).decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        raise ErrorPaginacion("El cursor 'after' no es válido.")
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise ErrorPaginacion("El cursor 'after' no es válido.")
+    return valores
+
+
+# ============================
+# DEFINICIÓN POR ENDPOINT
+# ============================
+class Paginacion:
+    """
+    Describe un listado paginable:
+    - campos: nombre público -> expresión SQL (lo que admite fields=)
+    - orden: [(expresión SQL, "ASC"/"DESC")] clave del cursor (debe ser única,
+      por eso termina siempre en el id o en una columna UNIQUE)
+    - por_defecto: campos devueltos cuando no se envía fields= (todos si es None)
+    """
+
+    def __init__(self, campos, orden, por_defecto=None):
+        self.campos = campos
+        self.orden = orden
+        self.por_defecto = list(por_defecto or campos)
+
+    def leer(self, stream=False):
+        """
+        Lee limit, after y fields de la query string.
+        Con stream=True (exportaciones) no se admite limit: after solo
+        indica desde dónde continuar.
+        """
+        args = request.args
+        limite = args.get("limit")
+        despues = args.get("after")
+        fields = args.get("fields")
+
+        if limite is not None:
+            try:
+                limite = int(limite)
+            except ValueError:
+                raise ErrorPaginacion("'limit' debe ser un número entero.")
+            if limite < 1 or limite > LIMITE_MAXIMO:
+                raise ErrorPaginacion(f"'limit' debe estar entre 1 y {LIMITE_MAXIMO}.")
+            if stream:
+                raise ErrorPaginacion("'limit' no aplica a las respuestas en streaming.")
+        elif despues is not None and not stream:
+            limite = LIMITE_POR_DEFECTO
+
+        if despues is not None:
+            despues = _decodificar_cursor(despues, len(self.orden))
+
+        if fields:
+            campos = [c.strip() for c in fields.split(",") if c.strip()]
+            desconocidos = [c for c in campos if c not in self.campos]
+            if desconocidos:
+                raise ErrorPaginacion(f"Campos no disponibles: {', '.join(desconocidos)}")
+        else:
+            campos = list(self.por_defecto)
+
+        return ConsultaPaginada(self, limite, despues, campos)
+
+
+class ConsultaPaginada:
+    def __init__(self, paginacion, limite, despues, campos):
+        self.paginacion = paginacion
+        self.limite = limite
+        self.despues = despues
+        self.campos = campos
+
+    @property
+    def paginada(self):
+        """True si se pidió limit/after: la respuesta lleva cursor siguiente"""
+        return self.limite is not None
+
+    def sql(self, desde, donde=None, params=()):
+        """
+        Arma SELECT <campos> FROM <desde> WHERE <donde> AND <keyset>
+        ORDER BY <orden> LIMIT <limite + 1> (la fila extra indica si hay más)
+        """
+        orden = self.paginacion.orden
+        columnas = [f"{self.paginacion.campos[c]} AS {c}" for c in self.campos]
+        columnas += [f"{expr} AS _k{i}" for i, (expr, _) in enumerate(orden)]
+
+        condiciones = [donde] if donde else []
+        params = list(params)
+
+        if self.despues is not None:
+            # (k0 > v0) OR (k0 = v0 AND k1 > v1) ... (se expande para usar índices)
+            alternativas = []
+            for i, (expr, direccion) in enumerate(orden):
+                iguales = [f"{orden[j][0]} = %s" for j in range(i)]
+                op = "<" if direccion == "DESC" else ">"
+                alternativas.append("(" + " AND ".join(iguales + [f"{expr} {op} %s"]) + ")")
+                params.extend(self.despues[:i + 1])
+            condiciones.append("(" + " OR ".join(alternativas) + ")")
+
+        sql = f"SELECT {', '.join(columnas)} FROM {desde}"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY " + ", ".join(f"{expr} {direccion}" for expr, direccion in orden)
+        if self.limite is not None:
+            sql += f" LIMIT {self.limite + 1}"
+        return sql, tuple(params)
+
+    def proyectar(self, fila):
+        """Fila con solo los campos pedidos (sin las columnas de la clave)"""
+        return {c: fila[c] for c in self.campos}
+
+    def resultado(self, filas):
+        """Quita las columnas de la clave y arma la respuesta (lista o página)"""
+        claves = [f"_k{i}" for i in range(len(self.paginacion.orden))]
+        siguiente = None
+
+        if self.limite is not None and len(filas) > self.limite:
+            filas = filas[:self.limite]
+            siguiente = _codificar_cursor([filas[-1][k] for k in claves])
+
+        datos = [self.proyectar(fila) for fila in filas]
+        if not self.paginada:
+            return datos
+        return {"datos": datos, "siguiente": siguiente}
@@ -0,0 +1,112 @@
+"""
+Serialización de las respuestas de la API (lo que hace jsonify).
+
+ProveedorJSON reemplaza al codificador de Flask por orjson (si está
+instalado) conservando su salida: claves ordenadas, fechas en formato
+HTTP y Decimal como texto. Además, según la request:
+
+- ?columnar=1: cada lista de objetos se envía como
+  {"columnas": [...], "filas": [[...], ...]} (nombres de campo una vez)
+- Accept: application/msgpack: MessagePack en lugar de JSON (si msgpack
+  está instalado)
+
+Las rutas no cambian: siguen llamando a jsonify().
+"""
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+from operator import itemgetter
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:     # Sin orjson se usa el codificador estándar de Flask
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:     # Sin msgpack solo se responde JSON
+    msgpack = None
+
+MIME_JSON = "application/json"
+MIME_MSGPACK = "application/msgpack"
+FORMATOS_RESPUESTA = ("json", "msgpack")
+
+if orjson is not None:
+    OPCIONES_ORJSON = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _por_defecto(o):
+    """Tipos que ni orjson ni msgpack codifican como lo hace Flask"""
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+# ============================
+# NEGOCIACIÓN
+# ============================
+def formato_respuesta():
+    """'msgpack' si el cliente lo prefiere (y está disponible), si no 'json'"""
+    if msgpack is None or not has_request_context():
+        return "json"
+    mejor = request.accept_mimetypes.best_match([MIME_JSON, MIME_MSGPACK, "application/x-msgpack"])
+    return "json" if mejor in (None, MIME_JSON) else "msgpack"
+
+
+def pide_columnar():
+    return has_request_context() and request.args.get("columnar") in ("1", "true")
+
+
+def a_columnas(obj):
+    """Listas de objetos con los mismos campos -> {columnas, filas}; recorre los dict anidados"""
+    if isinstance(obj, dict):
+        return {k: a_columnas(v) for k, v in obj.items()}
+    if isinstance(obj, list) and obj and isinstance(obj[0], dict) and obj[0]:
+        claves = obj[0].keys()
+        if all(isinstance(f, dict) and f.keys() == claves for f in obj):
+            columnas = list(claves)
+            fila = itemgetter(*columnas)
+            if len(columnas) == 1:
+                return {"columnas": columnas, "filas": [[fila(f)] for f in obj]}
+            return {"columnas": columnas, "filas": [fila(f) for f in obj]}   # tuplas: se codifican como arreglos
+    return obj
+
+
+# ============================
+# PROVEEDOR
+# ============================
+class ProveedorJSON(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_por_defecto, option=OPCIONES_ORJSON).decode("utf-8")
+
+    def _codificar(self, obj):
+        if orjson is None:
+            return super().dumps(obj).encode("utf-8")
+        return orjson.dumps(obj, default=_por_defecto, option=OPCIONES_ORJSON)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if pide_columnar():
+            obj = a_columnas(obj)
+
+        if formato_respuesta() == "msgpack":
+            respuesta = self._app.response_class(
+                msgpack.packb(obj, default=_por_defecto, use_bin_type=True), mimetype=MIME_MSGPACK)
+        else:
+            respuesta = self._app.response_class(self._codificar(obj), mimetype=self.mimetype)
+        if msgpack is not None:
+            respuesta.vary.add("Accept")
+        return respuesta
@@ -0,0 +1,77 @@
+from flask import Response, current_app, jsonify, request, stream_with_context
+from db import get_connection
+
+# Filas leídas del cursor por cada fetchmany
+TAMANO_LOTE = 500
+
+FORMATOS_STREAM = {
+    "ndjson": "application/x-ndjson",        # un objeto JSON por línea
+    "json-stream": "application/json",       # arreglo JSON enviado por partes
+}
+
+
+class FormatoInvalido(ValueError):
+    """Valor de ?format= no soportado"""
+
+
+def leer_formato():
+    """None (respuesta normal) o el formato de streaming pedido en ?format="""
+    formato = request.args.get("format")
+    if formato is None or formato == "json":
+        return None
+    if formato not in FORMATOS_STREAM:
+        raise FormatoInvalido(f"Formato no soportado: {formato}. Use json, ndjson o json-stream.")
+    return formato
+
+
+def _cerrar(cursor, conn):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+    conn.close()
+
+
+def respuesta_stream(sql, params, formato, proyectar=None, tamano_lote=TAMANO_LOTE):
+    """
+    Ejecuta la consulta y devuelve una Response que va leyendo el cursor con
+    fetchmany: la memoria queda acotada por tamano_lote y el primer byte sale
+    sin esperar al resto. La conexión se devuelve al pool al terminar (o si
+    el cliente corta la descarga).
+    """
+    conn = get_connection()
+    if conn is None:
+        return jsonify({"error": "Error de conexión a la base de datos"}), 500
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+    except Exception:
+        conn.close()
+        raise
+
+    dumps = current_app.json.dumps
+
+    def generar():
+        try:
+            primero = True
+            if formato == "json-stream":
+                yield "["
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                if proyectar:
+                    filas = [proyectar(f) for f in filas]
+                if formato == "ndjson":
+                    yield "".join(dumps(f) + "\n" for f in filas)
+                else:
+                    bloque = ",".join(dumps(f) for f in filas)
+                    yield bloque if primero else "," + bloque
+                primero = False
+            if formato == "json-stream":
+                yield "]"
+        finally:
+            _cerrar(cursor, conn)
+
+    return Response(stream_with_context(generar()), mimetype=FORMATOS_STREAM[formato])
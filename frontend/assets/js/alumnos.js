@@ -17,21 +17,15 @@ const cicloInput = document.getElementById("ciclo");
 
 let alumnoIdEditar = null; // Variable clave
 
+// Paginación (cursor devuelto por el backend)
+const LIMITE_PAGINA = 50;
+let siguientePagina = null;
+
 // ==========================================
 //  LISTAR
 // ==========================================
-async function cargarAlumnos() {
-  tbody.innerHTML = '<tr><td colspan="8" class="text-center">Cargando...</td></tr>';
-  try {
-    const res = await fetch(API);
-    const data = await res.json();
-    
-    if (!data.length) {
-      tbody.innerHTML = '<tr><td colspan="8" class="text-center text-muted">No hay alumnos</td></tr>';
-      return;
-    }
-
-    tbody.innerHTML = data.map(a => `
+function filaAlumno(a) {
+  return `
       <tr class="align-middle">
         <td>${a.id}</td>
         <td>${a.apellido}, ${a.nombre}</td>
@@ -45,12 +39,83 @@ async function cargarAlumnos() {
           <button class="btn btn-sm btn-danger" onclick="eliminarAlumno(${a.id})">🗑️</button>
         </td>
       </tr>
-    `).join("");
+    `;
+}
+
+async function cargarAlumnos(masResultados = false) {
+  if (!masResultados) {
+    tbody.innerHTML = '<tr><td colspan="8" class="text-center">Cargando...</td></tr>';
+  }
+  try {
+    let url = `${API}?limit=${LIMITE_PAGINA}`;
+    if (masResultados && siguientePagina) url += `&after=${encodeURIComponent(siguientePagina)}`;
+    const res = await fetch(url);
+    const pagina = await res.json();
+    const data = pagina.datos;
+    siguientePagina = pagina.siguiente;
+    
+    if (!masResultados && !data.length) {
+      tbody.innerHTML = '<tr><td colspan="8" class="text-center text-muted">No hay alumnos</td></tr>';
+      return;
+    }
+
+    const filas = data.map(filaAlumno).join("");
+
+    document.getElementById("filaCargarMas")?.remove();
+    if (masResultados) tbody.insertAdjacentHTML("beforeend", filas);
+    else tbody.innerHTML = filas;
+
+    if (siguientePagina) {
+      tbody.insertAdjacentHTML("beforeend", `
+        <tr id="filaCargarMas"><td colspan="8" class="text-center">
+          <button class="btn btn-sm btn-outline-primary" onclick="cargarAlumnos(true)">Cargar más</button>
+        </td></tr>`);
+    }
+  } catch (error) {
+    tbody.innerHTML = '<tr><td colspan="8" class="text-center text-danger">Error de conexión</td></tr>';
+  }
+}
+
+// ==========================================
+//  BUSCAR (índice del backend: /api/alumnos/search)
+// ==========================================
+const buscarInput = document.getElementById("buscarAlumno");
+const LIMITE_BUSQUEDA = 20;
+let esperaBusqueda = null;
+
+async function buscarAlumnos(texto) {
+  try {
+    const res = await fetch(`${API}/search?q=${encodeURIComponent(texto)}&limit=${LIMITE_BUSQUEDA}`);
+    const resultado = await res.json();
+    if (buscarInput.value.trim() !== texto) return;   // Llegó tarde: ya se escribió otra cosa
+
+    if (!resultado.datos.length) {
+      tbody.innerHTML = '<tr><td colspan="8" class="text-center text-muted">Sin coincidencias</td></tr>';
+      return;
+    }
+    tbody.innerHTML = resultado.datos.map(filaAlumno).join("");
+    if (resultado.mas) {
+      tbody.insertAdjacentHTML("beforeend", `
+        <tr><td colspan="8" class="text-center text-muted small">
+          Se muestran los primeros ${LIMITE_BUSQUEDA}; agregue más texto para acotar
+        </td></tr>`);
+    }
   } catch (error) {
     tbody.innerHTML = '<tr><td colspan="8" class="text-center text-danger">Error de conexión</td></tr>';
   }
 }
 
+function refrescarLista() {
+  const texto = buscarInput.value.trim();
+  return texto ? buscarAlumnos(texto) : cargarAlumnos();
+}
+
+buscarInput.addEventListener("input", () => {
+  clearTimeout(esperaBusqueda);
+  esperaBusqueda = setTimeout(refrescarLista, 200);
+});
+document.getElementById("btnRefrescar").addEventListener("click", refrescarLista);
+
 // ==========================================
 //  PREPARAR EDICIÓN
 // ==========================================
@@ -115,7 +180,7 @@ form.addEventListener("submit", async (e) => {
 
     alert("Guardado correctamente");
     modal.hide();
-    cargarAlumnos(); // Refrescar tabla
+    refrescarLista(); // Refrescar tabla (o la búsqueda en curso)
 
   } catch (error) {
     alert(error.message);
@@ -129,7 +194,7 @@ window.eliminarAlumno = async (id) => {
   if (!confirm("¿Seguro de eliminar?")) return;
   try {
     await fetch(`${API}/${id}`, { method: "DELETE" });
-    cargarAlumnos();
+    refrescarLista();
   } catch (e) { alert("Error al eliminar"); }
 };
 
@@ -10,21 +10,31 @@ const tituloModal = document.querySelector("#modalEvaluacion .modal-title");
 
 let evaluacionIdEditar = null;
 
+// Paginación (cursor devuelto por el backend)
+const LIMITE_PAGINA = 50;
+let siguientePagina = null;
+
 // ==========================================
 //  LISTAR
 // ==========================================
-async function cargarEvaluaciones() {
-  tbody.innerHTML = '<tr><td colspan="7" class="text-center">Cargando...</td></tr>';
+async function cargarEvaluaciones(masResultados = false) {
+  if (!masResultados) {
+    tbody.innerHTML = '<tr><td colspan="7" class="text-center">Cargando...</td></tr>';
+  }
   try {
-    const res = await fetch(API);
-    const data = await res.json();
+    let url = `${API}?limit=${LIMITE_PAGINA}`;
+    if (masResultados && siguientePagina) url += `&after=${encodeURIComponent(siguientePagina)}`;
+    const res = await fetch(url);
+    const pagina = await res.json();
+    const data = pagina.datos;
+    siguientePagina = pagina.siguiente;
     
-    if(!data.length) {
+    if(!masResultados && !data.length) {
       tbody.innerHTML = '<tr><td colspan="7" class="text-center text-muted">No hay evaluaciones registradas</td></tr>';
       return;
     }
 
-    tbody.innerHTML = data.map(e => `
+    const filas = data.map(e => `
       <tr class="align-middle">
         <td>${e.id}</td>
         <td>${e.alumno}</td>
@@ -38,6 +48,17 @@ async function cargarEvaluaciones() {
         </td>
       </tr>
     `).join("");
+
+    document.getElementById("filaCargarMas")?.remove();
+    if (masResultados) tbody.insertAdjacentHTML("beforeend", filas);
+    else tbody.innerHTML = filas;
+
+    if (siguientePagina) {
+      tbody.insertAdjacentHTML("beforeend", `
+        <tr id="filaCargarMas"><td colspan="7" class="text-center">
+          <button class="btn btn-sm btn-outline-primary" onclick="cargarEvaluaciones(true)">Cargar más</button>
+        </td></tr>`);
+    }
   } catch (err) { console.error(err); }
 }
 
@@ -1,6 +1,4 @@
 const API = "http://127.0.0.1:5000/api/matriculas";
-const API_ALUMNOS = "http://127.0.0.1:5000/api/alumnos";
-const API_CURSOS = "http://127.0.0.1:5000/api/cursos";
 
 const tbody = document.getElementById("tbodyMatriculas");
 const modalEl = document.getElementById("modalMatricula");
@@ -16,6 +14,15 @@ const tituloModal = document.querySelector("#modalMatricula .modal-title");
 
 let matriculaIdEditar = null;
 
+// Paginación (cursor devuelto por el backend)
+const LIMITE_PAGINA = 50;
+const CAMPOS_LISTADO = "id,alumno,curso,ciclo,estado";
+let siguientePagina = null;
+
+// Combos: llegan junto con la primera página en GET /api/matriculas/inicio
+let alumnosCombo = [];
+let cursosPorCiclo = {};
+
 // Reemplazar el contenedor de checkboxes por un SELECT dinámicamente o asegurarse que en el HTML exista un container limpio
 // Vamos a inyectar un Select en lugar de los checkboxes
 divCursosContainer.innerHTML = `
@@ -28,20 +35,46 @@ const selectCurso = document.getElementById("selectCurso");
 
 
 // ==========================================
-//  LISTAR
+//  INICIO (una sola request para toda la página)
 // ==========================================
-async function cargarMatriculas() {
+async function cargarInicio() {
   tbody.innerHTML = '<tr><td colspan="6" class="text-center">Cargando...</td></tr>';
   try {
-    const res = await fetch(API);
+    const res = await fetch(`${API}/inicio?limit=${LIMITE_PAGINA}&fields=${CAMPOS_LISTADO}`);
     const data = await res.json();
+    if (!res.ok) throw new Error(data.error || "Error al cargar la página");
+
+    alumnosCombo = data.alumnos;
+    cursosPorCiclo = data.cursos;
+    pintarMatriculas(data.matriculas, false);
+  } catch (err) { console.error(err); }
+}
+
+// ==========================================
+//  LISTAR
+// ==========================================
+async function cargarMatriculas(masResultados = false) {
+  if (!masResultados) {
+    tbody.innerHTML = '<tr><td colspan="6" class="text-center">Cargando...</td></tr>';
+  }
+  try {
+    let url = `${API}?limit=${LIMITE_PAGINA}&fields=${CAMPOS_LISTADO}`;
+    if (masResultados && siguientePagina) url += `&after=${encodeURIComponent(siguientePagina)}`;
+    const res = await fetch(url);
+    pintarMatriculas(await res.json(), masResultados);
+  } catch (err) { console.error(err); }
+}
+
+function pintarMatriculas(pagina, masResultados) {
+    const data = pagina.datos;
+    siguientePagina = pagina.siguiente;
     
-    if(!data.length) {
+    if(!masResultados && !data.length) {
       tbody.innerHTML = '<tr><td colspan="6" class="text-center text-muted">No hay matrículas</td></tr>';
       return;
     }
 
-    tbody.innerHTML = data.map(m => `
+    const filas = data.map(m => `
       <tr class="align-middle">
         <td>${m.id}</td>
         <td>${m.alumno}</td>
@@ -54,7 +87,17 @@ async function cargarMatriculas() {
         </td>
       </tr>
     `).join("");
-  } catch (err) { console.error(err); }
+
+    document.getElementById("filaCargarMas")?.remove();
+    if (masResultados) tbody.insertAdjacentHTML("beforeend", filas);
+    else tbody.innerHTML = filas;
+
+    if (siguientePagina) {
+      tbody.insertAdjacentHTML("beforeend", `
+        <tr id="filaCargarMas"><td colspan="6" class="text-center">
+          <button class="btn btn-sm btn-outline-primary" onclick="cargarMatriculas(true)">Cargar más</button>
+        </td></tr>`);
+    }
 }
 
 function getColor(estado) {
@@ -67,10 +110,9 @@ function getColor(estado) {
 //  CARGAS DE DATOS (Combos)
 // ==========================================
 async function cargarAlumnosCombo() {
-    const res = await fetch(API_ALUMNOS);
-    const data = await res.json();
+    await inicio;
     selectAlumno.innerHTML = '<option value="">Seleccione alumno...</option>' + 
-        data.map(a => `<option value="${a.id}">${a.apellido} ${a.nombre}</option>`).join("");
+        alumnosCombo.map(a => `<option value="${a.id}">${a.apellido} ${a.nombre}</option>`).join("");
 }
 
 async function cargarCursosCombo(ciclo) {
@@ -80,9 +122,8 @@ async function cargarCursosCombo(ciclo) {
         return;
     }
     
-    const res = await fetch(API_CURSOS);
-    const data = await res.json();
-    const filtrados = data.filter(c => c.ciclo == ciclo);
+    await inicio;
+    const filtrados = cursosPorCiclo[ciclo] || [];
     
     if(filtrados.length === 0) {
         selectCurso.innerHTML = '<option value="">No hay cursos en este ciclo</option>';
@@ -192,4 +233,4 @@ window.eliminarMatricula = async (id) => {
     } catch(e) { alert("Error al eliminar"); }
 };
 
-cargarMatriculas();
\ No newline at end of file
+const inicio = cargarInicio();
\ No newline at end of file
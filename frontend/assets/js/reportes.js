@@ -1,5 +1,7 @@
 const API_REPORTES = "http://127.0.0.1:5000/api/reportes";
-const API_ALUMNOS = "http://127.0.0.1:5000/api/alumnos";
+
+// Estadísticas por ciclo: llegan con el combo en GET /api/reportes/inicio (se usan una vez)
+let alumnosCiclo = null;
 
 const alertContainer = document.getElementById("alertContainer");
 
@@ -12,13 +14,17 @@ function mostrarAlerta(msg, tipo = "success") {
 }
 
 // ==========================================
-//  CARGAR COMBO ALUMNOS
+//  INICIO: COMBO ALUMNOS + REPORTE 2 (una sola request)
 // ==========================================
-async function cargarComboAlumnos() {
+async function cargarInicio() {
   const select = document.getElementById("selectAlumnoReporte");
   try {
-    const res = await fetch(API_ALUMNOS);
-    const alumnos = await res.json();
+    const res = await fetch(`${API_REPORTES}/inicio`);
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error || "Error al consultar");
+
+    const alumnos = data.alumnos;
+    alumnosCiclo = data.alumnos_ciclo;
     
     if (!alumnos.length) {
       select.innerHTML = '<option value="">No hay alumnos registrados</option>';
@@ -139,8 +145,16 @@ async function cargarAlumnosCiclo() {
   contenedor.innerHTML = '<div class="text-center py-4"><div class="spinner-border text-primary"></div></div>';
 
   try {
-    const res = await fetch(`${API_REPORTES}/alumnos_ciclo`);
-    const data = await res.json();
+    // La primera vez se usa lo que trajo /inicio; al volver a la pestaña se consulta de nuevo
+    // (con ETag: si nada cambió el servidor responde 304 sin recalcular)
+    await inicio;
+    let data = alumnosCiclo;
+    alumnosCiclo = null;
+    if (!data) {
+      const res = await fetch(`${API_REPORTES}/alumnos_ciclo`);
+      data = await res.json();
+      if (!res.ok) throw new Error(data.error || "Sin datos");
+    }
 
     if (!data.length) {
       contenedor.innerHTML = '<p class="text-center py-4">No hay datos disponibles.</p>';
@@ -173,8 +187,10 @@ async function cargarAlumnosCiclo() {
 // ==========================================
 //  INICIALIZACIÓN
 // ==========================================
+let inicio = null;
+
 document.addEventListener('DOMContentLoaded', function() {
-  cargarComboAlumnos();
+  inicio = cargarInicio();
 
   // Escuchar cambios de pestaña
   const tabs = document.querySelectorAll('[data-bs-toggle="tab"]');